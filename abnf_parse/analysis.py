@@ -0,0 +1,444 @@
+from __future__ import annotations
+from typing import Iterable
+from re import compile as re_compile, escape as re_escape
+
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, ConcatenationNode, LiteralNode, \
+    RangedLiteralNode, RepetitionNode, ByteClassNode
+from abnf_parse.graph import iter_nodes
+
+ALL_BYTES: frozenset[int] = frozenset(range(256))
+
+_GUARDED_NODE_TYPES = frozenset({AlternationNode, ConcatenationNode, RepetitionNode})
+
+
+def _literal_byte_sets(node: LiteralNode) -> list[frozenset[int]]:
+    """
+    Return the sets of bytes matched by each byte of a literal.
+    """
+
+    return [
+        frozenset({byte | 0x20, byte & ~0x20}) if not node.case_sensitive and bytes([byte]).isalpha()
+        else frozenset({byte})
+        for byte in node.value
+    ]
+
+
+class GrammarAnalyzer:
+    """
+    Compute static properties of the matches of nodes, such as the bytes with which they can start.
+
+    Nodes of other types than the ones in `abnf_parse.structures.evaluation_node` are assumed to possibly match
+    anything. The results are cached per node; nodes must not be modified after they have been analyzed.
+    """
+
+    def __init__(self):
+        self._first_bytes: dict[EvaluationNode, frozenset[int]] = {}
+        self._nullable: dict[EvaluationNode, bool] = {}
+        self._min_lengths: dict[EvaluationNode, int] = {}
+        self._max_lengths: dict[EvaluationNode, int | None] = {}
+        self._required_byte_sets: dict[EvaluationNode, list[frozenset[int]]] = {}
+        self._possible_bytes: dict[EvaluationNode, frozenset[int]] = {}
+
+    def _analyze_first_bytes(self, nodes: Iterable[EvaluationNode]) -> None:
+        """
+        Compute the first bytes and nullability of the nodes reachable from some nodes.
+
+        As rules may recurse, the values are computed as a fixed point: starting from no bytes and non-nullable, the
+        values of all nodes are recomputed from the values of their child nodes until none changes.
+        """
+
+        new_nodes = [node for node in iter_nodes(nodes=nodes) if node not in self._first_bytes]
+
+        for node in new_nodes:
+            self._first_bytes[node] = frozenset()
+            self._nullable[node] = False
+
+        changed = True
+        while changed:
+            changed = False
+
+            for node in new_nodes:
+                first_bytes, nullable = self._compute_first_bytes(node=node)
+                if first_bytes != self._first_bytes[node] or nullable != self._nullable[node]:
+                    self._first_bytes[node] = first_bytes
+                    self._nullable[node] = nullable
+                    changed = True
+
+    def _compute_first_bytes(self, node: EvaluationNode) -> tuple[frozenset[int], bool]:
+        match node:
+            case LiteralNode():
+                if not node.value:
+                    return frozenset(), True
+                return _literal_byte_sets(node=node)[0], False
+            case RangedLiteralNode():
+                return frozenset(range(node.min_value, node.max_value + 1)), False
+            case ByteClassNode():
+                return frozenset(byte for byte, names in enumerate(node.table) if names is not None), False
+            case ConcatenationNode() if node.node_a is not None and node.node_b is not None:
+                first_bytes = self._first_bytes[node.node_a]
+                if self._nullable[node.node_a]:
+                    first_bytes |= self._first_bytes[node.node_b]
+                return first_bytes, self._nullable[node.node_a] and self._nullable[node.node_b]
+            case AlternationNode():
+                return (
+                    frozenset().union(*(self._first_bytes[child] for child in node.nodes)),
+                    any(self._nullable[child] for child in node.nodes)
+                )
+            case RepetitionNode():
+                return self._first_bytes[node.node], node.min_value == 0 or self._nullable[node.node]
+            case _:
+                return ALL_BYTES, True
+
+    def first_bytes(self, node: EvaluationNode) -> frozenset[int]:
+        """
+        Return the bytes with which the non-empty matches of a node can start.
+
+        :param node: The node to be analyzed.
+        :return: The set of byte values.
+        """
+
+        if node not in self._first_bytes:
+            self._analyze_first_bytes(nodes=[node])
+
+        return self._first_bytes[node]
+
+    def nullable(self, node: EvaluationNode) -> bool:
+        """
+        Return whether a node can produce an empty match.
+
+        :param node: The node to be analyzed.
+        :return: Whether the node can produce an empty match.
+        """
+
+        if node not in self._nullable:
+            self._analyze_first_bytes(nodes=[node])
+
+        return self._nullable[node]
+
+    def min_length(self, node: EvaluationNode) -> int:
+        """
+        Return the minimum length of the matches of a node.
+
+        A `RepetitionNode` produces a match with fewer than `min_value` iterations if an iteration ends at the end of
+        the input, so the minimum length of a repetition is that of a single iteration.
+
+        :param node: The node to be analyzed.
+        :return: The minimum length.
+        """
+
+        if node in self._min_lengths:
+            return self._min_lengths[node]
+
+        # Guard against cycles; a recursive node is treated as possibly empty.
+        self._min_lengths[node] = 0
+
+        match node:
+            case LiteralNode():
+                min_length = len(node.value)
+            case RangedLiteralNode() | ByteClassNode():
+                min_length = 1
+            case ConcatenationNode() if node.node_a is not None and node.node_b is not None:
+                min_length = self.min_length(node=node.node_a) + self.min_length(node=node.node_b)
+            case AlternationNode():
+                min_length = min((self.min_length(node=child) for child in node.nodes), default=0)
+            case RepetitionNode():
+                min_length = self.min_length(node=node.node) if node.min_value > 0 else 0
+            case _:
+                min_length = 0
+
+        self._min_lengths[node] = min_length
+
+        return min_length
+
+    def max_length(self, node: EvaluationNode) -> int | None:
+        """
+        Return the maximum length of the matches of a node.
+
+        :param node: The node to be analyzed.
+        :return: The maximum length, or `None` if the length is unbounded.
+        """
+
+        if node in self._max_lengths:
+            return self._max_lengths[node]
+
+        # Guard against cycles; a recursive node is treated as unbounded.
+        self._max_lengths[node] = None
+
+        match node:
+            case LiteralNode():
+                max_length = len(node.value)
+            case RangedLiteralNode() | ByteClassNode():
+                max_length = 1
+            case ConcatenationNode() if node.node_a is not None and node.node_b is not None:
+                max_length_a = self.max_length(node=node.node_a)
+                max_length_b = self.max_length(node=node.node_b)
+                max_length = max_length_a + max_length_b if max_length_a is not None and max_length_b is not None \
+                    else None
+            case AlternationNode():
+                max_lengths = [self.max_length(node=child) for child in node.nodes]
+                max_length = None if None in max_lengths else max(max_lengths, default=0)
+            case RepetitionNode():
+                body_max_length = self.max_length(node=node.node)
+                if body_max_length == 0:
+                    max_length = 0
+                elif node.max_value is None or body_max_length is None:
+                    max_length = None
+                else:
+                    max_length = node.max_value * body_max_length
+            case _:
+                max_length = None
+
+        self._max_lengths[node] = max_length
+
+        return max_length
+
+    def possible_bytes(self, node: EvaluationNode) -> frozenset[int]:
+        """
+        Return the bytes that can occur in the matches of a node.
+
+        :param node: The node to be analyzed.
+        :return: The set of byte values.
+        """
+
+        if (possible_bytes := self._possible_bytes.get(node)) is not None:
+            return possible_bytes
+
+        possible_bytes = frozenset()
+
+        for reachable_node in iter_nodes(nodes=[node]):
+            match reachable_node:
+                case LiteralNode():
+                    possible_bytes = possible_bytes.union(*_literal_byte_sets(node=reachable_node))
+                case RangedLiteralNode() | ByteClassNode():
+                    possible_bytes |= self.first_bytes(node=reachable_node)
+                case AlternationNode() | ConcatenationNode() | RepetitionNode():
+                    pass
+                case _:
+                    possible_bytes = ALL_BYTES
+                    break
+
+        self._possible_bytes[node] = possible_bytes
+
+        return possible_bytes
+
+    def required_byte_sets(self, node: EvaluationNode) -> list[frozenset[int]]:
+        """
+        Return sets of bytes such that every match of a node contains at least one byte of each set.
+
+        For example, every match of a concatenation containing the literal `"@"` contains the byte `@`. The sets are not
+        exhaustive.
+
+        :param node: The node to be analyzed.
+        :return: The sets of bytes.
+        """
+
+        if node in self._required_byte_sets:
+            return self._required_byte_sets[node]
+
+        # Guard against cycles; nothing is known to be required by a recursive node.
+        self._required_byte_sets[node] = []
+
+        required_byte_sets: list[frozenset[int]]
+
+        match node:
+            case LiteralNode():
+                required_byte_sets = _literal_byte_sets(node=node)
+            case RangedLiteralNode() | ByteClassNode():
+                required_byte_sets = [self.first_bytes(node=node)]
+            case ConcatenationNode() if node.node_a is not None and node.node_b is not None:
+                required_byte_sets = [
+                    *self.required_byte_sets(node=node.node_a),
+                    *self.required_byte_sets(node=node.node_b)
+                ]
+            case AlternationNode() if node.nodes:
+                # A match of the alternation is a match of one of its alternatives, and so contains a byte of the
+                # most specific set of that alternative.
+                child_byte_sets = [self.required_byte_sets(node=child) for child in node.nodes]
+                if all(child_byte_sets):
+                    required_byte_sets = [
+                        frozenset().union(*(min(byte_sets, key=len) for byte_sets in child_byte_sets))
+                    ]
+                else:
+                    required_byte_sets = []
+            case RepetitionNode() if node.min_value > 0:
+                required_byte_sets = self.required_byte_sets(node=node.node)
+            case _:
+                required_byte_sets = []
+
+        # Keep only the distinct sets.
+        required_byte_sets = list(dict.fromkeys(required_byte_sets))
+        self._required_byte_sets[node] = required_byte_sets
+
+        return required_byte_sets
+
+    def overlapping_repetitions(self, node: EvaluationNode) -> list[RepetitionNode]:
+        """
+        Return the repetitions within the repeated part of another repetition, in the closure of a node, that make the
+        iterations of the enclosing repetition ambiguous.
+
+        Such a repetition has a varying number of iterations, and its iterations can start with bytes that can also
+        follow it and that can also start an iteration of an enclosing repetition, as `1*( SP / HTAB / field-vchar )`
+        in `*( field-vchar [ 1*( SP / HTAB / field-vchar ) field-vchar ] )`, or the trailing `OWS` in
+        `*( OWS ";" OWS [ parameter ] )`. A run of such bytes can then be split between the iterations in many ways,
+        which multiply across the iterations of the enclosing repetition, so that a backtracking evaluation of an input
+        that does not match may take exponential time.
+
+        :param node: The node to be analyzed.
+        :return: The repetitions, each once.
+        """
+
+        repetitions: dict[RepetitionNode, None] = {}
+
+        # The nodes to visit, with the bytes that can follow their matches and the bytes that can start an iteration of
+        # an enclosing repetition.
+        stack: list[tuple[EvaluationNode, frozenset[int], frozenset[int]]] = [(node, frozenset(), frozenset())]
+        visited_states: set[tuple[EvaluationNode, frozenset[int], frozenset[int]]] = set()
+
+        while stack:
+            state = stack.pop()
+            if state in visited_states:
+                continue
+            visited_states.add(state)
+
+            current_node, follow_bytes, iteration_bytes = state
+
+            match current_node:
+                case ConcatenationNode() if current_node.node_a is not None and current_node.node_b is not None:
+                    node_a_follow_bytes = self.first_bytes(node=current_node.node_b)
+                    if self.nullable(node=current_node.node_b):
+                        node_a_follow_bytes |= follow_bytes
+
+                    stack.append((current_node.node_b, follow_bytes, iteration_bytes))
+                    stack.append((current_node.node_a, node_a_follow_bytes, iteration_bytes))
+                case AlternationNode():
+                    stack.extend((child, follow_bytes, iteration_bytes) for child in reversed(current_node.nodes))
+                case RepetitionNode():
+                    first_bytes = self.first_bytes(node=current_node.node)
+
+                    if (
+                        current_node.min_value != current_node.max_value
+                        and first_bytes & follow_bytes
+                        and first_bytes & iteration_bytes
+                    ):
+                        repetitions[current_node] = None
+
+                    if current_node.max_value is None or current_node.max_value > 1:
+                        # An iteration can be followed by another one.
+                        stack.append((current_node.node, follow_bytes | first_bytes, iteration_bytes | first_bytes))
+                    else:
+                        stack.append((current_node.node, follow_bytes, iteration_bytes))
+
+        return list(repetitions)
+
+
+def add_match_guards(nodes: Iterable[EvaluationNode], analyzer: GrammarAnalyzer | None = None) -> None:
+    """
+    Make the nodes reachable from some nodes skip their evaluation at offsets where they cannot match.
+
+    A node that cannot produce an empty match is given a table of the bytes with which its matches can start, and
+    the minimum length of its matches. When the node is evaluated at an offset where the byte is not in the table, or
+    where the remaining input is shorter than the minimum length, no matches are produced, without evaluating the node
+    and its descendants. Leaf nodes, which check the input directly, are not given guards.
+
+    The nodes must not be modified afterwards in ways that change their matches.
+
+    :param nodes: The nodes from which to start.
+    :param analyzer: An analyzer to use, possibly holding results for the nodes already.
+    """
+
+    analyzer = analyzer or GrammarAnalyzer()
+    nodes = list(nodes)
+
+    analyzer._analyze_first_bytes(nodes=nodes)
+
+    for node in iter_nodes(nodes=nodes):
+        if type(node) not in _GUARDED_NODE_TYPES or analyzer.nullable(node=node):
+            continue
+
+        first_bytes = analyzer.first_bytes(node=node)
+        node._first_bytes_table = bytes(byte in first_bytes for byte in range(256))
+        node._min_match_length = max(analyzer.min_length(node=node), 1)
+
+
+def add_dispatch_tables(nodes: Iterable[EvaluationNode], analyzer: GrammarAnalyzer | None = None) -> None:
+    """
+    Make the alternations reachable from some nodes evaluate only the alternatives that can match the current byte.
+
+    Each alternation whose alternatives do not all possibly match at every offset is given a table mapping each byte
+    value, and the end of the input, to the alternatives that can match there, in order: those whose matches can start
+    with the byte, and those that can produce an empty match. Where the sets of bytes with which the alternatives'
+    matches can start are disjoint, as for `num-val` in the ABNF grammar, the table leads straight to the one viable
+    alternative; where they overlap, as for the `method` and `HTTP-version` of `start-line` at `H`, the viable
+    alternatives are still tried in order.
+
+    The nodes must not be modified afterwards in ways that change their matches.
+
+    :param nodes: The nodes from which to start.
+    :param analyzer: An analyzer to use, possibly holding results for the nodes already.
+    """
+
+    analyzer = analyzer or GrammarAnalyzer()
+    nodes = list(nodes)
+
+    analyzer._analyze_first_bytes(nodes=nodes)
+
+    for node in iter_nodes(nodes=nodes):
+        if type(node) is not AlternationNode or len(node.nodes) < 2:
+            continue
+
+        viable_nodes_per_byte: list[list[EvaluationNode]] = [[] for _ in range(257)]
+
+        for child in node.nodes:
+            if analyzer.nullable(node=child):
+                viable_bytes = range(257)
+            else:
+                viable_bytes = analyzer.first_bytes(node=child)
+
+            for byte in viable_bytes:
+                viable_nodes_per_byte[byte].append(child)
+
+        if all(len(viable_nodes) == len(node.nodes) for viable_nodes in viable_nodes_per_byte):
+            continue
+
+        # Share the tuples of equal entries.
+        distinct_entries: dict[tuple[EvaluationNode, ...], tuple[EvaluationNode, ...]] = {}
+        node._dispatch_table = tuple(
+            distinct_entries.setdefault(tuple(viable_nodes), tuple(viable_nodes))
+            for viable_nodes in viable_nodes_per_byte
+        )
+
+
+def add_run_patterns(nodes: Iterable[EvaluationNode], analyzer: GrammarAnalyzer | None = None) -> None:
+    """
+    Make the repetitions reachable from some nodes whose repeated node matches a single byte of a set, such as `*DIGIT`,
+    `1*tchar` and `*( SP / HTAB )` once optimized, find the run of matching bytes with a single pattern match.
+
+    Each such repetition is given a pattern matching a run of the bytes, from which the matches of the repetition are
+    derived without evaluating the iterations one by one; the matches of the iterations are created only when the
+    children of a match are accessed. The matches produced, and the backtracking limit, are the same as when the
+    iterations are evaluated.
+
+    The nodes must not be modified afterwards in ways that change their matches.
+
+    :param nodes: The nodes from which to start.
+    :param analyzer: An analyzer to use, possibly holding results for the nodes already.
+    """
+
+    analyzer = analyzer or GrammarAnalyzer()
+
+    for node in iter_nodes(nodes=nodes):
+        if not isinstance(node, RepetitionNode) or node.max_value == 0:
+            continue
+
+        match node.node:
+            case RangedLiteralNode() | ByteClassNode():
+                pass
+            case LiteralNode() if len(node.node.value) == 1:
+                pass
+            case _:
+                continue
+
+        if not (run_bytes := analyzer.first_bytes(node=node.node)):
+            continue
+
+        node._run_pattern = re_compile(b'[' + b''.join(re_escape(bytes([byte])) for byte in sorted(run_bytes)) + b']*')
@@ -0,0 +1,140 @@
+from __future__ import annotations
+from typing import ByteString, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, Future
+from collections import deque
+from itertools import islice
+from os import cpu_count
+
+from abnf_parse.exceptions import ABNFParseError
+from abnf_parse.structures.evaluation_node import EvaluationNode
+
+# The number of chunks submitted per worker ahead of the chunk whose results are being returned.
+_PENDING_CHUNKS_PER_WORKER = 2
+
+BatchResult = bool | tuple[bytes | tuple[int, int] | None, ...] | ABNFParseError | None
+
+
+@dataclass(frozen=True)
+class _BatchOptions:
+    fields: tuple[str, ...] | None
+    field_offsets: bool
+    backtracking_limit: int | bool | None
+
+
+# The node and options of the batch evaluated by the current worker process, set once when the worker starts.
+_worker_node: EvaluationNode | None = None
+_worker_options: _BatchOptions | None = None
+
+
+def _initialize_worker(node: EvaluationNode, options: _BatchOptions) -> None:
+    global _worker_node, _worker_options
+
+    _worker_node = node
+    _worker_options = options
+
+
+def _evaluate_source(node: EvaluationNode, options: _BatchOptions, source: ByteString | str) -> BatchResult:
+    """
+    Evaluate an input and produce its result as returned by `evaluate_many`.
+    """
+
+    try:
+        if options.fields is None:
+            return node.matches(source=source, backtracking_limit=options.backtracking_limit)
+
+        match_node = node.evaluate(
+            source=source,
+            backtracking_limit=options.backtracking_limit,
+            exception_on_no_match=False
+        )
+    except ABNFParseError as error:
+        # The error concerns only this input; the other inputs of the batch are evaluated nonetheless.
+        return error
+
+    if match_node is None:
+        return None
+
+    field_results: list[bytes | tuple[int, int] | None] = []
+
+    for field_name in options.fields:
+        if (field_node := next(match_node.search(name=field_name), None)) is None:
+            field_results.append(None)
+        elif options.field_offsets:
+            field_results.append((field_node.start_offset, field_node.end_offset))
+        else:
+            field_results.append(field_node.get_value())
+
+    return tuple(field_results)
+
+
+def _evaluate_chunk(sources: list[ByteString | str]) -> list[BatchResult]:
+    return [_evaluate_source(node=_worker_node, options=_worker_options, source=source) for source in sources]
+
+
+def _iter_chunks(sources: Iterable[ByteString | memoryview | str], chunk_size: int) -> Iterator[list[ByteString | str]]:
+    iterator = iter(sources)
+
+    while chunk := list(islice(iterator, chunk_size)):
+        # A `memoryview` cannot be pickled.
+        yield [source.tobytes() if isinstance(source, memoryview) else source for source in chunk]
+
+
+def evaluate_many(
+    node: EvaluationNode,
+    sources: Iterable[ByteString | memoryview | str],
+    workers: int | None = None,
+    chunksize: int = 256,
+    fields: Sequence[str] | None = None,
+    field_offsets: bool = False,
+    backtracking_limit: int | bool | None = True
+) -> Iterator[BatchResult]:
+    """
+    Evaluate many inputs against a node in a pool of worker processes, producing a compact result for each input.
+
+    The node is sent to each worker once, when the worker starts; with the `fork` start method, it is inherited rather
+    than sent, and a compiled node is compiled anew in each worker otherwise. The inputs are sent in chunks, and the
+    results are produced in the order of the inputs. Only a bounded number of chunks are in flight at a time, so the
+    inputs may be an iterator over more inputs than fit in memory.
+
+    :param node: The node against which to evaluate the inputs.
+    :param sources: The inputs to be evaluated.
+    :param workers: The number of worker processes. `None`: Use the number of CPUs.
+    :param chunksize: The number of inputs sent to a worker at a time.
+    :param fields: The names of rules whose matches to produce for each input. If not provided, only whether each
+        input matches is produced.
+    :param field_offsets: Whether to produce the start and end offsets of the matches of the fields rather than their
+        values.
+    :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule. See
+        `EvaluationNode.evaluate`.
+    :return: An iterator yielding, for each input, whether it matches, or, if `fields` is provided, `None` if it does
+        not match, otherwise a tuple with the value, or the offsets, of the first match of each field found in a
+        breadth-first search, or `None` for fields that are not found. For an input whose evaluation raised an
+        `ABNFParseError`, such as a `BacktrackingLimitReachedError`, the error is yielded instead.
+    """
+
+    if chunksize < 1:
+        raise ValueError(f'The chunk size must be positive: {chunksize}')
+
+    workers = workers or cpu_count() or 1
+
+    options = _BatchOptions(
+        fields=tuple(fields) if fields is not None else None,
+        field_offsets=field_offsets,
+        backtracking_limit=backtracking_limit
+    )
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(node, options))
+    try:
+        pending_futures: deque[Future[list[BatchResult]]] = deque()
+
+        for chunk in _iter_chunks(sources=sources, chunk_size=chunksize):
+            pending_futures.append(executor.submit(_evaluate_chunk, chunk))
+
+            if len(pending_futures) >= workers * _PENDING_CHUNKS_PER_WORKER:
+                yield from pending_futures.popleft().result()
+
+        while pending_futures:
+            yield from pending_futures.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+from typing import Hashable, Iterable, Iterator
+from weakref import WeakValueDictionary
+
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, LiteralTrieNode, ConcatenationNode, \
+    LiteralNode, RangedLiteralNode, ByteClassNode, RepetitionNode, OptionNode
+from abnf_parse.graph import child_nodes, replace_child_nodes, iter_nodes
+
+# The canonical unnamed nodes of all canonicalized nodes of the process, by their structural keys. The nodes are
+# referenced weakly, so that a node is forgotten once no ruleset uses it.
+_CANONICAL_NODES: WeakValueDictionary[Hashable, EvaluationNode] = WeakValueDictionary()
+
+# The attributes set by `abnf_parse.analysis` that depend only on the structure of a node, and that are the same for
+# structurally identical nodes, save for the child nodes referenced by the dispatch tables.
+_ANALYSIS_ATTRIBUTE_NAMES = ('_first_bytes_table', '_min_match_length', '_dispatch_table', '_run_pattern')
+
+
+def _is_named(node: EvaluationNode) -> bool:
+    return node.name != node.__class__.__name__
+
+
+def _structural_key(node: EvaluationNode) -> Hashable | None:
+    """
+    Return a key that is equal for unnamed nodes of the same type, with the same values and the same child nodes, which
+    produce the same matches, or `None` if the node is not to be shared.
+
+    The child nodes are identified by their identities, which the canonical node keeps alive by referencing them, so
+    that keys of nodes with the canonical child nodes compare equal.
+    """
+
+    node_type = type(node)
+
+    if node_type is LiteralNode:
+        return node_type, node.value, node.case_sensitive
+    if node_type is RangedLiteralNode:
+        return node_type, node.min_value, node.max_value
+    if node_type is ByteClassNode:
+        return node_type, node.table
+    if node_type is AlternationNode or node_type is LiteralTrieNode:
+        return node_type, tuple(id(child_node) for child_node in node.nodes)
+    if node_type is ConcatenationNode:
+        return node_type, id(node.node_a), id(node.node_b)
+    if node_type is RepetitionNode or node_type is OptionNode:
+        return node_type, id(node.node), node.min_value, node.max_value
+
+    return None
+
+
+def _iter_nodes_post_order(nodes: Iterable[EvaluationNode]) -> Iterator[EvaluationNode]:
+    """
+    Iterate over the nodes reachable from some nodes, each node once, in depth-first post-order. Of the nodes of a
+    cycle, the one by which the cycle is entered is yielded last.
+    """
+
+    visited_nodes: set[EvaluationNode] = set()
+
+    for root_node in nodes:
+        if root_node in visited_nodes:
+            continue
+
+        visited_nodes.add(root_node)
+        stack: list[tuple[EvaluationNode, Iterator[EvaluationNode]]] = [(root_node, iter(child_nodes(node=root_node)))]
+
+        while stack:
+            node, remaining_child_nodes = stack[-1]
+
+            for child_node in remaining_child_nodes:
+                if child_node not in visited_nodes:
+                    visited_nodes.add(child_node)
+                    stack.append((child_node, iter(child_nodes(node=child_node))))
+                    break
+            else:
+                stack.pop()
+                yield node
+
+
+def _transfer_analysis(node: EvaluationNode, canonical_node: EvaluationNode) -> None:
+    """
+    Give a canonical node the analysis results of the node that it replaces, which it does not have itself, as when
+    the canonical node comes from a ruleset that was not analyzed.
+    """
+
+    for attribute_name in _ANALYSIS_ATTRIBUTE_NAMES:
+        if attribute_name in vars(node) and attribute_name not in vars(canonical_node):
+            setattr(canonical_node, attribute_name, getattr(node, attribute_name))
+
+
+def _replace_dispatch_table_nodes(node: AlternationNode, replacements: dict[EvaluationNode, EvaluationNode]) -> None:
+    """
+    Replace the child nodes that have replacements in the dispatch table of an alternation, so that the table refers
+    to the same nodes as the alternation.
+    """
+
+    # The equal entries of the table are shared, and remain so.
+    replaced_entries: dict[tuple[EvaluationNode, ...], tuple[EvaluationNode, ...]] = {}
+    for entry in node._dispatch_table:
+        if entry not in replaced_entries:
+            replaced_entries[entry] = tuple(replacements.get(child_node, child_node) for child_node in entry)
+
+    node._dispatch_table = tuple(replaced_entries[entry] for entry in node._dispatch_table)
+
+
+def canonicalize(nodes: Iterable[EvaluationNode]) -> dict[EvaluationNode, EvaluationNode]:
+    """
+    Replace the unnamed nodes reachable from some nodes with structurally identical nodes, so that each distinct
+    subtree, such as `"."` or `1*DIGIT`, is one node shared by all the rules, and all the rulesets, that contain it.
+
+    The nodes are hash-consed from the leaves up: an unnamed node is identical to another if it has the same type, the
+    same values and the same child nodes, once those have been replaced, and then produces the same matches. The first
+    such node that was canonicalized in the process is kept. Named nodes are never replaced, as the rules are
+    referenced by name and may be modified separately, but their child nodes are.
+
+    The references to the replaced nodes are updated in all reachable nodes, including in the dispatch tables of the
+    grammar analysis and in the caches of the evaluators of regular rules, so that nodes may be canonicalized after
+    they have been analyzed, as when unpickled. The shared nodes must not be modified afterwards, as that would affect
+    all the rules containing them.
+
+    :param nodes: The nodes from which to start.
+    :return: A map of the replaced nodes to the nodes that replaced them.
+    """
+
+    nodes = list(nodes)
+    replacements: dict[EvaluationNode, EvaluationNode] = {}
+
+    for node in _iter_nodes_post_order(nodes=nodes):
+        replace_child_nodes(node=node, replacements=replacements)
+
+        if _is_named(node=node) or (key := _structural_key(node=node)) is None:
+            continue
+
+        canonical_node = _CANONICAL_NODES.get(key)
+        # A canonical node whose child nodes were since replaced no longer has the key, and is superseded.
+        if canonical_node is None or _structural_key(node=canonical_node) != key:
+            _CANONICAL_NODES[key] = node
+        elif canonical_node is not node:
+            replacements[node] = canonical_node
+            _transfer_analysis(node=node, canonical_node=canonical_node)
+
+    if not replacements:
+        return replacements
+
+    regular_rule_evaluators = set()
+
+    for node in iter_nodes(nodes=nodes):
+        if isinstance(node, AlternationNode) and node._dispatch_table is not None and any(
+            child_node in replacements
+            for entry in node._dispatch_table
+            for child_node in entry
+        ):
+            _replace_dispatch_table_nodes(node=node, replacements=replacements)
+
+        if node._regular_rule_evaluator is not None:
+            regular_rule_evaluators.add(node._regular_rule_evaluator)
+
+    for regular_rule_evaluator in regular_rule_evaluators:
+        regular_rule_evaluator.discard_nodes(nodes=replacements)
+
+    return replacements
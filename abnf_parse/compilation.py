@@ -0,0 +1,760 @@
+from __future__ import annotations
+from typing import Callable, Iterator
+from dataclasses import dataclass
+from itertools import count
+from re import sub as re_sub
+from linecache import cache as linecache_cache
+
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, ConcatenationNode, LiteralNode, \
+    RangedLiteralNode, RepetitionNode, OptionNode, ByteClassNode, LiteralTrieNode
+from abnf_parse.structures.evaluation_context import EvaluationContext
+from abnf_parse.structures.match_node import MatchNode
+from abnf_parse.exceptions import BacktrackingLimitReachedError
+
+_CONCATENATION_NAME = ConcatenationNode.__name__
+_REPETITION_NAMES = frozenset({RepetitionNode.__name__, OptionNode.__name__})
+_FLATTENED_NAMES = _REPETITION_NAMES | {_CONCATENATION_NAME}
+
+# Python limits the number of statically nested blocks in a function to 20, and the indentation depth to 100 levels.
+_MAX_LOOP_DEPTH = 12
+_MAX_NESTING_DEPTH = 60
+
+
+class CompiledNode(EvaluationNode):
+    """
+    An evaluation node that evaluates the tree of another node with generated Python code specialized for that tree.
+
+    The matches are the same, and are produced in the same order, as when evaluating the original node.
+    """
+
+    def __init__(
+        self,
+        node: EvaluationNode,
+        source_code: str,
+        function: Callable[[memoryview, int, EvaluationContext], Iterator[MatchNode]]
+    ):
+        super().__init__(name=node.name)
+        self.node = node
+        self.source_code = source_code
+        self._function = function
+
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
+        return self._function(source, offset, context)
+
+    def __reduce__(self):
+        # The generated function cannot be pickled; compile the node anew when unpickling.
+        return compile_node, (self.node,)
+
+
+@dataclass
+class _Match:
+    """
+    A match as known when generating code: expressions for its offsets, and what is statically known about it.
+
+    A match is only turned into a `MatchNode` (materialized) when the generated code needs the object.
+    """
+
+    # The name of the match, or `None` if it can only be determined at runtime.
+    name: str | None
+    start: str
+    end: str
+    min_length: int
+    # Whether all children of the match are known to have a non-zero length.
+    children_non_empty: bool
+    # The variable holding the `MatchNode`, if it has been materialized.
+    variable: str | None = None
+    # The unfiltered children of a concatenation match, as (match, whether to include its children instead) pairs.
+    parts: list[tuple[_Match, bool]] | None = None
+    # An expression evaluating to the children of the match.
+    children: str | None = None
+
+
+class _Compiler:
+
+    def __init__(self, root: EvaluationNode):
+        self._root = root
+        self._lines: list[str] = []
+        self._indentation = 0
+        self._loop_depth = 0
+        self._emitted_yield = False
+        self._counter = count()
+        self._inlined_nodes: set[EvaluationNode] = set()
+
+        self._function_names: dict[EvaluationNode, str] = {}
+        self._pending_nodes: list[EvaluationNode] = []
+        self._foreign_nodes: list[EvaluationNode] = []
+        self._constants: dict[int, tuple[str, object]] = {}
+
+        self._static_names: dict[EvaluationNode, str | None] = {}
+        self._min_lengths: dict[EvaluationNode, int] = {}
+        self._children_non_empty: dict[EvaluationNode, bool] = {}
+        self._nesting: dict[EvaluationNode, tuple[int, int]] = {}
+
+    def compile(self) -> CompiledNode:
+        root_function_name = self._function_name(node=self._root)
+
+        while self._pending_nodes:
+            self._emit_function(node=self._pending_nodes.pop(0))
+
+        source_code = '\n'.join(self._lines) + '\n'
+        file_name = f'<abnf_parse compiled {self._root.name} {id(self._root):x}>'
+
+        # Make the generated code show up in tracebacks.
+        linecache_cache[file_name] = (len(source_code), None, source_code.splitlines(keepends=True), file_name)
+
+        namespace = {
+            '_new_match_node': MatchNode._new,
+            '_concatenate_children': ConcatenationNode._concatenate_children,
+            '_FLATTENED_NAMES': _FLATTENED_NAMES,
+            '_foreign_nodes': self._foreign_nodes,
+            'BacktrackingLimitReachedError': BacktrackingLimitReachedError,
+            **dict(self._constants.values())
+        }
+        exec(compile(source_code, file_name, 'exec'), namespace)
+
+        return CompiledNode(node=self._root, source_code=source_code, function=namespace[root_function_name])
+
+    # Static analysis.
+
+    @staticmethod
+    def _is_named(node: EvaluationNode) -> bool:
+        return node.name != node.__class__.__name__
+
+    @staticmethod
+    def _is_leaf(node: EvaluationNode) -> bool:
+        return type(node) in {LiteralNode, RangedLiteralNode, ByteClassNode}
+
+    @staticmethod
+    def _is_supported(node: EvaluationNode) -> bool:
+        if type(node) is ConcatenationNode:
+            return node.node_a is not None and node.node_b is not None
+
+        return type(node) in {
+            AlternationNode, LiteralTrieNode, RepetitionNode, OptionNode, LiteralNode, RangedLiteralNode, ByteClassNode
+        }
+
+    def _static_name(self, node: EvaluationNode) -> str | None:
+        """
+        Return the name that the matches of a node are known to have, or `None` if it varies.
+        """
+
+        if not self._is_supported(node=node):
+            return None
+
+        if self._is_named(node=node):
+            return node.name
+
+        if type(node) is ByteClassNode:
+            names = {names[0] for names in node.table if names is not None}
+            return next(iter(names)) if len(names) == 1 else None
+
+        if not isinstance(node, AlternationNode):
+            return node.name
+
+        if node in self._static_names:
+            return self._static_names[node]
+
+        # Guard against cycles of unnamed alternations.
+        self._static_names[node] = None
+
+        names = {self._static_name(node=child) for child in node.nodes}
+        static_name = next(iter(names)) if len(names) == 1 else None
+        self._static_names[node] = static_name
+
+        return static_name
+
+    def _min_length(self, node: EvaluationNode) -> int:
+        """
+        Return a lower bound of the length of the matches of a node.
+        """
+
+        if node in self._min_lengths:
+            return self._min_lengths[node]
+
+        # Guard against cycles.
+        self._min_lengths[node] = 0
+
+        match node:
+            case LiteralNode():
+                min_length = len(node.value)
+            case RangedLiteralNode() | ByteClassNode():
+                min_length = 1
+            case ConcatenationNode() if self._is_supported(node=node):
+                min_length = self._min_length(node=node.node_a) + self._min_length(node=node.node_b)
+            case AlternationNode():
+                min_length = min((self._min_length(node=child) for child in node.nodes), default=0)
+            case RepetitionNode():
+                min_length = node.min_value * self._min_length(node=node.node)
+            case _:
+                min_length = 0
+
+        self._min_lengths[node] = min_length
+
+        return min_length
+
+    def _children_are_non_empty(self, node: EvaluationNode) -> bool:
+        """
+        Return whether the children of the matches of a node are known to have non-zero lengths.
+        """
+
+        if node in self._children_non_empty:
+            return self._children_non_empty[node]
+
+        # Guard against cycles.
+        self._children_non_empty[node] = False
+
+        if not self._is_supported(node=node):
+            children_non_empty = False
+        elif self._is_leaf(node=node) or isinstance(node, ConcatenationNode):
+            children_non_empty = True
+        elif isinstance(node, RepetitionNode):
+            children_non_empty = self._min_length(node=node.node) > 0
+        else:
+            children_non_empty = all(
+                self._children_are_non_empty(node=child) and self._min_length(node=child) > 0
+                for child in node.nodes
+            )
+
+        self._children_non_empty[node] = children_non_empty
+
+        return children_non_empty
+
+    def _is_inlined(self, node: EvaluationNode) -> bool:
+        return (
+            self._is_leaf(node=node)
+            or (isinstance(node, ConcatenationNode) and not self._is_named(node=node) and self._is_supported(node=node))
+        )
+
+    def _nesting_depth(self, node: EvaluationNode) -> tuple[int, int]:
+        """
+        Return the number of nested loops and the number of nested blocks that inlining a node produces.
+        """
+
+        if node in self._nesting:
+            return self._nesting[node]
+
+        # Guard against cycles.
+        self._nesting[node] = (1, 1)
+
+        if self._is_leaf(node=node):
+            nesting = (0, 1)
+        elif self._is_inlined(node=node):
+            loops_a, blocks_a = self._nesting_depth(node=node.node_a)
+            loops_b, blocks_b = self._nesting_depth(node=node.node_b)
+            nesting = (loops_a + loops_b, blocks_a + blocks_b)
+        else:
+            nesting = (1, 1)
+
+        self._nesting[node] = nesting
+
+        return nesting
+
+    # Code generation helpers.
+
+    def _line(self, line: str) -> None:
+        self._lines.append('    ' * self._indentation + line)
+
+    def _variable(self, prefix: str) -> str:
+        return f'{prefix}_{next(self._counter)}'
+
+    def _function_name(self, node: EvaluationNode) -> str:
+        if (function_name := self._function_names.get(node)) is None:
+            if self._is_named(node=node):
+                function_name = f'_rule_{re_sub(r"[^0-9A-Za-z_]", "_", node.name)}_{next(self._counter)}'
+            else:
+                function_name = f'_node_{next(self._counter)}'
+
+            self._function_names[node] = function_name
+            self._pending_nodes.append(node)
+
+        return function_name
+
+    def _constant(self, value: object, prefix: str) -> str:
+        """
+        Make a value available to the generated code as a global variable.
+
+        :return: The name of the variable.
+        """
+
+        if (constant := self._constants.get(id(value))) is None:
+            constant = (f'_{prefix}_{next(self._counter)}', value)
+            self._constants[id(value)] = constant
+
+        return constant[0]
+
+    def _iterator_expression(self, node: EvaluationNode, offset: str) -> str:
+        """
+        Return an expression evaluating to an iterator of the matches of a node at an offset.
+        """
+
+        if self._is_supported(node=node):
+            return f'{self._function_name(node=node)}(source, {offset}, context)'
+
+        self._foreign_nodes.append(node)
+        return (
+            f'_foreign_nodes[{len(self._foreign_nodes) - 1}]._iter_matches(source=source, offset={offset},'
+            f' context=context)'
+        )
+
+    def _materialize(self, match: _Match) -> str:
+        """
+        Emit the creation of the `MatchNode` of a match, if it has not already been created.
+
+        :return: The variable holding the `MatchNode`.
+        """
+
+        if match.variable is None:
+            children = self._children_expression(match=match)
+            match.variable = self._variable(prefix='match')
+            self._line(
+                f'{match.variable} = _new_match_node({match.name!r}, {match.start}, {match.end}, source, {children})'
+            )
+
+        return match.variable
+
+    def _children_expression(self, match: _Match) -> str:
+        if match.children is not None:
+            return match.children
+
+        if match.parts is None:
+            return f'{self._materialize(match=match)}.children'
+
+        elements, needs_filter = self._part_elements(parts=match.parts)
+
+        if needs_filter:
+            return f'[child for child in ({", ".join(elements)},) if child.end_offset != child.start_offset]'
+
+        return f'[{", ".join(elements)}]'
+
+    def _part_elements(self, parts: list[tuple[_Match, bool]]) -> tuple[list[str], bool]:
+        """
+        Return the elements of a list display of the children of a concatenation, and whether they must be filtered.
+        """
+
+        elements: list[str] = []
+        needs_filter = False
+
+        for part, include_children in parts:
+            if not include_children:
+                elements.append(self._materialize(match=part))
+                needs_filter |= part.min_length == 0
+            elif part.parts is not None:
+                part_elements, part_needs_filter = self._part_elements(parts=part.parts)
+                elements.extend(part_elements)
+                needs_filter |= part_needs_filter
+            else:
+                elements.append(f'*{self._children_expression(match=part)}')
+                needs_filter |= not part.children_non_empty
+
+        return elements, needs_filter
+
+    def _leaf_condition(
+        self,
+        node: LiteralNode | RangedLiteralNode | ByteClassNode,
+        offset: str,
+        names: str = 'names'
+    ) -> tuple[str, int]:
+        """
+        Return a condition that is true if a leaf node matches at an offset, and the length of the match.
+
+        For a `ByteClassNode`, the condition assigns the table entry of the byte to the variable named by `names`.
+        """
+
+        if isinstance(node, ByteClassNode):
+            table = self._constant(value=node.table, prefix='table')
+            return f'{offset} < source_length and ({names} := {table}[source[{offset}]]) is not None', 1
+
+        if isinstance(node, RangedLiteralNode):
+            conditions = [f'{offset} < source_length']
+            if node.min_value > 0:
+                conditions.append(f'{node.min_value} <= source[{offset}]')
+            if node.max_value < 0xFF:
+                conditions.append(f'source[{offset}] <= {node.max_value}')
+            return ' and '.join(conditions), 1
+
+        value: bytes = node.value
+        if not value:
+            return 'True', 0
+
+        if len(value) == 1:
+            conditions = [f'{offset} < source_length']
+        else:
+            conditions = [f'{offset} + {len(value)} <= source_length']
+
+        for index, byte in enumerate(value):
+            position = f'source[{offset} + {index}]' if index else f'source[{offset}]'
+            if not node.case_sensitive and bytes([byte]).isalpha():
+                conditions.append(f'{position} | 0x20 == {byte | 0x20}')
+            else:
+                conditions.append(f'{position} == {byte}')
+
+        return ' and '.join(conditions), len(value)
+
+    def _leaf_match_node_expression(
+        self,
+        node: LiteralNode | RangedLiteralNode | ByteClassNode,
+        start: str,
+        end: str,
+        names: str = 'names'
+    ) -> str:
+        """
+        Return an expression creating the `MatchNode` of a leaf node that matched, given its condition was evaluated.
+        """
+
+        if isinstance(node, ByteClassNode):
+            return f'{self._constant(value=node, prefix="node")}._create_match_node({names}, source, {start})'
+
+        return f'_new_match_node({node.name!r}, {start}, {end}, source, [])'
+
+    # Code generation.
+
+    def _emit_match(self, node: EvaluationNode, offset: str, on_match: Callable[[_Match], None]) -> None:
+        """
+        Emit code that finds the matches of a node at an offset, and in which the code emitted by `on_match` is run
+        for each match.
+
+        :param node: The node whose matches to find.
+        :param offset: A variable holding the offset at which to evaluate the node.
+        :param on_match: A callable emitting the code to be run for each match.
+        """
+
+        if self._is_leaf(node=node):
+            names = self._variable(prefix='names')
+            condition, length = self._leaf_condition(node=node, offset=offset, names=names)
+
+            if condition != 'True':
+                self._line(f'if {condition}:')
+                self._indentation += 1
+
+            if length:
+                end = self._variable(prefix='end')
+                self._line(f'{end} = {offset} + {length}')
+            else:
+                end = offset
+
+            if isinstance(node, ByteClassNode):
+                # The structure of the match depends on the byte; create it while the table entry is at hand.
+                variable = self._variable(prefix='match')
+                self._line(
+                    f'{variable} = {self._leaf_match_node_expression(node=node, start=offset, end=end, names=names)}'
+                )
+                match = _Match(
+                    name=self._static_name(node=node),
+                    start=offset,
+                    end=end,
+                    min_length=length,
+                    children_non_empty=True,
+                    variable=variable
+                )
+            else:
+                match = _Match(
+                    name=node.name,
+                    start=offset,
+                    end=end,
+                    min_length=length,
+                    children_non_empty=True,
+                    parts=[]
+                )
+
+            on_match(match)
+
+            if condition != 'True':
+                self._indentation -= 1
+        elif self._is_inlined(node=node) and node not in self._inlined_nodes and self._fits(node=node):
+            self._inlined_nodes.add(node)
+            self._emit_concatenation(node=node, offset=offset, on_match=on_match)
+            self._inlined_nodes.remove(node)
+        else:
+            variable = self._variable(prefix='match')
+            self._line(f'for {variable} in {self._iterator_expression(node=node, offset=offset)}:')
+            self._indentation += 1
+            self._loop_depth += 1
+
+            end = self._variable(prefix='end')
+            self._line(f'{end} = {variable}.end_offset')
+
+            on_match(
+                _Match(
+                    name=self._static_name(node=node),
+                    start=f'{variable}.start_offset',
+                    end=end,
+                    min_length=self._min_length(node=node),
+                    children_non_empty=self._children_are_non_empty(node=node),
+                    variable=variable
+                )
+            )
+
+            self._loop_depth -= 1
+            self._indentation -= 1
+
+    def _fits(self, node: EvaluationNode) -> bool:
+        loops, blocks = self._nesting_depth(node=node)
+        return (
+            self._loop_depth + loops <= _MAX_LOOP_DEPTH
+            and self._indentation + blocks <= _MAX_NESTING_DEPTH
+        )
+
+    def _emit_concatenation(self, node: ConcatenationNode, offset: str, on_match: Callable[[_Match], None]) -> None:
+
+        def on_match_a(match_a: _Match) -> None:
+
+            def on_match_b(match_b: _Match) -> None:
+                on_match(self._concatenate(node=node, match_a=match_a, match_b=match_b))
+
+            self._emit_match(node=node.node_b, offset=match_a.end, on_match=on_match_b)
+
+        self._emit_match(node=node.node_a, offset=offset, on_match=on_match_a)
+
+    def _concatenate(self, node: ConcatenationNode, match_a: _Match, match_b: _Match) -> _Match:
+        """
+        Produce the match of a concatenation from the matches of its left and right nodes.
+
+        Mirrors `ConcatenationNode._concatenate_children`, statically if the names of the matches are known.
+        """
+
+        if match_a.name is None or match_b.name is None:
+            children = self._variable(prefix='children')
+            self._line(
+                f'{children} = _concatenate_children({self._materialize(match=match_a)},'
+                f' {self._materialize(match=match_b)})'
+            )
+            parts = None
+        else:
+            children = None
+
+            node_a_is_repetition_node = match_a.name in _REPETITION_NAMES
+            node_b_is_repetition_node = match_b.name in _REPETITION_NAMES
+
+            if node_a_is_repetition_node or node_b_is_repetition_node:
+                parts = [(match_a, node_a_is_repetition_node), (match_b, node_b_is_repetition_node)]
+            else:
+                parts = [(match_a, match_a.name == _CONCATENATION_NAME), (match_b, match_b.name == _CONCATENATION_NAME)]
+
+        return _Match(
+            name=node.name,
+            start=match_a.start,
+            end=match_b.end,
+            min_length=match_a.min_length + match_b.min_length,
+            children_non_empty=True,
+            parts=parts,
+            children=children
+        )
+
+    def _emit_yield(self, expression: str) -> None:
+        self._line(f'yield {expression}')
+        self._emitted_yield = True
+
+    def _emit_function(self, node: EvaluationNode) -> None:
+        self._indentation = 0
+        self._loop_depth = 0
+        self._emitted_yield = False
+
+        self._line(f'def {self._function_names[node]}(source, offset, context):')
+        self._indentation += 1
+        self._line(f'# {node.__class__.__name__}: {node.name}')
+        self._line('source_length = len(source)')
+
+        match node:
+            case _ if not self._is_supported(node=node) or self._is_leaf(node=node):
+                self._emit_match(
+                    node=node,
+                    offset='offset',
+                    on_match=lambda match: self._emit_yield(expression=self._materialize(match=match))
+                )
+            case RepetitionNode():
+                self._emit_repetition(node=node)
+            case AlternationNode() if node._dispatch_table is not None:
+                # Mirrors `AlternationNode._viable_nodes`, with the viable alternatives as bits of a mask.
+                dispatch_masks = tuple(
+                    sum(1 << index for index, child in enumerate(node.nodes) if child in viable_nodes)
+                    for viable_nodes in node._dispatch_table
+                )
+                self._line(
+                    f'viable = {self._constant(value=dispatch_masks, prefix="dispatch")}'
+                    f'[source[offset] if offset < source_length else 256]'
+                )
+                for index, child in enumerate(node.nodes):
+                    self._line(f'if viable & {1 << index}:')
+                    self._indentation += 1
+                    self._emit_match(
+                        node=child,
+                        offset='offset',
+                        on_match=lambda match: self._emit_alternative(node=node, match=match)
+                    )
+                    self._indentation -= 1
+            case AlternationNode():
+                for child in node.nodes:
+                    self._emit_match(
+                        node=child,
+                        offset='offset',
+                        on_match=lambda match: self._emit_alternative(node=node, match=match)
+                    )
+            case ConcatenationNode():
+                self._inlined_nodes.add(node)
+                self._emit_concatenation(
+                    node=node,
+                    offset='offset',
+                    on_match=lambda match: self._emit_yield(expression=self._materialize(match=match))
+                )
+                self._inlined_nodes.remove(node)
+            case _:
+                self._emit_match(
+                    node=node,
+                    offset='offset',
+                    on_match=lambda match: self._emit_yield(expression=self._materialize(match=match))
+                )
+
+        if not self._emitted_yield:
+            self._line('yield from ()')
+
+        self._lines.append('')
+
+    def _emit_alternative(self, node: AlternationNode, match: _Match) -> None:
+        """
+        Emit the yielding of a match of an alternative of an alternation node. Mirrors `AlternationNode._evaluate`.
+        """
+
+        if not self._is_named(node=node):
+            self._emit_yield(expression=self._materialize(match=match))
+            return
+
+        if match.name is None:
+            variable = self._materialize(match=match)
+            children = f'({variable}.children if {variable}.name in _FLATTENED_NAMES else [{variable}])'
+        elif match.name in _FLATTENED_NAMES:
+            children = self._children_expression(match=match)
+        else:
+            children = f'[{self._materialize(match=match)}]'
+
+        self._emit_yield(expression=f'_new_match_node({node.name!r}, {match.start}, {match.end}, source, {children})')
+
+    def _emit_repetition(self, node: RepetitionNode) -> None:
+        """
+        Emit the body of a repetition function. Mirrors `RepetitionNode._evaluate`.
+        """
+
+        body = node.node
+        max_condition = f'len(match_stack) == {node.max_value} or ' if node.max_value is not None else ''
+
+        if self._is_leaf(node=body) and self._min_length(node=body) > 0:
+            # The body matches at most once at an offset and has a fixed length: find the run of consecutive matches
+            # with a loop, then produce the matches that backtracking would produce, from the longest to the shortest.
+
+            condition, length = self._leaf_condition(node=body, offset='end_offset')
+
+            self._line('match_stack = []')
+            self._line('end_offset = offset')
+            self._line('reached_bound = False')
+            self._line(f'while {condition}:')
+            self._indentation += 1
+            match_node_expression = self._leaf_match_node_expression(
+                node=body,
+                start='end_offset',
+                end=f'end_offset + {length}'
+            )
+            self._line(f'match_stack.append({match_node_expression})')
+            self._line(f'end_offset += {length}')
+            self._line(f'if {max_condition}end_offset == source_length:')
+            self._indentation += 1
+            self._line('reached_bound = True')
+            self._line('break')
+            self._indentation -= 2
+
+            self._line('match_count = len(match_stack)')
+            self._line('if reached_bound:')
+            self._indentation += 1
+            self._emit_yield(expression=f'_new_match_node({node.name!r}, offset, end_offset, source, match_stack[:])')
+            self._line('match_count -= 1')
+            self._indentation -= 1
+
+            self._line('backtracking_limit = context.backtracking_limit')
+            self._line('backtracking_count = 0')
+            self._line('while match_count:')
+            self._indentation += 1
+            self._line(f'end_offset = offset + match_count * {length}')
+            if node.min_value > 1:
+                self._line(f'if match_count >= {node.min_value}:')
+                self._indentation += 1
+            self._emit_yield(
+                expression=f'_new_match_node({node.name!r}, offset, end_offset, source, match_stack[:match_count])'
+            )
+            if node.min_value > 1:
+                self._indentation -= 1
+            self._emit_backtrack(body=body, offset='end_offset')
+            self._line('match_count -= 1')
+            self._indentation -= 1
+        else:
+            self._line('backtracking_limit = context.backtracking_limit')
+            self._line('backtracking_count = 0')
+            self._line('match_stack = []')
+            self._line(f'queue = [{self._iterator_expression(node=body, offset="offset")}]')
+            self._line('while queue:')
+            self._indentation += 1
+            self._line('iterator = queue.pop()')
+            self._line('iteration_match_node = next(iterator, None)')
+            self._line('if iteration_match_node is None:')
+            self._indentation += 1
+            self._line('if not match_stack:')
+            self._line('    continue')
+            if node.min_value > 1:
+                self._line(f'if len(match_stack) >= {node.min_value}:')
+                self._indentation += 1
+            self._emit_yield(
+                expression=(
+                    f'_new_match_node({node.name!r}, offset, match_stack[-1].end_offset, source, match_stack[:])'
+                )
+            )
+            if node.min_value > 1:
+                self._indentation -= 1
+            self._emit_backtrack(body=body, offset='match_stack[-1].end_offset')
+            self._line('match_stack.pop()')
+            self._line('continue')
+            self._indentation -= 1
+
+            self._line('queue.append(iterator)')
+            self._line('match_stack.append(iteration_match_node)')
+            self._line(f'if {max_condition}iteration_match_node.end_offset == source_length:')
+            self._indentation += 1
+            self._emit_yield(
+                expression=(
+                    f'_new_match_node({node.name!r}, offset, iteration_match_node.end_offset, source,'
+                    f' match_stack[:])'
+                )
+            )
+            self._line('match_stack.pop()')
+            self._indentation -= 1
+            self._line('else:')
+            self._indentation += 1
+            iterator = self._iterator_expression(node=body, offset='iteration_match_node.end_offset')
+            self._line(f'queue.append({iterator})')
+            self._indentation -= 2
+
+        if node.min_value == 0:
+            self._emit_yield(expression=f'_new_match_node({node.name!r}, offset, offset, source, [])')
+
+    def _emit_backtrack(self, body: EvaluationNode, offset: str) -> None:
+        self._line('backtracking_count += 1')
+        self._line('if backtracking_limit is not None and backtracking_count >= backtracking_limit:')
+        self._indentation += 1
+        self._line('raise BacktrackingLimitReachedError(')
+        self._line(
+            f'    rule_name={body.name!r}, source=source, offset={offset}, count=backtracking_count,'
+            f' limit=backtracking_limit'
+        )
+        self._line(')')
+        self._indentation -= 1
+
+
+def compile_node(node: EvaluationNode) -> CompiledNode:
+    """
+    Generate and load Python code specialized for evaluating the tree of a node.
+
+    Literal and ranged-literal checks are inlined, unnamed concatenations become nested loops within the function of
+    their closest named (or otherwise non-inlined) ancestor, and repetitions of fixed-length literals are matched with
+    a plain loop. Nodes of other types than the ones in `abnf_parse.structures.evaluation_node` are evaluated as usual.
+
+    :param node: The node whose tree to compile.
+    :return: A node that evaluates to the same matches as the provided node.
+    """
+
+    return _Compiler(root=node).compile()
@@ -12,6 +12,10 @@ class NoMatchError(ABNFParseError):
         self.source = source
         self.offset = offset
 
+    def __reduce__(self):
+        # A `memoryview` cannot be pickled, which is needed to send the error between processes; send a copy instead.
+        return self.__class__, (self.rule_name, bytes(self.source), self.offset)
+
 
 class BacktrackingLimitReachedError(ABNFParseError):
     def __init__(self, rule_name: str, source: memoryview, offset: int, count: int, limit: int):
@@ -26,6 +30,26 @@ class BacktrackingLimitReachedError(ABNFParseError):
         self.count = count
         self.limit = limit
 
+    def __reduce__(self):
+        # A `memoryview` cannot be pickled, which is needed to send the error between processes; send a copy instead.
+        return self.__class__, (self.rule_name, bytes(self.source), self.offset, self.count, self.limit)
+
+
+class LeftRecursionError(ABNFParseError):
+    def __init__(self, rule_name: str, source: memoryview, offset: int):
+        super().__init__(
+            f'The rule "{rule_name}" was reached again at the offset {offset} while being evaluated there, which only'
+            f' left-recursive rules do and which is not supported.'
+        )
+
+        self.rule_name = rule_name
+        self.source = source
+        self.offset = offset
+
+    def __reduce__(self):
+        # A `memoryview` cannot be pickled, which is needed to send the error between processes; send a copy instead.
+        return self.__class__, (self.rule_name, bytes(self.source), self.offset)
+
 
 class RuleNotFoundError(Exception):
     def __init__(self, rule_name: str):
@@ -0,0 +1,395 @@
+from __future__ import annotations
+from typing import ByteString, Generator
+
+from abnf_parse.exceptions import LeftRecursionError
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, ConcatenationNode, RepetitionNode
+from abnf_parse.structures.evaluation_context import EvaluationContext
+from abnf_parse.structures.match_node import MatchNode
+
+# A generator computing the end offsets of a node at an offset, which yields the nodes and offsets whose end offsets it
+# needs and is sent them.
+_EndOffsetsGenerator = Generator[tuple[EvaluationNode, int], list[int], list[int]]
+# A generator extracting the match of a node over a span, which yields the nodes and spans whose matches it needs and is
+# sent them.
+_MatchNodeGenerator = Generator[tuple[EvaluationNode, int, int], MatchNode | None, MatchNode | None]
+
+
+class ParseForest:
+    """
+    A parse forest of an input, built on demand, from which the matches of nodes are extracted without backtracking.
+
+    For each node and offset at which the node is evaluated, the forest holds the distinct end offsets of the matches
+    of the node, in the order in which the backtracking engine would first produce a match ending there. The (node,
+    start offset, end offset) triples are the shared nodes of the forest: however many ways a node can match a span,
+    and however often the span is reached, the span is represented, and its end offsets computed, once. A concatenation
+    at an offset combines at most every end offset of its left node with every end offset of its right node, so
+    building the forest takes at most cubic time in the length of the input, whereas the backtracking engine may take
+    exponential time on ambiguous grammars.
+
+    The match of a node over a span is extracted by following, at each choice point, the first alternative, split
+    point or iteration that the backtracking engine would have taken and that the forest shows can complete the span.
+    The resulting `MatchNode` tree is the same as the one produced by the backtracking engine.
+
+    A node that is reached again at the same offset while its end offsets are being computed, which happens only in
+    left-recursive rules, on which the backtracking engine does not terminate either, raises a `LeftRecursionError`.
+    Nodes of other types than alternations, concatenations and repetitions are evaluated with their own methods.
+
+    The nodes are evaluated, and their matches extracted, with explicit stacks rather than recursively, so that the
+    depth of nesting in the input, such as that of the parentheses of a comment, is not limited by the Python stack.
+    """
+
+    def __init__(self, source: memoryview):
+        """
+        :param source: The input to be parsed.
+        """
+
+        self.source = source
+
+        self._end_offsets: dict[tuple[EvaluationNode, int], list[int]] = {}
+        self._end_offset_sets: dict[tuple[EvaluationNode, int], frozenset[int]] = {}
+        # The nodes and offsets whose end offsets are being computed.
+        self._pending_keys: set[tuple[EvaluationNode, int]] = set()
+        self._context = EvaluationContext()
+
+    def _known_end_offsets(self, node: EvaluationNode, offset: int) -> list[int] | None:
+        """
+        Return the end offsets of the matches of a node at an offset if they are known without evaluating the node.
+        """
+
+        key = (node, offset)
+        if (end_offsets := self._end_offsets.get(key)) is not None:
+            return end_offsets
+
+        if node._first_bytes_table is not None and (
+            len(self.source) - offset < node._min_match_length or not node._first_bytes_table[self.source[offset]]
+        ):
+            end_offsets = []
+            self._end_offsets[key] = end_offsets
+            return end_offsets
+
+        return None
+
+    def _start_end_offsets(self, node: EvaluationNode, offset: int) -> _EndOffsetsGenerator:
+        """
+        Mark the end offsets of a node at an offset as being computed and return the generator computing them.
+        """
+
+        key = (node, offset)
+        if key in self._pending_keys:
+            raise LeftRecursionError(rule_name=node.name, source=self.source, offset=offset)
+
+        self._pending_keys.add(key)
+
+        match node:
+            case AlternationNode():
+                return self._alternation_end_offsets(node=node, offset=offset)
+            case ConcatenationNode():
+                return self._concatenation_end_offsets(node=node, offset=offset)
+            case RepetitionNode():
+                return self._repetition_end_offsets(node=node, offset=offset)
+            case _:
+                return self._leaf_end_offsets(node=node, offset=offset)
+
+    def end_offsets(self, node: EvaluationNode, offset: int) -> list[int]:
+        """
+        Return the distinct end offsets of the matches of a node at an offset.
+
+        :param node: The node to be evaluated.
+        :param offset: The offset at which to evaluate the node.
+        :return: The end offsets, in the order in which the backtracking engine would first produce a match ending
+            there.
+        """
+
+        if (end_offsets := self._known_end_offsets(node=node, offset=offset)) is not None:
+            return end_offsets
+
+        # Each generator yields the nodes and offsets whose end offsets it needs, which are sent back once computed.
+        stack: list[tuple[tuple[EvaluationNode, int], _EndOffsetsGenerator]] = [
+            ((node, offset), self._start_end_offsets(node=node, offset=offset))
+        ]
+        sent_end_offsets: list[int] | None = None
+
+        while True:
+            key, generator = stack[-1]
+            try:
+                child_node, child_offset = generator.send(sent_end_offsets)
+            except StopIteration as stop_iteration:
+                end_offsets = stop_iteration.value
+                self._pending_keys.discard(key)
+                self._end_offsets[key] = end_offsets
+
+                stack.pop()
+                if not stack:
+                    return end_offsets
+
+                sent_end_offsets = end_offsets
+                continue
+
+            sent_end_offsets = self._known_end_offsets(node=child_node, offset=child_offset)
+            if sent_end_offsets is None:
+                stack.append(
+                    ((child_node, child_offset), self._start_end_offsets(node=child_node, offset=child_offset))
+                )
+
+    def _matches_span(self, node: EvaluationNode, start_offset: int, end_offset: int) -> bool:
+        """
+        Return whether a node has a match over a span.
+        """
+
+        key = (node, start_offset)
+        if (end_offset_set := self._end_offset_sets.get(key)) is None:
+            end_offset_set = frozenset(self.end_offsets(node=node, offset=start_offset))
+            self._end_offset_sets[key] = end_offset_set
+
+        return end_offset in end_offset_set
+
+    def _leaf_end_offsets(self, node: EvaluationNode, offset: int) -> _EndOffsetsGenerator:
+        # The end offsets of other nodes are not needed.
+        yield from ()
+        return list(node._recognize(source=self.source, offset=offset, context=self._context))
+
+    def _alternation_end_offsets(self, node: AlternationNode, offset: int) -> _EndOffsetsGenerator:
+        end_offsets: dict[int, None] = {}
+
+        for child in node._viable_nodes(source=self.source, offset=offset):
+            end_offsets.update(dict.fromkeys((yield child, offset)))
+
+        return list(end_offsets)
+
+    def _concatenation_end_offsets(self, node: ConcatenationNode, offset: int) -> _EndOffsetsGenerator:
+        if node.node_a is None:
+            raise ValueError('The left node is `None`.')
+
+        if node.node_b is None:
+            raise ValueError('The right node is `None`.')
+
+        end_offsets: dict[int, None] = {}
+
+        for end_offset_a in (yield node.node_a, offset):
+            end_offsets.update(dict.fromkeys((yield node.node_b, end_offset_a)))
+
+        return list(end_offsets)
+
+    def _repetition_end_offsets(self, node: RepetitionNode, offset: int) -> _EndOffsetsGenerator:
+        # Mirrors `RepetitionNode._recognize`, with the end offsets of the iterations taken from the forest.
+
+        end_offsets: dict[int, None] = {}
+        visited_states: set[tuple[int, int]] = {node._iteration_state(iteration_count=0, end_offset=offset)}
+
+        # The end offsets of the iterations on the stack, and, for each, the index of the next end offset of the
+        # following iteration to be explored.
+        end_offset_stack: list[int] = [offset]
+        index_stack: list[int] = [0]
+
+        while index_stack:
+            iteration_end_offsets = yield node.node, end_offset_stack[-1]
+
+            if index_stack[-1] == len(iteration_end_offsets):
+                iteration_count = len(end_offset_stack) - 1
+                if iteration_count > 0 and iteration_count >= node.min_value:
+                    end_offsets[end_offset_stack[-1]] = None
+
+                end_offset_stack.pop()
+                index_stack.pop()
+                continue
+
+            iteration_end_offset = iteration_end_offsets[index_stack[-1]]
+            index_stack[-1] += 1
+
+            iteration_count = len(end_offset_stack)
+            state = node._iteration_state(iteration_count=iteration_count, end_offset=iteration_end_offset)
+            if state in visited_states:
+                continue
+            visited_states.add(state)
+
+            if iteration_count == node.max_value or iteration_end_offset == len(self.source):
+                end_offsets[iteration_end_offset] = None
+            else:
+                end_offset_stack.append(iteration_end_offset)
+                index_stack.append(0)
+
+        if node.min_value == 0:
+            end_offsets.setdefault(offset, None)
+
+        return list(end_offsets)
+
+    def _repetition_iteration_end_offsets(
+        self,
+        node: RepetitionNode,
+        start_offset: int,
+        end_offset: int
+    ) -> list[int] | None:
+        """
+        Return the end offsets of the iterations of the first match of a repetition over a span.
+
+        The iterations are explored in the order of the backtracking engine, which produces a match once the iterations
+        following it have been explored, or, if the maximum number of iterations or the end of the input is reached,
+        right away.
+
+        :return: The end offsets of the iterations, or `None` if the repetition has no match over the span.
+        """
+
+        visited_states: set[tuple[int, int]] = {node._iteration_state(iteration_count=0, end_offset=start_offset)}
+
+        end_offset_stack: list[int] = [start_offset]
+        index_stack: list[int] = [0]
+
+        while index_stack:
+            iteration_end_offsets = self.end_offsets(node=node.node, offset=end_offset_stack[-1])
+
+            if index_stack[-1] == len(iteration_end_offsets):
+                iteration_count = len(end_offset_stack) - 1
+                if iteration_count > 0 and iteration_count >= node.min_value and end_offset_stack[-1] == end_offset:
+                    return end_offset_stack[1:]
+
+                end_offset_stack.pop()
+                index_stack.pop()
+                continue
+
+            iteration_end_offset = iteration_end_offsets[index_stack[-1]]
+            index_stack[-1] += 1
+
+            iteration_count = len(end_offset_stack)
+            state = node._iteration_state(iteration_count=iteration_count, end_offset=iteration_end_offset)
+            if state in visited_states:
+                continue
+            visited_states.add(state)
+
+            if iteration_count == node.max_value or iteration_end_offset == len(self.source):
+                if iteration_end_offset == end_offset:
+                    return [*end_offset_stack[1:], iteration_end_offset]
+            else:
+                end_offset_stack.append(iteration_end_offset)
+                index_stack.append(0)
+
+        if node.min_value == 0 and start_offset == end_offset:
+            return []
+
+        return None
+
+    def match_node(self, node: EvaluationNode, start_offset: int, end_offset: int) -> MatchNode | None:
+        """
+        Extract the match of a node over a span that the backtracking engine would produce first.
+
+        :param node: The node whose match to extract.
+        :param start_offset: The start offset of the span.
+        :param end_offset: The end offset of the span.
+        :return: The match, or `None` if the node has no match over the span.
+        """
+
+        stack: list[_MatchNodeGenerator] = [
+            self._node_match_node(node=node, start_offset=start_offset, end_offset=end_offset)
+        ]
+        sent_match_node: MatchNode | None = None
+
+        while True:
+            try:
+                child_node, child_start_offset, child_end_offset = stack[-1].send(sent_match_node)
+            except StopIteration as stop_iteration:
+                stack.pop()
+                if not stack:
+                    return stop_iteration.value
+
+                sent_match_node = stop_iteration.value
+                continue
+
+            sent_match_node = None
+            stack.append(
+                self._node_match_node(node=child_node, start_offset=child_start_offset, end_offset=child_end_offset)
+            )
+
+    def _node_match_node(self, node: EvaluationNode, start_offset: int, end_offset: int) -> _MatchNodeGenerator:
+        if not self._matches_span(node=node, start_offset=start_offset, end_offset=end_offset):
+            return None
+
+        source = self.source
+
+        match node:
+            case AlternationNode():
+                for child in node._viable_nodes(source=source, offset=start_offset):
+                    match_node = yield child, start_offset, end_offset
+                    if match_node is not None:
+                        break
+                else:
+                    return None
+
+                if node.name == node.__class__.__name__:
+                    return match_node
+
+                return MatchNode(
+                    name=node.name,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
+                    source=source,
+                    children=node._alternative_children(match_node=match_node)
+                )
+            case ConcatenationNode():
+                for end_offset_a in self.end_offsets(node=node.node_a, offset=start_offset):
+                    if self._matches_span(node=node.node_b, start_offset=end_offset_a, end_offset=end_offset):
+                        break
+                else:
+                    return None
+
+                match_node_a = yield node.node_a, start_offset, end_offset_a
+                match_node_b = yield node.node_b, end_offset_a, end_offset
+
+                return MatchNode(
+                    name=node.name,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
+                    source=source,
+                    children=node._concatenate_children(match_node_a=match_node_a, match_node_b=match_node_b)
+                )
+            case RepetitionNode():
+                iteration_end_offsets = self._repetition_iteration_end_offsets(
+                    node=node,
+                    start_offset=start_offset,
+                    end_offset=end_offset
+                )
+                if iteration_end_offsets is None:
+                    return None
+
+                iteration_spans = zip([start_offset, *iteration_end_offsets[:-1]], iteration_end_offsets)
+
+                children: list[MatchNode] = []
+                for span_start_offset, span_end_offset in iteration_spans:
+                    children.append((yield node.node, span_start_offset, span_end_offset))
+
+                return MatchNode(
+                    name=node.name,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
+                    source=source,
+                    children=children
+                )
+            case _:
+                for match_node in node._iter_matches(source=source, offset=start_offset, context=self._context):
+                    if match_node.end_offset == end_offset:
+                        return match_node
+
+                return None
+
+
+def evaluate(node: EvaluationNode, source: ByteString | memoryview | str, offset: int = 0) -> MatchNode | None:
+    """
+    Evaluate a node against an input from an offset to its end using a parse forest.
+
+    See `ParseForest`. The result is the same as that of `EvaluationNode.evaluate`, which uses the backtracking engine,
+    but is found in at most cubic time, with no backtracking limit needed.
+
+    :param node: The node to be evaluated.
+    :param source: The input to be evaluated.
+    :param offset: The offset at which to start reading the input.
+    :return: A `MatchNode` if the input matches, otherwise `None`.
+    """
+
+    if isinstance(source, str):
+        source = source.encode(encoding='charmap')
+
+    source_memoryview = memoryview(source)
+
+    return ParseForest(source=source_memoryview).match_node(
+        node=node,
+        start_offset=offset,
+        end_offset=len(source_memoryview)
+    )
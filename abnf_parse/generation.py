@@ -0,0 +1,245 @@
+from __future__ import annotations
+from math import inf
+from random import Random
+
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, ConcatenationNode, LiteralNode, \
+    RangedLiteralNode, RepetitionNode, ByteClassNode
+from abnf_parse.analysis import GrammarAnalyzer, ALL_BYTES
+from abnf_parse.exceptions import BacktrackingLimitReachedError
+from abnf_parse.graph import child_nodes, iter_nodes
+
+
+class InputGenerator:
+    """
+    Generate random inputs that match a node, by walking its graph and choosing alternatives, repetition counts and
+    bytes at random, and inputs that nearly match it, for benchmarks and stress tests.
+
+    Every input that `generate` produces matches the node, as the evaluation accepts any input that can be derived from
+    the grammar, although evaluating it may exceed a backtracking limit. To keep inputs finite for recursive rules and
+    unbounded repetitions, once the named rules are nested deeper than `max_depth`, or the input has reached
+    `target_length`, the input is completed in the shortest way, so inputs may be somewhat longer than
+    `target_length`.
+
+    A generator holds the state of the input being generated and is not to be shared by several threads.
+    """
+
+    def __init__(
+        self,
+        seed: int | None = None,
+        target_length: int = 256,
+        max_depth: int = 16,
+        max_repetitions: int = 4,
+        analyzer: GrammarAnalyzer | None = None
+    ):
+        """
+        :param seed: The seed of the random choices, to generate the same inputs again, or `None` for a random seed.
+        :param target_length: The length beyond which inputs are completed in the shortest way.
+        :param max_depth: The number of nested named rules beyond which inputs are completed in the shortest way.
+        :param max_repetitions: The maximum number of iterations of a repetition beyond its minimum.
+        :param analyzer: The analyzer with which to find the bytes that cannot occur in matches, for near misses.
+        """
+
+        self.target_length = target_length
+        self.max_depth = max_depth
+        self.max_repetitions = max_repetitions
+
+        self._random = Random(seed)
+        self._analyzer = analyzer or GrammarAnalyzer()
+
+        # For each node, the length and the height of its shortest derivation, or infinity if it cannot produce a
+        # finite input. Following the shortest derivation reduces the height at each step, which ends the generation
+        # also for recursive rules.
+        self._shortest_derivations: dict[EvaluationNode, tuple[float, float]] = {}
+        self._class_bytes: dict[ByteClassNode, bytes] = {}
+
+        # The state of the input being generated.
+        self._chunks: list[bytes] = []
+        self._length = 0
+        self._long_runs = False
+
+    def _analyze_shortest_derivations(self, node: EvaluationNode) -> None:
+        """
+        Compute the shortest derivations of the nodes reachable from a node, as a fixed point: starting from none, the
+        values of all nodes are recomputed from the values of their child nodes until none changes.
+        """
+
+        new_nodes = [node for node in iter_nodes(nodes=[node]) if node not in self._shortest_derivations]
+
+        for new_node in new_nodes:
+            self._shortest_derivations[new_node] = (inf, inf)
+
+        changed = True
+        while changed:
+            changed = False
+
+            for new_node in new_nodes:
+                shortest_derivation = self._compute_shortest_derivation(node=new_node)
+                if shortest_derivation < self._shortest_derivations[new_node]:
+                    self._shortest_derivations[new_node] = shortest_derivation
+                    changed = True
+
+    def _compute_shortest_derivation(self, node: EvaluationNode) -> tuple[float, float]:
+        match node:
+            case LiteralNode():
+                return len(node.value), 0
+            case RangedLiteralNode():
+                return 1, 0
+            case ByteClassNode():
+                return (1, 0) if any(names is not None for names in node.table) else (inf, inf)
+            case ConcatenationNode():
+                child_derivations = [self._shortest_derivations[child] for child in child_nodes(node=node)]
+                return (
+                    sum(length for length, _ in child_derivations),
+                    max((height for _, height in child_derivations), default=-1) + 1
+                )
+            case AlternationNode():
+                length, height = min((self._shortest_derivations[child] for child in node.nodes), default=(inf, inf))
+                return length, height + 1
+            case RepetitionNode():
+                if node.min_value == 0:
+                    return 0, 0
+                length, height = self._shortest_derivations[node.node]
+                return node.min_value * length, height + 1
+            case _:
+                raise ValueError(f'Inputs cannot be generated for nodes of the type {node.__class__.__name__}.')
+
+    def _shortest_derivation(self, node: EvaluationNode) -> tuple[float, float]:
+        if node not in self._shortest_derivations:
+            self._analyze_shortest_derivations(node=node)
+
+        return self._shortest_derivations[node]
+
+    def _append(self, value: bytes) -> None:
+        self._chunks.append(value)
+        self._length += len(value)
+
+    def _generate_node(self, node: EvaluationNode, depth: int) -> None:
+        if node.name != node.__class__.__name__:
+            depth += 1
+
+        shortest = depth > self.max_depth or self._length >= self.target_length
+
+        match node:
+            case LiteralNode():
+                if node.case_sensitive:
+                    self._append(value=node.value)
+                else:
+                    self._append(
+                        value=bytes(
+                            byte ^ 0x20 if bytes([byte]).isalpha() and self._random.random() < 0.5 else byte
+                            for byte in node.value
+                        )
+                    )
+            case RangedLiteralNode():
+                self._append(value=bytes([self._random.randint(node.min_value, node.max_value)]))
+            case ByteClassNode():
+                if (class_bytes := self._class_bytes.get(node)) is None:
+                    class_bytes = bytes(byte for byte, names in enumerate(node.table) if names is not None)
+                    self._class_bytes[node] = class_bytes
+                self._append(value=bytes([self._random.choice(class_bytes)]))
+            case ConcatenationNode():
+                for child_node in child_nodes(node=node):
+                    self._generate_node(node=child_node, depth=depth)
+            case AlternationNode():
+                if shortest:
+                    child_node = min(node.nodes, key=self._shortest_derivation)
+                else:
+                    child_node = self._random.choice(
+                        [child_node for child_node in node.nodes if self._shortest_derivation(node=child_node)[0] < inf]
+                    )
+                self._generate_node(node=child_node, depth=depth)
+            case RepetitionNode():
+                max_count = node.min_value + self.max_repetitions
+                if node.max_value is not None:
+                    max_count = min(max_count, node.max_value)
+
+                if shortest:
+                    iteration_count = node.min_value
+                elif self._long_runs:
+                    iteration_count = max_count
+                else:
+                    iteration_count = self._random.randint(node.min_value, max_count)
+
+                for iteration_number in range(iteration_count):
+                    # Stop iterating at the minimum once the input has reached the target length.
+                    if iteration_number >= node.min_value and self._length >= self.target_length:
+                        break
+                    self._generate_node(node=node.node, depth=depth)
+            case _:
+                raise ValueError(f'Inputs cannot be generated for nodes of the type {node.__class__.__name__}.')
+
+    def generate(self, node: EvaluationNode, long_runs: bool = False) -> bytes:
+        """
+        Generate a random input that matches a node.
+
+        :param node: The node, typically a rule of a ruleset, that the input is to match.
+        :param long_runs: Whether to iterate each repetition the maximum number of times, up to `max_repetitions` beyond
+            its minimum, rather than a random number of times, which produces long runs of repeated parts.
+        :return: The input.
+        """
+
+        if self._shortest_derivation(node=node)[0] == inf:
+            raise ValueError(f'The node {node.name} cannot match any finite input.')
+
+        self._chunks = []
+        self._length = 0
+        self._long_runs = long_runs
+
+        try:
+            self._generate_node(node=node, depth=0)
+            return b''.join(self._chunks)
+        finally:
+            self._chunks = []
+
+    def generate_near_miss(
+        self,
+        node: EvaluationNode,
+        long_runs: bool = True,
+        max_attempts: int = 100,
+        backtracking_limit: int | bool | None = True
+    ) -> bytes:
+        """
+        Generate a random input that does not match a node, but nearly does: an input that matches, with its last byte
+        replaced, a byte appended, or truncated.
+
+        With `long_runs`, the inputs consist of long runs of repeated parts that fail only at their end, which makes the
+        backtracking engine try the ways of splitting the runs before rejecting them. A byte that cannot occur in a
+        match is used to replace or append when there is one, in which case the input is known not to match; otherwise
+        candidates are checked with `EvaluationNode.matches` until one does not match, or exceeds the backtracking
+        limit.
+
+        :param node: The node, typically a rule of a ruleset, that the input is nearly to match.
+        :param long_runs: Whether to iterate each repetition the maximum number of times. See `generate`.
+        :param max_attempts: The maximum number of candidates to check.
+        :param backtracking_limit: The backtracking limit with which to check candidates. See `EvaluationNode.evaluate`.
+        :return: The input.
+        """
+
+        impossible_bytes = bytes(sorted(ALL_BYTES - self._analyzer.possible_bytes(node=node)))
+
+        for _ in range(max_attempts):
+            source = self.generate(node=node, long_runs=long_runs)
+
+            strategy = self._random.choice(('replace', 'append', 'truncate') if source else ('append',))
+            if strategy == 'truncate':
+                candidate = source[:self._random.randrange(len(source))]
+                known_mismatch = False
+            else:
+                if impossible_bytes:
+                    byte = self._random.choice(impossible_bytes)
+                else:
+                    byte = self._random.randrange(256)
+                known_mismatch = bool(impossible_bytes)
+
+                candidate = (source[:-1] if strategy == 'replace' else source) + bytes([byte])
+
+            if known_mismatch:
+                return candidate
+
+            try:
+                if not node.matches(source=candidate, backtracking_limit=backtracking_limit):
+                    return candidate
+            except BacktrackingLimitReachedError:
+                return candidate
+
+        raise ValueError(f'No input nearly matching the node {node.name} was found in {max_attempts} attempts.')
@@ -0,0 +1,64 @@
+from __future__ import annotations
+from typing import Iterable, Iterator
+
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, ConcatenationNode, RepetitionNode
+
+
+def child_nodes(node: EvaluationNode) -> tuple[EvaluationNode, ...]:
+    """
+    Return the child nodes of a node.
+
+    :param node: The node whose child nodes to return.
+    :return: The child nodes of the node, in evaluation order.
+    """
+
+    match node:
+        case AlternationNode():
+            return tuple(node.nodes)
+        case ConcatenationNode():
+            return tuple(child_node for child_node in (node.node_a, node.node_b) if child_node is not None)
+        case RepetitionNode():
+            return (node.node,)
+        case _:
+            return ()
+
+
+def replace_child_nodes(node: EvaluationNode, replacements: dict[EvaluationNode, EvaluationNode]) -> None:
+    """
+    Replace the child nodes of a node that have replacements.
+
+    :param node: The node whose child nodes to replace.
+    :param replacements: A map of nodes to the nodes that are to replace them.
+    """
+
+    match node:
+        case AlternationNode():
+            if any(child_node in replacements for child_node in node.nodes):
+                node.nodes = tuple(replacements.get(child_node, child_node) for child_node in node.nodes)
+        case ConcatenationNode():
+            node.node_a = replacements.get(node.node_a, node.node_a)
+            node.node_b = replacements.get(node.node_b, node.node_b)
+        case RepetitionNode():
+            node.node = replacements.get(node.node, node.node)
+
+
+def iter_nodes(nodes: Iterable[EvaluationNode]) -> Iterator[EvaluationNode]:
+    """
+    Iterate over the nodes reachable from some nodes, each node once, in depth-first pre-order.
+
+    :param nodes: The nodes from which to start.
+    :return: An iterator yielding the reachable nodes, including the provided ones.
+    """
+
+    visited_nodes: set[EvaluationNode] = set()
+    stack: list[EvaluationNode] = list(reversed(list(nodes)))
+
+    while stack:
+        node = stack.pop()
+        if node in visited_nodes:
+            continue
+
+        visited_nodes.add(node)
+        yield node
+
+        stack.extend(reversed(child_nodes(node=node)))
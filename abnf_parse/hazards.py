@@ -0,0 +1,390 @@
+from __future__ import annotations
+from typing import Iterator, Sequence
+from dataclasses import dataclass
+from enum import Enum, auto
+from argparse import ArgumentParser
+from importlib import import_module
+from pathlib import Path
+from re import sub as re_sub
+
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, ConcatenationNode, RepetitionNode, \
+    LiteralNode, RangedLiteralNode, ByteClassNode
+from abnf_parse.structures.ruleset import Ruleset
+from abnf_parse.analysis import GrammarAnalyzer
+from abnf_parse.graph import child_nodes, iter_nodes
+
+
+class HazardKind(Enum):
+    # A rule can reach itself at the same offset without consuming input; its evaluation recurses until a
+    # `RecursionError` is raised.
+    LEFT_RECURSION = auto()
+    # A repetition without a maximum has a body that can match the empty string; its evaluation may never end.
+    EMPTY_ITERATION = auto()
+    # A repetition without a maximum has a body that ends with another repetition without a maximum over bytes with
+    # which the body can also start, as in `*( 1*WSP )`, or that contains a repetition over bytes that can both follow
+    # it and start the next iteration, as in `*( VCHAR [ 1*( SP / VCHAR ) VCHAR ] )`; an input can be split into
+    # iterations in exponentially many ways.
+    NESTED_REPETITION = auto()
+    # A repetition without a maximum has a body containing an alternation whose alternatives can start with the same
+    # bytes, so that an iteration may be matched in several ways; the ways multiply across iterations.
+    AMBIGUOUS_ITERATION = auto()
+    # A concatenation can end its left part and start its right part with repetitions without a maximum over the same
+    # bytes, as in `*WSP *WSP`; an input can be split between them in many ways, polynomially many in its length.
+    ADJACENT_REPETITIONS = auto()
+
+
+# The kinds of hazards whose evaluation time may grow exponentially with the length of the input, or not end at all.
+SEVERE_HAZARD_KINDS = frozenset({
+    HazardKind.LEFT_RECURSION,
+    HazardKind.EMPTY_ITERATION,
+    HazardKind.NESTED_REPETITION,
+    HazardKind.AMBIGUOUS_ITERATION
+})
+
+
+@dataclass(frozen=True)
+class Hazard:
+    kind: HazardKind
+    rule_name: str
+    description: str
+
+    def __str__(self) -> str:
+        return f'{self.rule_name}: {self.kind.name}: {self.description}'
+
+
+def _is_unbounded_repetition(node: EvaluationNode) -> bool:
+    return isinstance(node, RepetitionNode) and node.max_value is None
+
+
+def _describe(node: EvaluationNode, max_length: int = 60) -> str:
+    """
+    Return an ABNF-like rendering of a node for a hazard description, referring to named rules by name.
+    """
+
+    def render(current_node: EvaluationNode) -> str:
+        if current_node.name != current_node.__class__.__name__:
+            return current_node.name
+
+        match current_node:
+            case LiteralNode():
+                return '"' + current_node.value.decode(encoding='charmap') + '"'
+            case RangedLiteralNode():
+                return f'%x{current_node.min_value:02X}-{current_node.max_value:02X}'
+            case ConcatenationNode() if current_node.node_a is not None and current_node.node_b is not None:
+                return f'{render(current_node.node_a)} {render(current_node.node_b)}'
+            case AlternationNode():
+                return '( ' + ' / '.join(render(child) for child in current_node.nodes) + ' )'
+            case ByteClassNode():
+                # The outermost names of the matches of the replaced alternatives, in the order of their bytes.
+                alternatives = dict.fromkeys(
+                    names[0] if names else f'%x{byte:02X}'
+                    for byte, names in enumerate(current_node.table) if names is not None
+                )
+                return '( ' + ' / '.join(alternatives) + ' )'
+            case RepetitionNode() if current_node.min_value == 0 and current_node.max_value == 1:
+                return f'[ {render(current_node.node)} ]'
+            case RepetitionNode():
+                body = render(current_node.node)
+                if current_node.node.name == ConcatenationNode.__name__:
+                    body = f'( {body} )'
+                return f'{current_node.min_value or ""}*{current_node.max_value or ""}{body}'
+            case _:
+                return f'<{current_node.__class__.__name__}>'
+
+    rendering = render(current_node=node)
+
+    return f'`{rendering if len(rendering) <= max_length else rendering[:max_length - 3] + "..."}`'
+
+
+class HazardDetector:
+    """
+    Find the patterns in rules that make the backtracking engine take exponential time, or never finish, on some
+    inputs.
+
+    The analysis is static and conservative in the sense of a linter: a reported pattern makes a blow-up possible, but
+    not every input, or even every grammar with the pattern, triggers one. Rules flagged with severe hazards should be
+    rewritten, evaluated with a backtracking limit, or evaluated with `Engine.FOREST`, which is not affected by
+    ambiguity, although it does not support left recursion either.
+    """
+
+    def __init__(self, analyzer: GrammarAnalyzer | None = None):
+        self._analyzer = analyzer or GrammarAnalyzer()
+
+    def _head_nodes(self, node: EvaluationNode) -> tuple[EvaluationNode, ...]:
+        """
+        Return the child nodes of a node that can be evaluated at the offset at which the node is evaluated.
+        """
+
+        match node:
+            case ConcatenationNode() if node.node_a is not None and node.node_b is not None:
+                if self._analyzer.nullable(node=node.node_a):
+                    return node.node_a, node.node_b
+                return (node.node_a,)
+            case _:
+                return child_nodes(node=node)
+
+    def _tail_nodes(self, node: EvaluationNode) -> tuple[EvaluationNode, ...]:
+        """
+        Return the child nodes of a node whose matches can end where the match of the node ends.
+        """
+
+        match node:
+            case ConcatenationNode() if node.node_a is not None and node.node_b is not None:
+                if self._analyzer.nullable(node=node.node_b):
+                    return node.node_a, node.node_b
+                return (node.node_b,)
+            case _:
+                return child_nodes(node=node)
+
+    def _reachable_unbounded_repetitions(self, node: EvaluationNode, at_tail: bool) -> list[RepetitionNode]:
+        """
+        Return the repetitions without a maximum, including the node itself, that can start (or end) a match of a
+        node.
+        """
+
+        repetitions: list[RepetitionNode] = []
+        visited_nodes: set[EvaluationNode] = set()
+        stack = [node]
+
+        while stack:
+            current_node = stack.pop()
+            if current_node in visited_nodes:
+                continue
+            visited_nodes.add(current_node)
+
+            if _is_unbounded_repetition(node=current_node):
+                repetitions.append(current_node)
+
+            stack.extend(self._tail_nodes(node=current_node) if at_tail else self._head_nodes(node=current_node))
+
+        return repetitions
+
+    def _is_left_recursive(self, node: EvaluationNode) -> bool:
+        visited_nodes: set[EvaluationNode] = set()
+        stack = list(self._head_nodes(node=node))
+
+        while stack:
+            current_node = stack.pop()
+            if current_node is node:
+                return True
+            if current_node in visited_nodes:
+                continue
+            visited_nodes.add(current_node)
+
+            stack.extend(self._head_nodes(node=current_node))
+
+        return False
+
+    def _rule_nodes(self, rule: EvaluationNode) -> Iterator[EvaluationNode]:
+        """
+        Iterate over the nodes making up the definition of a rule, not descending into the rules that it references.
+        """
+
+        visited_nodes: set[EvaluationNode] = set()
+        stack = [rule]
+
+        while stack:
+            node = stack.pop()
+            if node in visited_nodes:
+                continue
+            visited_nodes.add(node)
+
+            yield node
+
+            stack.extend(
+                child_node for child_node in child_nodes(node=node)
+                if child_node.name == child_node.__class__.__name__
+            )
+
+    def _overlap(self, node_a: EvaluationNode, node_b: EvaluationNode) -> bool:
+        return bool(self._analyzer.first_bytes(node=node_a) & self._analyzer.first_bytes(node=node_b))
+
+    def _node_hazards(self, rule_name: str, node: EvaluationNode) -> Iterator[Hazard]:
+        if _is_unbounded_repetition(node=node):
+            body = node.node
+
+            if self._analyzer.nullable(node=body):
+                yield Hazard(
+                    kind=HazardKind.EMPTY_ITERATION,
+                    rule_name=rule_name,
+                    description=f'{_describe(node=node)} can repeat an empty match indefinitely.'
+                )
+                return
+
+            for tail_repetition in self._reachable_unbounded_repetitions(node=body, at_tail=True):
+                if tail_repetition is not node and self._overlap(node_a=tail_repetition.node, node_b=body):
+                    yield Hazard(
+                        kind=HazardKind.NESTED_REPETITION,
+                        rule_name=rule_name,
+                        description=(
+                            f'The iterations of {_describe(node=node)} can end with {_describe(node=tail_repetition)},'
+                            f' which can consume the bytes that start the next iteration.'
+                        )
+                    )
+                    return
+
+            for descendant in iter_nodes(nodes=[body]):
+                if not isinstance(descendant, AlternationNode):
+                    continue
+
+                alternatives = [self._analyzer.first_bytes(node=child) for child in descendant.nodes]
+                if any(
+                    alternatives[i] & alternatives[j]
+                    for i in range(len(alternatives))
+                    for j in range(i + 1, len(alternatives))
+                ):
+                    yield Hazard(
+                        kind=HazardKind.AMBIGUOUS_ITERATION,
+                        rule_name=rule_name,
+                        description=(
+                            f'The iterations of {_describe(node=node)} contain {_describe(node=descendant)}, whose'
+                            f' alternatives can start with the same bytes.'
+                        )
+                    )
+                    return
+
+            # The repetitions that can repeat more than once are reported first, as an option enclosing one is
+            # ambiguous only because of it.
+            inner_repetitions = sorted(
+                self._analyzer.overlapping_repetitions(node=node),
+                key=lambda repetition: repetition.max_value == 1
+            )
+            if inner_repetitions:
+                yield Hazard(
+                    kind=HazardKind.NESTED_REPETITION,
+                    rule_name=rule_name,
+                    description=(
+                        f'The iterations of {_describe(node=node)} contain {_describe(node=inner_repetitions[0])},'
+                        f' whose iterations can start with the bytes that follow it and that start the next iteration.'
+                    )
+                )
+
+        if isinstance(node, ConcatenationNode) and node.node_a is not None and node.node_b is not None:
+            head_repetitions = self._reachable_unbounded_repetitions(node=node.node_b, at_tail=False)
+            tail_repetitions = self._reachable_unbounded_repetitions(node=node.node_a, at_tail=True)
+
+            for tail_repetition in tail_repetitions:
+                for head_repetition in head_repetitions:
+                    if self._overlap(node_a=tail_repetition.node, node_b=head_repetition.node):
+                        yield Hazard(
+                            kind=HazardKind.ADJACENT_REPETITIONS,
+                            rule_name=rule_name,
+                            description=(
+                                f'{_describe(node=tail_repetition)} can be followed by'
+                                f' {_describe(node=head_repetition)} over the same bytes.'
+                            )
+                        )
+                        return
+
+    def find_hazards(self, ruleset: Ruleset, rule_names: Sequence[str] | None = None) -> list[Hazard]:
+        """
+        Find the hazards in the rules of a ruleset.
+
+        Each hazard is reported in the rule whose definition contains the offending node; the rules of other rulesets
+        that the rules reference, such as the core rules, are not reported.
+
+        :param ruleset: The ruleset to be inspected.
+        :param rule_names: The names of the rules to be inspected. Defaults to all of the rules of the ruleset.
+        :return: The hazards found, in the order of the rules.
+        """
+
+        hazards: list[Hazard] = []
+
+        for rule_name in rule_names if rule_names is not None else list(ruleset):
+            rule = ruleset[rule_name]
+
+            if self._is_left_recursive(node=rule):
+                hazards.append(
+                    Hazard(
+                        kind=HazardKind.LEFT_RECURSION,
+                        rule_name=rule_name,
+                        description=f'`{rule_name}` can reach itself without consuming input.'
+                    )
+                )
+
+            for node in self._rule_nodes(rule=rule):
+                hazards.extend(self._node_hazards(rule_name=rule_name, node=node))
+
+        return hazards
+
+
+def find_hazards(ruleset: Ruleset, rule_names: Sequence[str] | None = None) -> list[Hazard]:
+    """
+    Find the patterns in the rules of a ruleset that can make their evaluation take exponential time or not finish.
+
+    See `HazardDetector`.
+
+    :param ruleset: The ruleset to be inspected.
+    :param rule_names: The names of the rules to be inspected. Defaults to all of the rules of the ruleset.
+    :return: The hazards found.
+    """
+
+    return HazardDetector().find_hazards(ruleset=ruleset, rule_names=rule_names)
+
+
+def _load_ruleset(path_or_reference: str) -> Ruleset:
+    """
+    Load a ruleset from an ABNF file, or from a `module:attribute` reference to a `Ruleset` object.
+    """
+
+    if (path := Path(path_or_reference)).is_file():
+        # ABNF requires CRLF line endings, which files may have lost.
+        source = re_sub(pattern=rb'\r?\n', repl=b'\r\n', string=path.read_bytes())
+        if (ruleset := Ruleset.from_source(source=source)) is None:
+            raise ValueError(f'The file could not be parsed as ABNF: {path}')
+        return ruleset
+
+    module_name, _, attribute_name = path_or_reference.partition(':')
+    if not attribute_name:
+        raise ValueError(f'Neither a file nor a `module:attribute` reference: {path_or_reference}')
+
+    ruleset = getattr(import_module(name=module_name), attribute_name)
+    if not isinstance(ruleset, Ruleset):
+        raise ValueError(f'Not a ruleset: {path_or_reference}')
+
+    return ruleset
+
+
+def main(arguments: Sequence[str] | None = None) -> int:
+    argument_parser = ArgumentParser(
+        prog='python -m abnf_parse.hazards',
+        description=(
+            'Report the patterns in ABNF rules that can make their evaluation take exponential time or not finish.'
+            ' The exit status is 1 if a severe hazard is found, otherwise 0.'
+        )
+    )
+    argument_parser.add_argument(
+        'rulesets',
+        nargs='+',
+        metavar='RULESET',
+        help=(
+            'An ABNF file, or a `module:attribute` reference to a ruleset, e.g.'
+            ' abnf_parse.rulesets.rfc5322:RFC5322_RULESET.'
+        )
+    )
+    argument_parser.add_argument('--rule', action='append', dest='rule_names', help='A rule to inspect; repeatable.')
+    argument_parser.add_argument(
+        '--severe-only',
+        action='store_true',
+        help='Report only the hazards that can make the evaluation time grow exponentially or not end.'
+    )
+
+    parsed_arguments = argument_parser.parse_args(args=arguments)
+
+    found_severe_hazard = False
+
+    for path_or_reference in parsed_arguments.rulesets:
+        ruleset = _load_ruleset(path_or_reference=path_or_reference)
+
+        for hazard in find_hazards(ruleset=ruleset, rule_names=parsed_arguments.rule_names):
+            severe = hazard.kind in SEVERE_HAZARD_KINDS
+            found_severe_hazard |= severe
+
+            if severe or not parsed_arguments.severe_only:
+                print(f'{path_or_reference}: {hazard}')
+
+    return 1 if found_severe_hazard else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+from __future__ import annotations
+from typing import ByteString
+from enum import Enum, auto
+
+from abnf_parse.exceptions import BacktrackingLimitReachedError
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, ConcatenationNode, LiteralNode, \
+    RangedLiteralNode, ByteClassNode, RepetitionNode, OptionNode
+from abnf_parse.structures.match_node import MatchNode
+from abnf_parse.structures.ruleset import Ruleset
+
+
+class ParseStatus(Enum):
+    # The input received so far is the beginning of a message whose field section is not complete.
+    NEED_MORE_DATA = auto()
+    # The start line and the field section have been received and match; the remaining input is the message body.
+    COMPLETE = auto()
+    # The input received so far cannot be the beginning of a message, or has a line longer than the maximum length.
+    NO_MATCH = auto()
+
+
+def _prefix_node(node: EvaluationNode, prefix_nodes: dict[EvaluationNode, EvaluationNode]) -> EvaluationNode:
+    """
+    Return a node that matches the prefixes of the inputs that a node matches, including the empty input and the
+    inputs themselves.
+
+    :param node: The node whose prefixes to match.
+    :param prefix_nodes: The prefix nodes already created, by the nodes whose prefixes they match, through which
+        recursive rules refer to themselves.
+    :return: The node matching the prefixes.
+    """
+
+    if (prefix_node := prefix_nodes.get(node)) is not None:
+        return prefix_node
+
+    match node:
+        case LiteralNode():
+            # The literals of a trie are matched by the alternation case, as the trie is an alternation.
+            prefix_node = AlternationNode(
+                *(
+                    LiteralNode(value=node.value[:length], case_sensitive=node.case_sensitive)
+                    for length in range(len(node.value), -1, -1)
+                )
+            )
+        case RangedLiteralNode() | ByteClassNode():
+            prefix_node = OptionNode(node=node)
+        case AlternationNode():
+            prefix_node = prefix_nodes[node] = AlternationNode()
+            prefix_node.nodes = tuple(
+                _prefix_node(node=child_node, prefix_nodes=prefix_nodes)
+                for child_node in node.nodes
+            )
+        case ConcatenationNode():
+            # A prefix either ends in the right node, after a complete match of the left node, or in the left node.
+            prefix_node = prefix_nodes[node] = AlternationNode()
+            prefix_node.nodes = (
+                ConcatenationNode(node_a=node.node_a, node_b=_prefix_node(node=node.node_b, prefix_nodes=prefix_nodes)),
+                _prefix_node(node=node.node_a, prefix_nodes=prefix_nodes)
+            )
+        case RepetitionNode():
+            if node.max_value == 0:
+                prefix_node = LiteralNode(value=b'')
+            else:
+                # A prefix is some complete iterations followed by a prefix of one more.
+                prefix_node = prefix_nodes[node] = ConcatenationNode(node_a=None, node_b=None)
+                prefix_node.node_a = RepetitionNode(
+                    node=node.node,
+                    max_value=node.max_value - 1 if node.max_value is not None else None
+                )
+                prefix_node.node_b = _prefix_node(node=node.node, prefix_nodes=prefix_nodes)
+        case _:
+            # The prefixes of the inputs of other nodes are unknown, and any input is assumed to be one.
+            prefix_node = RepetitionNode(node=RangedLiteralNode(min_value=0x00, max_value=0xff))
+
+    prefix_nodes[node] = prefix_node
+
+    return prefix_node
+
+
+class HTTPMessageParser:
+    """
+    An incremental parser of RFC 9112 `HTTP-message`s, fed the message in chunks as they are received.
+
+    `HTTP-message = start-line CRLF *( field-line CRLF ) CRLF [ message-body ]`
+
+    As neither a `start-line` nor a `field-line` can contain a CR or an LF, each line ending with a CRLF is matched on
+    its own, once, as soon as it is complete; only the bytes after the last complete line are kept and searched for a
+    CRLF again, and only the bytes of a chunk that were not already searched. The matches of the lines are kept, each
+    with a copy of its line as its source. The message body, which matches any input, is kept as it is received;
+    determining where it ends, for example from a `Content-Length` field, is left to the caller.
+
+    A line whose CRLF has not been received yet is matched against the prefixes of the rule it must match, so that input
+    that cannot become a message is rejected without waiting for a CRLF. To keep the cost of this linear in the length
+    of the line however small the chunks, the line is matched again only once its length has doubled. Lines longer than
+    the maximum length are rejected, as they would otherwise be kept in memory for as long as they are received.
+    """
+
+    def __init__(self, ruleset: Ruleset | None = None, max_line_length: int | None = 8192):
+        """
+        :param ruleset: The ruleset providing the `start-line` and `field-line` rules. Defaults to `RFC9112_RULESET`.
+        :param max_line_length: The maximum length of a line, excluding its CRLF. `None`: Do not limit the length of
+            lines.
+        """
+
+        if max_line_length is not None and max_line_length < 0:
+            raise ValueError(f'The maximum line length must not be negative: {max_line_length}')
+
+        if ruleset is None:
+            from abnf_parse.rulesets.rfc9112 import RFC9112_RULESET
+            ruleset = RFC9112_RULESET
+
+        self._start_line_rule = ruleset['start-line']
+        self._field_line_rule = ruleset['field-line']
+
+        prefix_nodes: dict[EvaluationNode, EvaluationNode] = {}
+        self._start_line_prefix_rule = _prefix_node(node=self._start_line_rule, prefix_nodes=prefix_nodes)
+        self._field_line_prefix_rule = _prefix_node(node=self._field_line_rule, prefix_nodes=prefix_nodes)
+
+        self.max_line_length = max_line_length
+
+        self.status = ParseStatus.NEED_MORE_DATA
+        self.start_line: MatchNode | None = None
+        self.field_lines: list[MatchNode] = []
+        self.body = bytearray()
+
+        # The input following the last complete line, the offset in it from which to search for a CRLF, and the length
+        # at which the unfinished line was last matched against the prefixes of its rule.
+        self._buffer = bytearray()
+        self._search_offset = 0
+        self._checked_length = 0
+
+    def feed(self, chunk: ByteString) -> ParseStatus:
+        """
+        Provide the next chunk of the message.
+
+        :param chunk: The next chunk of the message.
+        :return: The status of the parsing after consuming the chunk. Once it is `ParseStatus.COMPLETE`, subsequent
+            chunks are added to the body; once it is `ParseStatus.NO_MATCH`, subsequent chunks are ignored.
+        """
+
+        if self.status is ParseStatus.COMPLETE:
+            self.body += chunk
+            return self.status
+
+        if self.status is ParseStatus.NO_MATCH:
+            return self.status
+
+        buffer = self._buffer
+        buffer += chunk
+
+        line_start_offset = 0
+        while (line_end_offset := buffer.find(b'\r\n', self._search_offset)) != -1:
+            self._accept_line(line=bytes(buffer[line_start_offset:line_end_offset]))
+
+            line_start_offset = line_end_offset + 2
+            self._search_offset = line_start_offset
+            self._checked_length = 0
+
+            if self.status is not ParseStatus.NEED_MORE_DATA:
+                break
+
+        if self.status is ParseStatus.COMPLETE:
+            self.body += buffer[line_start_offset:]
+            buffer.clear()
+            self._search_offset = 0
+        elif self.status is ParseStatus.NEED_MORE_DATA:
+            del buffer[:line_start_offset]
+            # The last byte may be the CR of a CRLF completed by the next chunk.
+            self._search_offset = max(len(buffer) - 1, 0)
+
+            line_length = len(buffer) - buffer.endswith(b'\r')
+            if self.max_line_length is not None and line_length > self.max_line_length:
+                self.status = ParseStatus.NO_MATCH
+            elif line_length > 2 * self._checked_length:
+                self._check_unfinished_line(line=bytes(buffer[:line_length]))
+                self._checked_length = line_length
+
+        if self.status is ParseStatus.NO_MATCH:
+            buffer.clear()
+
+        return self.status
+
+    def _check_unfinished_line(self, line: bytes) -> None:
+        """
+        Match a line whose CRLF has not been received yet, excluding a CR that may be the start of the CRLF, against
+        the prefixes of the rule it must match, and update the status accordingly.
+
+        :param line: The line to be matched.
+        """
+
+        prefix_rule = self._start_line_prefix_rule if self.start_line is None else self._field_line_prefix_rule
+
+        try:
+            if not prefix_rule.matches(source=line):
+                self.status = ParseStatus.NO_MATCH
+        except BacktrackingLimitReachedError:
+            # Whether the line can still become a match is undetermined, and is left to be determined once it is
+            # complete.
+            pass
+
+    def _accept_line(self, line: bytes) -> None:
+        """
+        Match a complete line, excluding its CRLF, and update the status accordingly.
+
+        :param line: The line to be matched.
+        """
+
+        if self.max_line_length is not None and len(line) > self.max_line_length:
+            self.status = ParseStatus.NO_MATCH
+        elif self.start_line is None:
+            if (match_node := self._start_line_rule.fullmatch(source=line)) is None:
+                self.status = ParseStatus.NO_MATCH
+            else:
+                self.start_line = match_node
+        elif not line:
+            self.status = ParseStatus.COMPLETE
+        elif (match_node := self._field_line_rule.fullmatch(source=line)) is None:
+            self.status = ParseStatus.NO_MATCH
+        else:
+            self.field_lines.append(match_node)
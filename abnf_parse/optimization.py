@@ -0,0 +1,140 @@
+from __future__ import annotations
+from typing import Iterable
+from itertools import groupby
+
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, LiteralNode, RangedLiteralNode, \
+    ByteClassNode, LiteralTrieNode
+from abnf_parse.graph import iter_nodes, replace_child_nodes
+
+ByteClassTable = list[tuple[str, ...] | None]
+
+
+def _is_named(node: EvaluationNode) -> bool:
+    return node.name != node.__class__.__name__
+
+
+class _ByteClassTableBuilder:
+
+    def __init__(self):
+        self._tables: dict[EvaluationNode, ByteClassTable | None] = {}
+
+    def table(self, node: EvaluationNode) -> ByteClassTable | None:
+        """
+        Return the byte class table of the matches of an alternation, if all of its alternatives match single bytes.
+
+        :param node: An alternation node.
+        :return: A table of the names of the matches produced by the first matching alternative for each byte value,
+            excluding the name of the alternation itself, or `None` if not all alternatives match single bytes.
+        """
+
+        if node in self._tables:
+            return self._tables[node]
+
+        # Guard against cycles.
+        self._tables[node] = None
+
+        table: ByteClassTable | None = None
+
+        if type(node) is AlternationNode and node.nodes:
+            table = [None] * 256
+
+            for child_node in node.nodes:
+                if (child_table := self._child_table(node=child_node)) is None:
+                    table = None
+                    break
+
+                for byte, names in enumerate(child_table):
+                    if table[byte] is None:
+                        table[byte] = names
+
+        self._tables[node] = table
+
+        return table
+
+    def _child_table(self, node: EvaluationNode) -> ByteClassTable | None:
+        """
+        Return the byte class table of the matches of a node that is an alternative of an alternation.
+        """
+
+        match node:
+            case RangedLiteralNode():
+                return [
+                    (node.name,) if node.min_value <= byte <= node.max_value else None
+                    for byte in range(256)
+                ]
+            case LiteralNode() if len(node.value) == 1:
+                if node.case_sensitive or not node.value.isalpha():
+                    matching_bytes = {node.value[0]}
+                else:
+                    matching_bytes = {node.value.lower()[0], node.value.upper()[0]}
+
+                return [(node.name,) if byte in matching_bytes else None for byte in range(256)]
+            case ByteClassNode():
+                inner_table = list(node.table)
+            case AlternationNode():
+                if (inner_table := self.table(node=node)) is None:
+                    return None
+            case _:
+                return None
+
+        if not _is_named(node=node):
+            return inner_table
+
+        return [(node.name, *names) if names is not None else None for names in inner_table]
+
+
+def _group_literal_alternatives(node: AlternationNode) -> None:
+    """
+    Replace the runs of consecutive literal alternatives of an alternation with unnamed `LiteralTrieNode`s, which
+    produce the matches of the literals as they are, so that the matches of the alternation are unchanged.
+    """
+
+    child_nodes: list[EvaluationNode] = []
+
+    for literals, group in groupby(node.nodes, key=lambda child_node: type(child_node) is LiteralNode):
+        group = list(group)
+        if literals and len(group) > 1:
+            child_nodes.append(LiteralTrieNode(*group))
+        else:
+            child_nodes.extend(group)
+
+    if len(child_nodes) != len(node.nodes):
+        node.nodes = tuple(child_nodes)
+
+
+def optimize(nodes: Iterable[EvaluationNode]) -> dict[EvaluationNode, EvaluationNode]:
+    """
+    Replace nodes reachable from some nodes with nodes that evaluate faster and produce the same matches.
+
+    Alternations whose alternatives all match single bytes (ranged literals, one-byte literals, and alternations of
+    those) are replaced with `ByteClassNode`s. Only the first match is kept for each byte, as later alternatives
+    matching the same byte would produce matches with the same extent. Other alternations whose alternatives are all
+    literals, such as `month` and `day-name`, are replaced with `LiteralTrieNode`s, and in alternations with other
+    alternatives too, such as `Protocol`, consecutive literal alternatives are grouped into `LiteralTrieNode`s.
+
+    The references to the replaced nodes are updated in all reachable nodes. References held elsewhere, for example by
+    rulesets, are not.
+
+    :param nodes: The nodes from which to start.
+    :return: A map of the replaced nodes to the nodes that replaced them.
+    """
+
+    nodes = list(nodes)
+    reachable_nodes = list(iter_nodes(nodes=nodes))
+
+    table_builder = _ByteClassTableBuilder()
+    replacements: dict[EvaluationNode, EvaluationNode] = {}
+
+    for node in reachable_nodes:
+        if type(node) is AlternationNode and (table := table_builder.table(node=node)) is not None:
+            replacements[node] = ByteClassNode(table=table, name=node.name if _is_named(node=node) else None)
+        elif type(node) is AlternationNode and len(node.nodes) > 1:
+            if all(type(child_node) is LiteralNode for child_node in node.nodes):
+                replacements[node] = LiteralTrieNode(*node.nodes, name=node.name if _is_named(node=node) else None)
+            else:
+                _group_literal_alternatives(node=node)
+
+    for node in reachable_nodes:
+        replace_child_nodes(node=node, replacements=replacements)
+
+    return replacements
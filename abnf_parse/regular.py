@@ -0,0 +1,618 @@
+from __future__ import annotations
+from typing import Iterable, Container
+from re import compile as re_compile, Pattern as RePattern, Match as ReMatch, error as ReError
+
+from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, ConcatenationNode, LiteralNode, \
+    RangedLiteralNode, RepetitionNode, OptionNode, ByteClassNode, LiteralTrieNode
+from abnf_parse.structures.match_node import MatchNode
+from abnf_parse.structures.evaluation_context import EvaluationContext
+
+_LEAF_NODE_TYPES = frozenset({LiteralNode, RangedLiteralNode, ByteClassNode})
+_REPETITION_NODE_TYPES = frozenset({RepetitionNode, OptionNode})
+_ALTERNATION_NODE_TYPES = frozenset({AlternationNode, LiteralTrieNode})
+_FLATTENED_NAMES = frozenset({ConcatenationNode.__name__, RepetitionNode.__name__, OptionNode.__name__})
+
+# Patterns longer than this are not lowered; compiling them would take longer than it is worth.
+_MAX_PATTERN_LENGTH = 65536
+# The longest match is found by matching once per possible end offset, which is not worth it beyond this length.
+_MAX_LONGEST_MATCH_LENGTH = 1024
+
+
+def _byte_pattern(byte: int) -> str:
+    return chr(byte) if bytes([byte]).isalnum() else f'\\x{byte:02x}'
+
+
+class _SplitError(Exception):
+    """
+    Raised when the pattern of a node does not split a span that the node is known to cover the way the evaluation
+    engine does, in which case the match is built node by node instead.
+    """
+
+
+class RegularRuleEvaluator:
+    """
+    Evaluates rules whose closure is regular, i.e. that do not recurse, with compiled `re` patterns.
+
+    The patterns reproduce the order in which the evaluation engine tries alternatives and repetitions, so that the
+    match found by the pattern is the first match the engine would find. The `MatchNode` tree is then reconstructed
+    top-down by matching the pattern of each node against the span it is known to cover, with capture groups telling
+    where the children of the node start and end.
+
+    One evaluator is shared by the rules of a ruleset so that the patterns of common sub-rules are built once.
+    """
+
+    def __init__(self):
+        self._pattern_sources: dict[tuple[EvaluationNode, bool], str] = {}
+        self._patterns: dict[str, RePattern | None] = {}
+        self._split_patterns: dict[tuple[EvaluationNode, bool, int], RePattern] = {}
+        self._regular: dict[EvaluationNode, bool] = {}
+        self._min_lengths: dict[EvaluationNode, int] = {}
+        self._max_lengths: dict[EvaluationNode, int | None] = {}
+
+    def __getstate__(self):
+        # The pattern sources of the nodes are large, as that of a node contains those of its descendants, and they
+        # refer to the nodes of other rulesets; they are rebuilt on demand, whereas the compiled patterns are kept.
+        state = self.__dict__.copy()
+        state['_pattern_sources'] = {}
+        return state
+
+    def discard_nodes(self, nodes: Container[EvaluationNode]) -> None:
+        """
+        Forget what is known about nodes that are no longer part of the trees of the lowered nodes, as when they have
+        been replaced by structurally identical nodes, so that they are not kept alive.
+
+        :param nodes: The nodes to be forgotten.
+        """
+
+        for cache in (self._pattern_sources, self._split_patterns):
+            for key in [key for key in cache if key[0] in nodes]:
+                del cache[key]
+
+        for cache in (self._regular, self._min_lengths, self._max_lengths):
+            for node in [node for node in cache if node in nodes]:
+                del cache[node]
+
+    # Analysis.
+
+    def is_regular(self, node: EvaluationNode) -> bool:
+        """
+        Return whether a node can be evaluated with a pattern.
+
+        That is the case if the tree of the node has no cycles, consists only of the node types of
+        `abnf_parse.structures.evaluation_node`, and has no repetitions of nodes that can match the empty string.
+
+        :param node: The node to be checked.
+        :return: Whether the node can be evaluated with a pattern.
+        """
+
+        if (regular := self._regular.get(node)) is not None:
+            return regular
+
+        # A node that is reached again while its children are being checked is part of a cycle.
+        self._regular[node] = False
+
+        if type(node) is ConcatenationNode:
+            regular = (
+                node.node_a is not None and node.node_b is not None
+                and self.is_regular(node=node.node_a) and self.is_regular(node=node.node_b)
+            )
+        elif type(node) in _ALTERNATION_NODE_TYPES:
+            regular = all(self.is_regular(node=child) for child in node.nodes)
+        elif type(node) in _REPETITION_NODE_TYPES:
+            regular = self.is_regular(node=node.node) and self._min_length(node=node.node) > 0
+        else:
+            regular = type(node) in _LEAF_NODE_TYPES
+
+        if regular:
+            regular = len(self._pattern_source(node=node, at_end=True)) <= _MAX_PATTERN_LENGTH
+
+        self._regular[node] = regular
+
+        return regular
+
+    def _min_length(self, node: EvaluationNode) -> int:
+        if (min_length := self._min_lengths.get(node)) is not None:
+            return min_length
+
+        # Guard against cycles.
+        self._min_lengths[node] = 0
+
+        match node:
+            case LiteralNode():
+                min_length = len(node.value)
+            case RangedLiteralNode() | ByteClassNode():
+                min_length = 1
+            case ConcatenationNode() if node.node_a is not None and node.node_b is not None:
+                min_length = self._min_length(node=node.node_a) + self._min_length(node=node.node_b)
+            case AlternationNode():
+                min_length = min((self._min_length(node=child) for child in node.nodes), default=0)
+            case RepetitionNode():
+                min_length = node.min_value * self._min_length(node=node.node)
+            case _:
+                min_length = 0
+
+        self._min_lengths[node] = min_length
+
+        return min_length
+
+    def _max_length(self, node: EvaluationNode) -> int | None:
+        """
+        Return the maximum length of the matches of a regular node, or `None` if it is unbounded.
+        """
+
+        if node in self._max_lengths:
+            return self._max_lengths[node]
+
+        match node:
+            case LiteralNode():
+                max_length = len(node.value)
+            case RangedLiteralNode() | ByteClassNode():
+                max_length = 1
+            case ConcatenationNode():
+                max_length_a = self._max_length(node=node.node_a)
+                max_length_b = self._max_length(node=node.node_b)
+                max_length = None if max_length_a is None or max_length_b is None else max_length_a + max_length_b
+            case AlternationNode():
+                max_lengths = [self._max_length(node=child) for child in node.nodes]
+                max_length = None if None in max_lengths else max(max_lengths, default=0)
+            case RepetitionNode():
+                body_max_length = self._max_length(node=node.node)
+                if node.max_value is None or body_max_length is None:
+                    max_length = None
+                else:
+                    max_length = node.max_value * body_max_length
+            case _:
+                max_length = None
+
+        self._max_lengths[node] = max_length
+
+        return max_length
+
+    # Patterns.
+
+    def _pattern_source(self, node: EvaluationNode, at_end: bool) -> str:
+        """
+        Return the source of a pattern matching the same strings as a regular node, in the same order.
+
+        A `RepetitionNode` stops, and produces a match even if it has fewer than `min_value` iterations, when an
+        iteration ends at the end of the input. That can only be expressed with an end-of-input assertion, which is
+        valid only if the pattern is matched against the input up to its end.
+
+        :param node: A regular node.
+        :param at_end: Whether the pattern is to be matched against the input up to its end.
+        :return: The source of the pattern.
+        """
+
+        key = (node, at_end)
+        if (pattern_source := self._pattern_sources.get(key)) is not None:
+            return pattern_source
+
+        match node:
+            case LiteralNode():
+                pattern_source = ''.join(
+                    f'[{chr(byte | 0x20)}{chr(byte & ~0x20)}]'
+                    if not node.case_sensitive and bytes([byte]).isalpha() else _byte_pattern(byte=byte)
+                    for byte in node.value
+                )
+            case RangedLiteralNode():
+                if node.min_value == node.max_value:
+                    pattern_source = _byte_pattern(byte=node.min_value)
+                else:
+                    pattern_source = f'[{_byte_pattern(byte=node.min_value)}-{_byte_pattern(byte=node.max_value)}]'
+            case ByteClassNode():
+                if any(names is not None for names in node.table):
+                    pattern_source = '[' + ''.join(
+                        _byte_pattern(byte=byte) for byte, names in enumerate(node.table) if names is not None
+                    ) + ']'
+                else:
+                    pattern_source = '(?!)'
+            case ConcatenationNode():
+                pattern_source = (
+                    self._pattern_source(node=node.node_a, at_end=at_end)
+                    + self._pattern_source(node=node.node_b, at_end=at_end)
+                )
+            case AlternationNode():
+                if node.nodes:
+                    pattern_source = '(?:' + '|'.join(
+                        self._pattern_source(node=child, at_end=at_end) for child in node.nodes
+                    ) + ')'
+                else:
+                    pattern_source = '(?!)'
+            case RepetitionNode():
+                pattern_source = self._repetition_pattern_source(node=node, at_end=at_end, iteration_count=0)
+            case _:
+                raise ValueError(f'Unexpected node type: {type(node)}')
+
+        self._pattern_sources[key] = pattern_source
+
+        return pattern_source
+
+    def _repetition_pattern_source(self, node: RepetitionNode, at_end: bool, iteration_count: int) -> str:
+        """
+        Return the source of a pattern matching the remaining iterations of a repetition.
+
+        :param node: A regular repetition node.
+        :param at_end: Whether the pattern is to be matched against the input up to its end.
+        :param iteration_count: The number of iterations already matched.
+        :return: The source of the pattern.
+        """
+
+        body_pattern_source = f'(?:{self._pattern_source(node=node.node, at_end=at_end)})'
+        min_value = node.min_value
+        max_value = node.max_value
+
+        if max_value is not None and iteration_count >= max_value:
+            return ''
+
+        if iteration_count >= min_value or (not at_end and (max_value is None or max_value >= min_value)):
+            remaining_min_value = max(min_value - iteration_count, 0)
+            remaining_max_value = '' if max_value is None else str(max_value - iteration_count)
+            return f'{body_pattern_source}{{{remaining_min_value},{remaining_max_value}}}'
+
+        rest_pattern_source = self._repetition_pattern_source(
+            node=node,
+            at_end=at_end,
+            iteration_count=iteration_count + 1
+        )
+
+        if at_end and iteration_count > 0:
+            return f'(?:{body_pattern_source}{rest_pattern_source}|\\Z)'
+
+        return f'{body_pattern_source}{rest_pattern_source}'
+
+    def _pattern(self, pattern_source: str) -> RePattern | None:
+        if pattern_source in self._patterns:
+            return self._patterns[pattern_source]
+
+        try:
+            pattern = re_compile(pattern_source.encode())
+        except (ReError, RecursionError, OverflowError):
+            pattern = None
+
+        self._patterns[pattern_source] = pattern
+
+        return pattern
+
+    # Evaluation.
+
+    def evaluate(
+        self,
+        node: EvaluationNode,
+        source: memoryview,
+        offset: int = 0,
+        full_match: bool = True
+    ) -> MatchNode | None:
+        """
+        Find the first match of a node, by default the first one that ends at the end of the input.
+
+        :param node: A regular node.
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to start reading the input.
+        :param full_match: Whether to only consider matches that end at the end of the input.
+        :return: The same match as the one the evaluation engine would find, if there is one, otherwise `None`.
+        """
+
+        if (end_offset := self.match(node=node, source=source, offset=offset, full_match=full_match)) is None:
+            return None
+
+        return self.evaluate_span(node=node, source=source, start_offset=offset, end_offset=end_offset)
+
+    def evaluate_span(self, node: EvaluationNode, source: memoryview, start_offset: int, end_offset: int) -> MatchNode:
+        """
+        Build the first match of a node that covers a span of the input, which the node is known to match.
+
+        :param node: A regular node.
+        :param source: The input to be evaluated.
+        :param start_offset: The start offset of the span.
+        :param end_offset: The end offset of the span.
+        :return: The same match as the first one the evaluation engine would find ending at the end offset.
+        """
+
+        try:
+            return self._build(node=node, source=source, start_offset=start_offset, end_offset=end_offset)
+        except _SplitError:
+            pass
+
+        # The first match ending at the end offset is found without a backtracking limit, as the node is known to match.
+        context = EvaluationContext.from_options(input_length=len(source) - start_offset, backtracking_limit=False)
+        for match_node in node._iter_matches(source=source, offset=start_offset, context=context):
+            if match_node.end_offset == end_offset:
+                return match_node
+
+        raise ValueError(f'The node {node.name} does not match the span from {start_offset} to {end_offset}.')
+
+    def match(self, node: EvaluationNode, source: memoryview, offset: int = 0, full_match: bool = True) -> int | None:
+        """
+        Find where the first match of a node ends, without building a `MatchNode` tree.
+
+        :param node: A regular node.
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to start reading the input.
+        :param full_match: Whether to only consider matches that end at the end of the input.
+        :return: The end offset of the same match as the one the evaluation engine would find first, if there is one,
+            otherwise `None`.
+        """
+
+        pattern = self._pattern(pattern_source=self._pattern_source(node=node, at_end=True))
+
+        re_match = pattern.fullmatch(source, offset) if full_match else pattern.match(source, offset)
+        if re_match is None:
+            return None
+
+        return re_match.end()
+
+    def longest_match(self, node: EvaluationNode, source: memoryview, offset: int = 0) -> int | None:
+        """
+        Find where the longest match of a node ends, without building a `MatchNode` tree.
+
+        As `re` patterns produce the first match rather than the longest one, the pattern is instead matched against
+        the spans from the offset to each possible end offset, from the furthest to the nearest, which requires the
+        length of the matches of the node to be bounded.
+
+        :param node: A regular node whose matches have a bounded length.
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to start reading the input.
+        :return: The end offset of the longest match, if there is one, otherwise `None`.
+        """
+
+        if (max_length := self._max_length(node=node)) is None:
+            raise ValueError(f'The length of the matches of the node is unbounded: {node.name}')
+
+        at_end_pattern = self._pattern(pattern_source=self._pattern_source(node=node, at_end=True))
+        # A match that does not end at the end of the input cannot make use of end-of-input assertions.
+        pattern = self._pattern(pattern_source=self._pattern_source(node=node, at_end=False)) or at_end_pattern
+
+        # The first match rules out most inputs quickly, and bounds the length of the longest match from below.
+        if (re_match := at_end_pattern.match(source, offset)) is None:
+            return None
+
+        for end_offset in range(min(len(source), offset + max_length), re_match.end(), -1):
+            if (at_end_pattern if end_offset == len(source) else pattern).fullmatch(source, offset, end_offset):
+                return end_offset
+
+        return re_match.end()
+
+    def supports_longest_match(self, node: EvaluationNode) -> bool:
+        """
+        Return whether the length of the matches of a regular node is small enough for `longest_match`.
+        """
+
+        return (max_length := self._max_length(node=node)) is not None and max_length <= _MAX_LONGEST_MATCH_LENGTH
+
+    def supports(self, node: EvaluationNode) -> bool:
+        """
+        Return whether a node is regular and its pattern could be compiled.
+        """
+
+        return self.is_regular(node=node) and self._pattern(
+            pattern_source=self._pattern_source(node=node, at_end=True)
+        ) is not None
+
+    def _split_pattern(self, node: EvaluationNode, at_end: bool, iteration_count: int = 0) -> RePattern:
+        """
+        Return a pattern matching the same strings as a node, with capture groups telling which alternative of an
+        alternation, or where the first node of a concatenation or the next iteration of a repetition, matched.
+
+        :param node: A regular node that is not a leaf.
+        :param at_end: Whether the pattern is to be matched against the input up to its end.
+        :param iteration_count: For repetitions, the number of iterations already matched.
+        :return: The pattern.
+        """
+
+        if type(node) in _REPETITION_NODE_TYPES and node.max_value is None:
+            # Beyond the minimum, the remaining iterations are matched by the same pattern.
+            iteration_count = min(iteration_count, node.min_value)
+
+        key = (node, at_end, iteration_count)
+        if (pattern := self._split_patterns.get(key)) is not None:
+            return pattern
+
+        match node:
+            case ConcatenationNode():
+                pattern_source = (
+                    f'({self._pattern_source(node=node.node_a, at_end=at_end)})'
+                    + self._pattern_source(node=node.node_b, at_end=at_end)
+                )
+            case AlternationNode():
+                pattern_source = '(?:' + '|'.join(
+                    f'({self._pattern_source(node=child, at_end=at_end)})' for child in node.nodes
+                ) + ')'
+            case RepetitionNode():
+                pattern_source = (
+                    f'({self._pattern_source(node=node.node, at_end=at_end)})'
+                    + self._repetition_pattern_source(node=node, at_end=at_end, iteration_count=iteration_count + 1)
+                )
+            case _:
+                raise ValueError(f'Unexpected node type: {type(node)}')
+
+        pattern = self._pattern(pattern_source=pattern_source)
+        self._split_patterns[key] = pattern
+
+        return pattern
+
+    def _split(
+        self,
+        node: EvaluationNode,
+        source: memoryview,
+        start_offset: int,
+        end_offset: int,
+        iteration_count: int = 0
+    ) -> ReMatch:
+        """
+        Match the split pattern of a node against a span that the node is known to cover.
+        """
+
+        at_end = end_offset == len(source)
+
+        split_pattern = self._split_pattern(node=node, at_end=at_end, iteration_count=iteration_count)
+        if (split_match := split_pattern.fullmatch(source, start_offset, end_offset)) is None:
+            raise _SplitError
+
+        return split_match
+
+    def _build(self, node: EvaluationNode, source: memoryview, start_offset: int, end_offset: int) -> MatchNode:
+        """
+        Build the `MatchNode` tree of the first match of a node that covers a span of the input.
+        """
+
+        # NOTE: The node types are compared directly rather than with `isinstance`, which is slow for ABC subclasses.
+        node_type = type(node)
+
+        match node_type:
+            case _ if node_type is ByteClassNode:
+                return node._create_match_node(
+                    names=node.table[source[start_offset]],
+                    source=source,
+                    offset=start_offset
+                )
+            case _ if node_type in _LEAF_NODE_TYPES:
+                return MatchNode._new(
+                    name=node.name,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
+                    source=source,
+                    children=[]
+                )
+            case _ if node_type is ConcatenationNode:
+                split_match = self._split(node=node, source=source, start_offset=start_offset, end_offset=end_offset)
+                middle_offset: int = split_match.end(1)
+
+                return MatchNode._new(
+                    name=node.name,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
+                    source=source,
+                    children=ConcatenationNode._concatenate_children(
+                        match_node_a=self._build(
+                            node=node.node_a,
+                            source=source,
+                            start_offset=start_offset,
+                            end_offset=middle_offset
+                        ),
+                        match_node_b=self._build(
+                            node=node.node_b,
+                            source=source,
+                            start_offset=middle_offset,
+                            end_offset=end_offset
+                        )
+                    )
+                )
+            case _ if node_type in _ALTERNATION_NODE_TYPES:
+                split_match = self._split(node=node, source=source, start_offset=start_offset, end_offset=end_offset)
+                match_node = self._build(
+                    node=node.nodes[split_match.lastindex - 1],
+                    source=source,
+                    start_offset=start_offset,
+                    end_offset=end_offset
+                )
+
+                if node.name == node.__class__.__name__:
+                    return match_node
+
+                if match_node.name in _FLATTENED_NAMES:
+                    children = match_node.children
+                else:
+                    children = [match_node]
+
+                return MatchNode._new(
+                    name=node.name,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
+                    source=source,
+                    children=children
+                )
+            case _ if node_type in _REPETITION_NODE_TYPES:
+                return MatchNode._new(
+                    name=node.name,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
+                    source=source,
+                    children=list(
+                        self._build_iterations(
+                            node=node,
+                            source=source,
+                            start_offset=start_offset,
+                            end_offset=end_offset
+                        )
+                    )
+                )
+            case _:
+                raise ValueError(f'Unexpected node type: {type(node)}')
+
+    def _build_iterations(
+        self,
+        node: RepetitionNode,
+        source: memoryview,
+        start_offset: int,
+        end_offset: int
+    ) -> Iterable[MatchNode]:
+        """
+        Build the `MatchNode` trees of the iterations of the first match of a repetition that covers a span.
+        """
+
+        body_length = self._min_length(node=node.node)
+
+        if body_length == self._max_length(node=node.node):
+            # The iterations have a fixed length, and thereby fixed spans, except that the last iteration may be
+            # shorter if it ends at the end of the input, where repetitions within it can stop early.
+            for iteration_start_offset in range(start_offset, end_offset, body_length):
+                yield self._build(
+                    node=node.node,
+                    source=source,
+                    start_offset=iteration_start_offset,
+                    end_offset=min(iteration_start_offset + body_length, end_offset)
+                )
+            return
+
+        iteration_count = 0
+        iteration_start_offset = start_offset
+        while iteration_start_offset < end_offset:
+            split_match = self._split(
+                node=node,
+                source=source,
+                start_offset=iteration_start_offset,
+                end_offset=end_offset,
+                iteration_count=iteration_count
+            )
+            iteration_end_offset: int = split_match.end(1)
+            iteration_count += 1
+
+            yield self._build(
+                node=node.node,
+                source=source,
+                start_offset=iteration_start_offset,
+                end_offset=iteration_end_offset
+            )
+
+            iteration_start_offset = iteration_end_offset
+
+
+def lower_regular_rules(nodes: Iterable[EvaluationNode]) -> list[EvaluationNode]:
+    """
+    Make nodes whose closure is regular be evaluated with compiled `re` patterns rather than node by node.
+
+    Only the evaluation of the lowered nodes themselves, via `evaluate`, is affected; when other nodes reference them,
+    they are evaluated as usual. The patterns are compiled when first needed. Changing the tree of a node after it has
+    been lowered makes its evaluation use outdated patterns.
+
+    As `re` has no backtracking limit, nodes with repetitions whose iterations are ambiguous, on which the matching
+    may take exponential time, are not lowered, so that they remain subject to the backtracking limit; see
+    `GrammarAnalyzer.overlapping_repetitions`.
+
+    :param nodes: The nodes to be lowered.
+    :return: The nodes that were lowered.
+    """
+
+    from abnf_parse.analysis import GrammarAnalyzer
+
+    regular_rule_evaluator = RegularRuleEvaluator()
+    analyzer = GrammarAnalyzer()
+
+    lowered_nodes: list[EvaluationNode] = []
+
+    for node in nodes:
+        if regular_rule_evaluator.is_regular(node=node) and not analyzer.overlapping_repetitions(node=node):
+            node._regular_rule_evaluator = regular_rule_evaluator
+            lowered_nodes.append(node)
+
+    return lowered_nodes
@@ -0,0 +1,189 @@
+from __future__ import annotations
+from typing import Callable, TypeVar, Sequence, BinaryIO, TYPE_CHECKING
+from functools import cache
+from hashlib import sha256
+from os import environ, getpid, replace as os_replace, open as os_open, fstat, stat_result
+from pathlib import Path
+from stat import S_IWGRP, S_IWOTH
+from sys import version_info
+import pickle
+
+try:
+    from os import getuid
+except ImportError:
+    getuid = None
+
+if TYPE_CHECKING:
+    from abnf_parse.structures.ruleset import Ruleset
+
+_T = TypeVar('_T')
+
+# Incremented when the layout of the cache files, or of the cached objects, changes incompatibly.
+_FORMAT_VERSION = 2
+
+_MAGIC = b'abnf_parse-ruleset-cache\n'
+
+_CACHE_DIRECTORY_VARIABLE = 'ABNF_PARSE_CACHE_DIR'
+
+
+def cache_directory() -> Path | None:
+    """
+    Return the directory in which built rulesets are cached.
+
+    Caching is opt-in: the directory is given by the `ABNF_PARSE_CACHE_DIR` environment variable, and the cache is
+    disabled if the variable is not set or is empty, so that importing the library does not write files by default.
+
+    The cache entries are unpickled, which can run arbitrary code, so whoever can write them is trusted as much as the
+    code of the library. The directory is created accessible only to the user, and entries that are owned by other
+    users, or that are writable by other users, are not loaded; the directory itself is trusted to the same extent.
+
+    :return: The path of the directory, or `None` if caching is disabled.
+    """
+
+    if directory := environ.get(_CACHE_DIRECTORY_VARIABLE):
+        return Path(directory)
+
+    return None
+
+
+@cache
+def _implementation_digest() -> bytes:
+    """
+    Return a digest of the source code of the library, which determines how rulesets are built and what the built
+    nodes look like, and of the Python version, which determines the format of the serialized nodes.
+    """
+
+    digest = sha256()
+    digest.update(f'{_FORMAT_VERSION} {version_info.major}.{version_info.minor}'.encode())
+
+    package_directory = Path(__file__).parent
+    for path in sorted(package_directory.rglob('*.py')):
+        digest.update(str(path.relative_to(package_directory)).encode())
+        digest.update(path.read_bytes())
+
+    return digest.digest()
+
+
+def _is_trusted(status: stat_result) -> bool:
+    """
+    Return whether a cache entry may be unpickled: it must be owned by the current user and not be writable by others.
+    """
+
+    if getuid is None:
+        # The ownership and permissions of files on Windows are not reflected in the status.
+        return True
+
+    return status.st_uid == getuid() and not status.st_mode & (S_IWGRP | S_IWOTH)
+
+
+def _cache_key(name: str, source: bytes) -> str:
+    digest = sha256(_implementation_digest())
+    digest.update(name.encode())
+    digest.update(source)
+
+    return digest.hexdigest()
+
+
+class _RulesetPickler(pickle.Pickler):
+    """
+    A pickler that refers to the rules of other rulesets by their names rather than including copies of them.
+    """
+
+    def __init__(self, file: BinaryIO, rulesets: Sequence[Ruleset]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # The rules are alive for the duration of the pickling, so their identities are not reused.
+        self._rule_references: dict[int, tuple[int, str]] = {
+            id(rule): (index, rule_name)
+            for index, ruleset in enumerate(rulesets)
+            for rule_name, rule in ruleset.data.items()
+        }
+
+    def persistent_id(self, obj: object) -> tuple[int, str] | None:
+        return self._rule_references.get(id(obj))
+
+
+class _RulesetUnpickler(pickle.Unpickler):
+    """
+    An unpickler that resolves the references made by `_RulesetPickler` to the rules of other rulesets.
+    """
+
+    def __init__(self, file: BinaryIO, rulesets: Sequence[Ruleset]):
+        super().__init__(file)
+
+        self._rulesets = rulesets
+
+    def persistent_load(self, pid: tuple[int, str]) -> object:
+        index, rule_name = pid
+        return self._rulesets[index][rule_name]
+
+
+def load_cached(
+    name: str,
+    source: bytes,
+    build: Callable[[], _T],
+    referenced_rulesets: Sequence[Ruleset] = ()
+) -> _T:
+    """
+    Load objects built from ABNF source from the on-disk cache, or build them and cache them.
+
+    The objects, typically a `Ruleset` or a tuple of rulesets, are serialized with `pickle`, which preserves the
+    sharing of nodes and the cycles of recursive rules. The cache entry is keyed on a hash of the ABNF source, of the
+    source code of the library and of the Python version, so an entry is rebuilt whenever any of them changes; changes
+    to `build` itself that do not change the ABNF source are not detected. A cache entry that cannot be read, or that is
+    not trusted, see `cache_directory`, is rebuilt, and a failure to write one is ignored.
+
+    The rules of the core ruleset and of the referenced rulesets, which the built rulesets are made from, are stored by
+    name rather than copied into the entry, and are resolved to the rules of those rulesets when the entry is loaded, so
+    that, for example, `RFC9112_RULESET['token'] is RFC9110_RULESET['token']` whether or not the rulesets are loaded
+    from the cache. The other nodes are copies; only the unnamed nodes of canonicalized rulesets are shared again, see
+    `Ruleset.canonicalize`.
+
+    :param name: A name identifying the objects, unique among the cached objects.
+    :param source: The ABNF source from which the objects are built.
+    :param build: A callable building the objects.
+    :param referenced_rulesets: The rulesets whose rules the objects reference, in the same order whenever the entry is
+        loaded.
+    :return: The objects.
+    """
+
+    if (directory := cache_directory()) is None:
+        return build()
+
+    from abnf_parse.structures.ruleset import Ruleset
+
+    rulesets = [ruleset for ruleset in (Ruleset.CORE_RULESET, *referenced_rulesets) if ruleset is not None]
+
+    key = _cache_key(name=name, source=source)
+    path = directory / f'{name}.pickle'
+
+    try:
+        with path.open(mode='rb') as file:
+            if (
+                _is_trusted(status=fstat(file.fileno()))
+                and file.read(len(_MAGIC)) == _MAGIC
+                and file.readline().rstrip(b'\n') == key.encode()
+            ):
+                return _RulesetUnpickler(file=file, rulesets=rulesets).load()
+    except Exception:
+        # A missing, truncated or otherwise unreadable entry; it is rebuilt.
+        pass
+
+    objects = build()
+
+    # Write to a temporary file and rename it, so that concurrently starting processes never read a partial entry.
+    temporary_path = path.with_name(f'{path.name}.{getpid()}.tmp')
+    try:
+        directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+        # The entry is only readable and writable by the user, whatever the umask, so that it is trusted when loaded.
+        with open(temporary_path, mode='wb', opener=lambda path, flags: os_open(path, flags, 0o600)) as file:
+            file.write(_MAGIC)
+            file.write(key.encode() + b'\n')
+            _RulesetPickler(file=file, rulesets=rulesets).dump(objects)
+
+        os_replace(temporary_path, path)
+    except (OSError, pickle.PicklingError):
+        temporary_path.unlink(missing_ok=True)
+
+    return objects
@@ -48,6 +48,11 @@ CORE_RULESET: Final[Ruleset] = _initialize_core_ruleset()
 
 Ruleset.CORE_RULESET = CORE_RULESET
 
+CORE_RULESET.optimize()
+CORE_RULESET.canonicalize()
+CORE_RULESET.lower_regular_rules()
+CORE_RULESET.analyze()
+
 
 def _initialize_abnf_ruleset():
     abnf_ruleset = Ruleset({
@@ -312,3 +317,8 @@ def _initialize_abnf_ruleset():
 
 
 ABNF_RULESET: Final[Ruleset] = _initialize_abnf_ruleset()
+
+ABNF_RULESET.optimize()
+ABNF_RULESET.canonicalize()
+ABNF_RULESET.lower_regular_rules()
+ABNF_RULESET.analyze()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+from typing import ByteString, Iterator
+from re import compile as re_compile, Pattern as RePattern, escape as re_escape
+from weakref import WeakKeyDictionary
+from mmap import mmap
+
+from abnf_parse.structures.evaluation_node import EvaluationNode
+from abnf_parse.structures.match_node import MatchNode
+from abnf_parse.analysis import GrammarAnalyzer, ALL_BYTES
+from abnf_parse.exceptions import BacktrackingLimitReachedError
+
+# The backtracking limit used for each offset when scanning with `backtracking_limit=True`. A limit equal to the length
+# of the rest of the input, as when evaluating, would be no limit at all when scanning large files.
+SCAN_BACKTRACKING_LIMIT = 4096
+
+
+def _byte_set_pattern(byte_set: frozenset[int]) -> RePattern:
+    return re_compile(b'[' + b''.join(re_escape(bytes([byte])) for byte in sorted(byte_set)) + b']')
+
+
+class Prefilter:
+    """
+    Skip over the parts of an input where a match of a node cannot start, using patterns searched in C.
+
+    A non-empty match must start with one of the first bytes of the node. If every match of the node contains one of a
+    set of required bytes, a match must moreover start before such a byte with only bytes that can occur in a match in
+    between, and, if the length of the matches is bounded, at most that length before it. The smallest set of required
+    bytes is used, for example only `@` for an e-mail address.
+    """
+
+    def __init__(self, node: EvaluationNode, analyzer: GrammarAnalyzer | None = None):
+        analyzer = analyzer or GrammarAnalyzer()
+
+        self.nullable = analyzer.nullable(node=node)
+
+        first_bytes = analyzer.first_bytes(node=node)
+        self._first_bytes_pattern: RePattern | None = (
+            _byte_set_pattern(byte_set=first_bytes) if not self.nullable and first_bytes != ALL_BYTES else None
+        )
+
+        self._required_bytes_pattern: RePattern | None = None
+        self._impossible_bytes_pattern: RePattern | None = None
+        self._max_length: int | None = None
+
+        if not self.nullable and (required_byte_sets := analyzer.required_byte_sets(node=node)):
+            required_bytes = min(required_byte_sets, key=len)
+            if required_bytes != ALL_BYTES and required_bytes != first_bytes:
+                self._required_bytes_pattern = _byte_set_pattern(byte_set=required_bytes)
+                self._max_length = analyzer.max_length(node=node)
+                if (possible_bytes := analyzer.possible_bytes(node=node)) != ALL_BYTES:
+                    self._impossible_bytes_pattern = _byte_set_pattern(byte_set=ALL_BYTES - possible_bytes)
+
+    def iter_candidate_offsets(self, source: memoryview, offset: int = 0) -> Iterator[int]:
+        """
+        Yield the offsets at which a match may start, in increasing order.
+
+        The iterator may be sent an offset, from which the next candidate is then searched, so that candidates
+        overlapped by a match can be skipped.
+
+        :param source: The input to be scanned.
+        :param offset: The offset from which to scan.
+        :return: A generator yielding candidate offsets.
+        """
+
+        # The offsets of the next required byte and of the next byte that cannot occur in a match, at or after the
+        # candidate offset, if they have been searched.
+        required_byte_offset = -1
+        impossible_byte_offset = -1
+
+        while offset <= len(source):
+            if self._first_bytes_pattern is not None:
+                if (re_match := self._first_bytes_pattern.search(source, offset)) is None:
+                    return
+                offset = re_match.start()
+            elif not self.nullable and offset == len(source):
+                return
+
+            if self._required_bytes_pattern is not None:
+                if required_byte_offset < offset:
+                    if (re_match := self._required_bytes_pattern.search(source, offset)) is None:
+                        return
+                    required_byte_offset = re_match.start()
+
+                if self._max_length is not None and offset < required_byte_offset - self._max_length + 1:
+                    offset = required_byte_offset - self._max_length + 1
+                    continue
+
+                if self._impossible_bytes_pattern is not None:
+                    if impossible_byte_offset < offset:
+                        re_match = self._impossible_bytes_pattern.search(source, offset)
+                        impossible_byte_offset = re_match.start() if re_match is not None else len(source)
+
+                    # A match starting here would end before reaching the required byte.
+                    if impossible_byte_offset < required_byte_offset:
+                        offset = impossible_byte_offset + 1
+                        continue
+
+            next_offset = yield offset
+            offset = next_offset if next_offset is not None else offset + 1
+
+
+# Prefilters are built once per node, as analyzing a grammar is relatively expensive.
+_prefilters: WeakKeyDictionary[EvaluationNode, Prefilter] = WeakKeyDictionary()
+
+
+def finditer(
+    node: EvaluationNode,
+    source: ByteString | memoryview | mmap | str,
+    offset: int = 0,
+    longest: bool = False,
+    backtracking_limit: int | bool | None = True,
+    skip_limited_offsets: bool = False
+) -> Iterator[MatchNode]:
+    """
+    Find the non-overlapping matches of a node in an input, from left to right.
+
+    At each offset where a match may start, as determined by a `Prefilter`, the first (or longest) match starting there
+    is sought, and scanning resumes at its end. An empty match is followed by scanning from the next offset. The input
+    is not copied, so it may be a memory-mapped file larger than the available memory.
+
+    :param node: The node whose matches to find.
+    :param source: The input to be scanned.
+    :param offset: The offset from which to scan.
+    :param longest: Whether to use the longest match at an offset rather than the first one.
+    :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule, for each
+        offset at which a match is sought. `True`: Use `SCAN_BACKTRACKING_LIMIT`. See `EvaluationNode.evaluate`.
+    :param skip_limited_offsets: Whether to treat an offset at which the backtracking limit is reached as one where no
+        match starts and continue scanning, rather than raising `BacktrackingLimitReachedError`.
+    :return: An iterator yielding the matches.
+    """
+
+    if backtracking_limit is True:
+        backtracking_limit = SCAN_BACKTRACKING_LIMIT
+
+    if isinstance(source, str):
+        source = source.encode(encoding='charmap')
+
+    source_memoryview = memoryview(source)
+
+    if (prefilter := _prefilters.get(node)) is None:
+        prefilter = Prefilter(node=node)
+        _prefilters[node] = prefilter
+
+    candidate_offsets = prefilter.iter_candidate_offsets(source=source_memoryview, offset=offset)
+
+    candidate_offset = next(candidate_offsets, None)
+    while candidate_offset is not None:
+        try:
+            match_node = node.match_prefix(
+                source=source_memoryview,
+                offset=candidate_offset,
+                longest=longest,
+                backtracking_limit=backtracking_limit
+            )
+        except BacktrackingLimitReachedError:
+            if not skip_limited_offsets:
+                raise
+            match_node = None
+
+        if match_node is None or match_node.end_offset == candidate_offset:
+            if match_node is not None:
+                yield match_node
+            candidate_offset = next(candidate_offsets, None)
+        else:
+            yield match_node
+            try:
+                candidate_offset = candidate_offsets.send(match_node.end_offset)
+            except StopIteration:
+                candidate_offset = None
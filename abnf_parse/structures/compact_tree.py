@@ -0,0 +1,155 @@
+from __future__ import annotations
+from array import array
+
+from abnf_parse.structures.match_node import MatchNode
+
+
+class CompactTree:
+    """
+    A parse tree stored as parallel arrays rather than as `MatchNode` objects.
+
+    Each match is an index into arrays of name ids, start and end offsets, and first-child and next-sibling links, and
+    all matches share one reference to the input. A match takes 20 bytes, compared to hundreds for a `MatchNode`. The
+    matches are stored in depth-first pre-order, the root being at index 0.
+    """
+
+    def __init__(self, source: memoryview):
+        self.source = source
+        self.names: list[str] = []
+        self.name_ids = array('i')
+        self.start_offsets = array('i')
+        self.end_offsets = array('i')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+
+        self._name_to_id: dict[str, int] = {}
+
+    @classmethod
+    def from_match_node(cls, match_node: MatchNode) -> CompactTree:
+        """
+        Create a compact tree from a `MatchNode` tree.
+
+        :param match_node: The root of the tree.
+        :return: The resulting compact tree.
+        """
+
+        tree = cls(source=match_node.source)
+
+        last_children: list[int] = []
+        stack: list[tuple[MatchNode, int]] = [(match_node, -1)]
+
+        while stack:
+            current_node, parent_index = stack.pop()
+
+            index = tree._append(current_node)
+            last_children.append(-1)
+
+            if parent_index != -1:
+                if last_children[parent_index] == -1:
+                    tree.first_children[parent_index] = index
+                else:
+                    tree.next_siblings[last_children[parent_index]] = index
+                last_children[parent_index] = index
+
+            stack.extend((child, index) for child in reversed(current_node.children))
+
+        return tree
+
+    def _append(self, match_node: MatchNode) -> int:
+        if (name_id := self._name_to_id.get(match_node.name)) is None:
+            name_id = len(self.names)
+            self.names.append(match_node.name)
+            self._name_to_id[match_node.name] = name_id
+
+        self.name_ids.append(name_id)
+        self.start_offsets.append(match_node.start_offset)
+        self.end_offsets.append(match_node.end_offset)
+        self.first_children.append(-1)
+        self.next_siblings.append(-1)
+
+        return len(self.name_ids) - 1
+
+    @property
+    def root(self) -> CompactMatchNode:
+        return CompactMatchNode(tree=self, index=0)
+
+    def __len__(self) -> int:
+        return len(self.name_ids)
+
+
+class CompactMatchNode:
+    """
+    A view of a match in a `CompactTree`, offering the API of `MatchNode`.
+
+    Views are created on demand and hold no state besides the tree and an index, so they may be discarded freely.
+    """
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree: CompactTree, index: int):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self.tree.names[self.tree.name_ids[self.index]]
+
+    @property
+    def start_offset(self) -> int:
+        return self.tree.start_offsets[self.index]
+
+    @property
+    def end_offset(self) -> int:
+        return self.tree.end_offsets[self.index]
+
+    @property
+    def source(self) -> memoryview:
+        return self.tree.source
+
+    @property
+    def children(self) -> list[CompactMatchNode]:
+        tree = self.tree
+
+        children: list[CompactMatchNode] = []
+
+        child_index = tree.first_children[self.index]
+        while child_index != -1:
+            children.append(CompactMatchNode(tree=tree, index=child_index))
+            child_index = tree.next_siblings[child_index]
+
+        return children
+
+    def to_match_node(self) -> MatchNode:
+        """
+        Create a `MatchNode` tree from the match and its descendants.
+
+        :return: The root of the resulting tree.
+        """
+
+        return MatchNode(
+            name=self.name,
+            start_offset=self.start_offset,
+            end_offset=self.end_offset,
+            source=self.source,
+            children=[child.to_match_node() for child in self.children]
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactMatchNode):
+            return NotImplemented
+
+        return self.tree is other.tree and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.tree), self.index))
+
+    # The rest of the API of `MatchNode` only uses the attributes above.
+
+    _get_field_map = property(MatchNode._get_field_map.func)
+    search = MatchNode.search
+    get_field = MatchNode.get_field
+    get_value = MatchNode.get_value
+    __len__ = MatchNode.__len__
+    __str__ = MatchNode.__str__
+    __repr__ = MatchNode.__repr__
+    __bytes__ = MatchNode.__bytes__
@@ -0,0 +1,105 @@
+from __future__ import annotations
+from enum import Enum, auto
+
+from abnf_parse.structures.packrat_cache import PackratCache
+from abnf_parse.structures.evaluation_profile import EvaluationProfile
+from abnf_parse.structures.evaluation_trace import EvaluationTracer
+
+
+class Engine(Enum):
+    # Try the alternatives, split points and iterations of the nodes in order, backtracking on failure.
+    BACKTRACKING = auto()
+    # Build a parse forest of the input and extract the match from it, in at most cubic time. See
+    # `abnf_parse.forest.ParseForest`.
+    FOREST = auto()
+
+
+class EvaluationContext:
+    """
+    The settings and state of one evaluation, passed along to every node that is evaluated as part of it.
+
+    Nodes themselves hold no evaluation state, so the same nodes may be evaluated concurrently in several threads, and
+    an evaluation may be started from within another one, without the evaluations affecting each other.
+    """
+
+    __slots__ = ('backtracking_limit', 'packrat_cache', 'lazy', 'profile', 'tracer', 'intercepts_rules')
+
+    _DEFAULT_PACKRAT_CACHE_SIZE: int = 65536
+
+    def __init__(
+        self,
+        backtracking_limit: int | None = None,
+        packrat_cache: PackratCache | None = None,
+        lazy: bool = False,
+        profile: EvaluationProfile | None = None,
+        tracer: EvaluationTracer | None = None
+    ):
+        """
+        :param backtracking_limit: The maximum number of backtracks that are allowed in a repetition rule, or `None`
+            for no limit.
+        :param packrat_cache: A cache of the matches of named rules per offset, or `None` not to cache matches.
+        :param lazy: Whether to create the children of matches only when they are first accessed.
+        :param profile: A profile in which to record the evaluations of named rules, or `None` not to record them.
+        :param tracer: A tracer in which to record the events of the evaluations of nodes, or `None` not to record
+            them.
+        """
+
+        self.backtracking_limit = backtracking_limit
+        self.packrat_cache = packrat_cache
+        self.lazy = lazy
+        self.profile = profile
+        self.tracer = tracer
+
+        # Whether the evaluations of named rules go through the packrat cache, the profile or the tracer, checked once
+        # per node evaluation so that none of them costs anything when not used.
+        self.intercepts_rules = packrat_cache is not None or profile is not None or tracer is not None
+
+    @classmethod
+    def from_options(
+        cls,
+        input_length: int,
+        backtracking_limit: int | bool | None = True,
+        packrat: int | bool | None = False,
+        lazy: bool = False,
+        profile: EvaluationProfile | None = None,
+        tracer: EvaluationTracer | None = None
+    ) -> EvaluationContext:
+        """
+        Create a context from the options accepted by `EvaluationNode.evaluate`.
+
+        :param input_length: The length of the input to be evaluated, from the offset at which the evaluation starts.
+        :param backtracking_limit: `int`: A numeric limit. `True`: Use a limit equal to the length of the input.
+            `False` or `None`: Do not use a backtracking limit.
+        :param packrat: `int`: The maximum number of cached (rule, offset) entries. `True`: Use a default maximum.
+            `False` or `None`: Do not cache matches.
+        :param lazy: Whether to create the children of matches only when they are first accessed.
+        :param profile: A profile in which to record the evaluations of named rules, or `None` not to record them.
+        :param tracer: A tracer in which to record the events of the evaluations of nodes, or `None` not to record
+            them.
+        :return: The resulting context.
+        """
+
+        if backtracking_limit is None:
+            backtracking_limit = None
+        elif isinstance(backtracking_limit, bool):
+            backtracking_limit = input_length if backtracking_limit else None
+        elif not isinstance(backtracking_limit, int):
+            raise ValueError(f'Unexpected backtrack limit type: {type(backtracking_limit)}')
+
+        packrat_cache: PackratCache | None
+        if packrat is None:
+            packrat_cache = None
+        elif isinstance(packrat, bool):
+            packrat_cache = PackratCache(max_size=cls._DEFAULT_PACKRAT_CACHE_SIZE) if packrat else None
+        elif isinstance(packrat, int):
+            packrat_cache = PackratCache(max_size=packrat)
+        else:
+            raise ValueError(f'Unexpected packrat type: {type(packrat)}')
+
+        return cls(
+            backtracking_limit=backtracking_limit,
+            packrat_cache=packrat_cache,
+            lazy=lazy,
+            profile=profile,
+            tracer=tracer
+        )
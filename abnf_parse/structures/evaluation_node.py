@@ -1,17 +1,39 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import ByteString, Iterator
+from typing import ByteString, Iterable, Iterator, Sequence, TYPE_CHECKING
 from itertools import pairwise
+from mmap import mmap
+from time import perf_counter_ns
 from re import compile as re_compile, Pattern as RePattern, escape as re_escape, MULTILINE as RE_MULTILINE,\
     IGNORECASE as RE_IGNORECASE
 
-from abnf_parse.structures.match_node import MatchNode
+from abnf_parse.structures.match_node import MatchNode, LazyMatchNode
+from abnf_parse.structures.evaluation_context import EvaluationContext, Engine
 from abnf_parse.exceptions import NoMatchError, BacktrackingLimitReachedError
 
+# Maps the uppercase ASCII letters to their lowercase counterparts and other bytes to themselves, as case-insensitive
+# literals are matched.
+_CASE_FOLDING_TABLE = bytes.maketrans(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ', b'abcdefghijklmnopqrstuvwxyz')
+
+if TYPE_CHECKING:
+    from abnf_parse.batch import BatchResult
+    from abnf_parse.regular import RegularRuleEvaluator
+    from abnf_parse.structures.evaluation_profile import EvaluationProfile
+    from abnf_parse.structures.evaluation_trace import EvaluationTracer
+
 
 class EvaluationNode(ABC):
 
-    _BACKTRACKING_LIMIT: int | None = None
+    # Set on nodes lowered to `re` patterns by `abnf_parse.regular.lower_regular_rules`.
+    _regular_rule_evaluator: RegularRuleEvaluator | None = None
+
+    # Set on nodes that cannot match empty input by `abnf_parse.analysis.add_match_guards`: whether a match can start
+    # with each byte value, and the minimum length of a match.
+    _first_bytes_table: bytes | None = None
+    _min_match_length: int = 0
+
+    # The engine used when none is specified when evaluating the node. Set by `Ruleset.set_engine`.
+    _engine: Engine = Engine.BACKTRACKING
 
     def __init__(self, name: str):
         self.name = name
@@ -21,7 +43,12 @@ class EvaluationNode(ABC):
         source: ByteString | memoryview | str,
         offset: int = 0,
         backtracking_limit: int | bool | None = True,
-        exception_on_no_match: bool = True
+        exception_on_no_match: bool = True,
+        packrat: int | bool | None = False,
+        lazy: bool = False,
+        engine: Engine | None = None,
+        profile: EvaluationProfile | None = None,
+        tracer: EvaluationTracer | None = None
     ) -> MatchNode | None:
         """
         Evaluate if the input matches the grammar as constituted by the current node, which represents a tree.
@@ -34,24 +61,74 @@ class EvaluationNode(ABC):
             `int`: A numeric limit. `True`: Use a limit equal to the length of the input to be parsed. `False` or
             `None`: Do not use a backtracking limit.
         :param exception_on_no_match: Whether to raise an exception if the source data does not match the rule.
+        :param packrat: Whether to cache the matches of named rules per offset for the duration of the evaluation, so
+            that a rule is not re-evaluated at the same offset when backtracking. `int`: The maximum number of cached
+            (rule, offset) entries, beyond which the least recently used entries are evicted. `True`: Use a default
+            maximum. `False` or `None`: Do not cache matches.
+        :param lazy: Whether to create the children of matches only when they are first accessed, so that no children
+            are created for the matches that are discarded when backtracking.
+        :param engine: The engine with which to evaluate the input. With `Engine.FOREST`, the match is the same, but is
+            found in at most cubic time, and the backtracking limit, packrat cache, laziness, profile and tracer do not
+            apply.
+            `None`: Use the engine set for the node, by default `Engine.BACKTRACKING`.
+        :param profile: A profile in which to record, for each named rule, the number of evaluations, matches and
+            backtracks, the number of bytes matched and the time spent. See `EvaluationProfile`. `None`: Do not record
+            the evaluations.
+        :param tracer: A tracer in which to record when the evaluation of each named rule at an offset starts, produces
+            a match, is resumed for another match and ends, with the rules that it is nested in, to be exported for
+            example as a flame graph. See `EvaluationTracer`. `None`: Do not record the events.
         :return: A `MatchNode` if the input matches, otherwise `None`.
         """
 
-        if backtracking_limit is None:
-            EvaluationNode._BACKTRACKING_LIMIT = None
-        elif isinstance(backtracking_limit, bool):
-            EvaluationNode._BACKTRACKING_LIMIT = (len(source) - offset) if backtracking_limit else None
-        elif isinstance(backtracking_limit, int):
-            EvaluationNode._BACKTRACKING_LIMIT = backtracking_limit
-        else:
-            raise ValueError(f'Unexpected backtrack limit type: {type(backtracking_limit)}')
+        context = EvaluationContext.from_options(
+            input_length=len(source) - offset,
+            backtracking_limit=backtracking_limit,
+            packrat=packrat,
+            lazy=lazy,
+            profile=profile,
+            tracer=tracer
+        )
 
         if isinstance(source, str):
             source = source.encode(encoding='charmap')
 
         source_memoryview = memoryview(source)
 
-        for match_node in self._evaluate(source=source_memoryview, offset=offset):
+        engine = engine or self._engine
+
+        if (
+            engine is not Engine.FOREST
+            and self._regular_rule_evaluator is not None
+            and self._regular_rule_evaluator.supports(node=self)
+        ):
+            start_time_ns = perf_counter_ns() if profile is not None else 0
+            match_node = self._regular_rule_evaluator.evaluate(node=self, source=source_memoryview, offset=offset)
+            if profile is not None:
+                profile.record(rule_name=self.name, match_node=match_node, time_ns=perf_counter_ns() - start_time_ns)
+            if tracer is not None:
+                tracer.record(node=self, offset=offset, match_node=match_node)
+
+            if match_node is not None:
+                return match_node
+            if exception_on_no_match:
+                raise NoMatchError(rule_name=self.name, source=source_memoryview, offset=offset)
+            return None
+
+        if engine is Engine.FOREST:
+            from abnf_parse.forest import ParseForest
+
+            match_node = ParseForest(source=source_memoryview).match_node(
+                node=self,
+                start_offset=offset,
+                end_offset=len(source_memoryview)
+            )
+            if match_node is not None:
+                return match_node
+            if exception_on_no_match:
+                raise NoMatchError(rule_name=self.name, source=source_memoryview, offset=offset)
+            return None
+
+        for match_node in self._iter_matches(source=source_memoryview, offset=offset, context=context):
             if match_node.end_offset == len(source_memoryview):
                 return match_node
 
@@ -60,36 +137,503 @@ class EvaluationNode(ABC):
 
         return None
 
+    def fullmatch(
+        self,
+        source: ByteString | memoryview | str,
+        offset: int = 0,
+        backtracking_limit: int | bool | None = True,
+        packrat: int | bool | None = False,
+        lazy: bool = False,
+        engine: Engine | None = None,
+        profile: EvaluationProfile | None = None,
+        tracer: EvaluationTracer | None = None
+    ) -> MatchNode | None:
+        """
+        Evaluate the input from an offset to its end, returning `None` rather than raising an exception if it does not
+        match.
+
+        See `evaluate`. To match a part of a larger input without copying it, provide a slice of a `memoryview` of it.
+
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to start reading the input.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule.
+        :param packrat: Whether to cache the matches of named rules per offset for the duration of the evaluation.
+        :param lazy: Whether to create the children of matches only when they are first accessed.
+        :param engine: The engine with which to evaluate the input.
+        :param profile: A profile in which to record the evaluations of named rules.
+        :param tracer: A tracer in which to record the events of the evaluations of named rules.
+        :return: A `MatchNode` if the input matches, otherwise `None`.
+        """
+
+        return self.evaluate(
+            source=source,
+            offset=offset,
+            backtracking_limit=backtracking_limit,
+            exception_on_no_match=False,
+            packrat=packrat,
+            lazy=lazy,
+            engine=engine,
+            profile=profile,
+            tracer=tracer
+        )
+
+    def match_prefix(
+        self,
+        source: ByteString | memoryview | str,
+        offset: int = 0,
+        longest: bool = False,
+        backtracking_limit: int | bool | None = True,
+        packrat: int | bool | None = False,
+        lazy: bool = False
+    ) -> MatchNode | None:
+        """
+        Evaluate the input at an offset, accepting a match regardless of where it ends.
+
+        Unlike `evaluate`, the match need not extend to the end of the input, so that, for example, a token can be
+        read off the front of a buffer, and successive tokens can be read by evaluating at the end offset of the
+        previous match, without copying the input.
+
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to start reading the input.
+        :param longest: Whether to return the longest match rather than the first one. Finding the longest match
+            requires finding where all the matches end.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule. See
+            `evaluate`.
+        :param packrat: Whether to cache the matches of named rules per offset for the duration of the evaluation.
+        :param lazy: Whether to create the children of matches only when they are first accessed.
+        :return: The first, or the longest, `MatchNode` starting at the offset, if there is one, otherwise `None`.
+        """
+
+        context = EvaluationContext.from_options(
+            input_length=len(source) - offset,
+            backtracking_limit=backtracking_limit,
+            packrat=packrat,
+            lazy=lazy
+        )
+
+        if isinstance(source, str):
+            source = source.encode(encoding='charmap')
+
+        source_memoryview = memoryview(source)
+
+        regular = self._regular_rule_evaluator is not None and self._regular_rule_evaluator.supports(node=self)
+
+        if not longest:
+            if regular:
+                return self._regular_rule_evaluator.evaluate(
+                    node=self,
+                    source=source_memoryview,
+                    offset=offset,
+                    full_match=False
+                )
+
+            return next(self._iter_matches(source=source_memoryview, offset=offset, context=context), None)
+
+        end_offset: int | None
+        if regular and self._regular_rule_evaluator.supports_longest_match(node=self):
+            end_offset = self._regular_rule_evaluator.longest_match(node=self, source=source_memoryview, offset=offset)
+        elif regular and self._regular_rule_evaluator.match(
+            node=self,
+            source=source_memoryview,
+            offset=offset,
+            full_match=False
+        ) is None:
+            # Ruling out a match with the pattern is much faster than finding where all the matches end.
+            end_offset = None
+        else:
+            end_offset = max(self._recognize(source=source_memoryview, offset=offset, context=context), default=None)
+
+        if end_offset is None:
+            return None
+
+        if regular:
+            return self._regular_rule_evaluator.evaluate_span(
+                node=self,
+                source=source_memoryview,
+                start_offset=offset,
+                end_offset=end_offset
+            )
+
+        for match_node in self._iter_matches(source=source_memoryview, offset=offset, context=context):
+            if match_node.end_offset == end_offset:
+                return match_node
+
+        return None
+
+    def finditer(
+        self,
+        source: ByteString | memoryview | mmap | str,
+        offset: int = 0,
+        longest: bool = False,
+        backtracking_limit: int | bool | None = True,
+        skip_limited_offsets: bool = False
+    ) -> Iterator[MatchNode]:
+        """
+        Find the non-overlapping matches of the node in the input, from left to right, without copying the input.
+
+        See `abnf_parse.scan.finditer`.
+
+        :param source: The input to be scanned, for example a memory-mapped file.
+        :param offset: The offset from which to scan.
+        :param longest: Whether to use the longest match at an offset rather than the first one.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule, for
+            each offset at which a match is sought.
+        :param skip_limited_offsets: Whether to continue scanning past an offset at which the backtracking limit is
+            reached rather than raising `BacktrackingLimitReachedError`.
+        :return: An iterator yielding the matches.
+        """
+
+        from abnf_parse.scan import finditer
+
+        return finditer(
+            node=self,
+            source=source,
+            offset=offset,
+            longest=longest,
+            backtracking_limit=backtracking_limit,
+            skip_limited_offsets=skip_limited_offsets
+        )
+
+    def matches(
+        self,
+        source: ByteString | memoryview | str,
+        offset: int = 0,
+        backtracking_limit: int | bool | None = True,
+        full_match: bool = True,
+        return_end_offset: bool = False,
+        engine: Engine | None = None
+    ) -> bool | int | None:
+        """
+        Evaluate if the input matches the grammar as constituted by the current node, without building a parse tree.
+
+        Only the end offsets of matches are produced while evaluating, and for each node at an offset, only the first
+        way of reaching an end offset is pursued, which makes this much cheaper than `evaluate`.
+
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to start reading the input.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule. See
+            `evaluate`.
+        :param full_match: Whether the match must extend to the end of the input. If not, the first match is used,
+            regardless of where it ends.
+        :param return_end_offset: Whether to return the end offset of the match rather than a `bool`.
+        :param engine: The engine with which to evaluate the input. See `evaluate`.
+        :return: Whether the input matches, or, if `return_end_offset` is set, the end offset of the match if the input
+            matches, otherwise `None`.
+        """
+
+        context = EvaluationContext.from_options(
+            input_length=len(source) - offset,
+            backtracking_limit=backtracking_limit
+        )
+
+        if isinstance(source, str):
+            source = source.encode(encoding='charmap')
+
+        source_memoryview = memoryview(source)
+
+        match_end_offset: int | None = None
+
+        engine = engine or self._engine
+
+        if (
+            engine is not Engine.FOREST
+            and self._regular_rule_evaluator is not None
+            and self._regular_rule_evaluator.supports(node=self)
+        ):
+            match_end_offset = self._regular_rule_evaluator.match(
+                node=self,
+                source=source_memoryview,
+                offset=offset,
+                full_match=full_match
+            )
+        elif engine is Engine.FOREST:
+            from abnf_parse.forest import ParseForest
+
+            end_offsets = ParseForest(source=source_memoryview).end_offsets(node=self, offset=offset)
+            if not full_match:
+                match_end_offset = next(iter(end_offsets), None)
+            elif len(source_memoryview) in end_offsets:
+                match_end_offset = len(source_memoryview)
+        else:
+            for end_offset in self._recognize(source=source_memoryview, offset=offset, context=context):
+                if not full_match or end_offset == len(source_memoryview):
+                    match_end_offset = end_offset
+                    break
+
+        return match_end_offset if return_end_offset else match_end_offset is not None
+
+    def evaluate_many(
+        self,
+        sources: Iterable[ByteString | memoryview | str],
+        workers: int | None = None,
+        chunksize: int = 256,
+        fields: Sequence[str] | None = None,
+        field_offsets: bool = False,
+        backtracking_limit: int | bool | None = True
+    ) -> Iterator[BatchResult]:
+        """
+        Evaluate many inputs in a pool of worker processes, producing a compact result for each input, in order.
+
+        See `abnf_parse.batch.evaluate_many`.
+
+        :param sources: The inputs to be evaluated.
+        :param workers: The number of worker processes. `None`: Use the number of CPUs.
+        :param chunksize: The number of inputs sent to a worker at a time.
+        :param fields: The names of rules whose matches to produce for each input.
+        :param field_offsets: Whether to produce the offsets of the matches of the fields rather than their values.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule.
+        :return: An iterator yielding whether each input matches, or, if `fields` is provided, the field matches of
+            each input, or the error raised when evaluating an input.
+        """
+
+        from abnf_parse.batch import evaluate_many
+
+        return evaluate_many(
+            node=self,
+            sources=sources,
+            workers=workers,
+            chunksize=chunksize,
+            fields=fields,
+            field_offsets=field_offsets,
+            backtracking_limit=backtracking_limit
+        )
+
+    def _recognize(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        """
+        Evaluate the node at an offset, producing only the end offsets of the matches.
+
+        Each end offset is produced once, in the order in which `_evaluate` would first produce a match ending there.
+        Node types that do not override this method have their matches evaluated and their end offsets produced.
+
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to evaluate the node.
+        :param context: The context of the evaluation.
+        :return: An iterator yielding the end offsets of the matches of the node at the offset.
+        """
+
+        yielded_end_offsets: set[int] = set()
+
+        for match_node in self._iter_matches(source=source, offset=offset, context=context):
+            if match_node.end_offset not in yielded_end_offsets:
+                yielded_end_offsets.add(match_node.end_offset)
+                yield match_node.end_offset
+
+    def _iter_matches(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
+        """
+        Evaluate the node at an offset, going through the tracer, the profile and the packrat cache if the node is a
+        named rule and the context has them, and producing no matches without evaluating the node if its match guard
+        rules out a match.
+
+        Nodes evaluate their child nodes via this method rather than via `_evaluate`.
+
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to evaluate the node.
+        :param context: The context of the evaluation.
+        :return: An iterator yielding the matches of the node at the offset.
+        """
+
+        if self._first_bytes_table is not None and (
+            len(source) - offset < self._min_match_length or not self._first_bytes_table[source[offset]]
+        ):
+            return iter(())
+
+        if context.intercepts_rules:
+            if self.name != self.__class__.__name__:
+                if context.tracer is not None:
+                    return context.tracer.iter_matches(node=self, source=source, offset=offset, context=context)
+                if context.profile is not None:
+                    return context.profile.iter_matches(node=self, source=source, offset=offset, context=context)
+                if context.packrat_cache is not None:
+                    return context.packrat_cache.iter_matches(node=self, source=source, offset=offset, context=context)
+            elif context.tracer is not None and context.tracer.anonymous_nodes:
+                return context.tracer.iter_matches(node=self, source=source, offset=offset, context=context)
+
+        return self._evaluate(source=source, offset=offset, context=context)
+
     @abstractmethod
-    def _evaluate(self, source: memoryview, offset: int = 0) -> Iterator[MatchNode]:
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
         raise NotImplementedError
 
 
 class AlternationNode(EvaluationNode):
 
+    # Set by `abnf_parse.analysis.add_dispatch_tables`: for each byte value, and for the end of the input at index 256,
+    # the alternatives whose matches can start there, in order.
+    _dispatch_table: tuple[tuple[EvaluationNode, ...], ...] | None = None
+
     def __init__(self, *nodes: EvaluationNode, name: str | None = None):
         super().__init__(name=name or self.__class__.__name__)
         self.nodes = nodes
 
-    def _evaluate(self, source: memoryview, offset: int = 0) -> Iterator[MatchNode]:
-        for node in self.nodes:
-            for match_node in node._evaluate(source=source, offset=offset):
+    def _viable_nodes(self, source: memoryview, offset: int) -> Sequence[EvaluationNode]:
+        """
+        Return the alternatives that can match at an offset, in order.
+
+        :param source: The input being evaluated.
+        :param offset: The offset at which the alternatives are to be evaluated.
+        :return: The alternatives that can match.
+        """
+
+        if self._dispatch_table is None:
+            return self.nodes
+
+        return self._dispatch_table[source[offset] if offset < len(source) else 256]
+
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
+        for node in self._viable_nodes(source=source, offset=offset):
+            for match_node in node._iter_matches(source=source, offset=offset, context=context):
                 if self.name == self.__class__.__name__:
                     yield match_node
+                elif context.lazy:
+                    yield LazyMatchNode._new(
+                        name=self.name,
+                        start_offset=match_node.start_offset,
+                        end_offset=match_node.end_offset,
+                        source=source,
+                        children_recipe=(self._alternative_children, (match_node,))
+                    )
                 else:
-                    if match_node.name in {ConcatenationNode.__name__, RepetitionNode.__name__, OptionNode.__name__}:
-                        children = match_node.children
-                    else:
-                        children = [match_node]
-
                     yield MatchNode(
                         name=self.name,
                         start_offset=match_node.start_offset,
                         end_offset=match_node.end_offset,
                         source=source,
-                        children=children
+                        children=self._alternative_children(match_node=match_node)
                     )
 
+    @staticmethod
+    def _alternative_children(match_node: MatchNode) -> list[MatchNode]:
+        """
+        Produce the children of a named alternation match from the match of the alternative.
+
+        :param match_node: The match of the alternative.
+        :return: The children of the alternation match.
+        """
+
+        if match_node.name in {ConcatenationNode.__name__, RepetitionNode.__name__, OptionNode.__name__}:
+            return match_node.children
+
+        return [match_node]
+
+    def _recognize(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        yielded_end_offsets: set[int] = set()
+
+        for node in self._viable_nodes(source=source, offset=offset):
+            for end_offset in node._recognize(source=source, offset=offset, context=context):
+                if end_offset not in yielded_end_offsets:
+                    yielded_end_offsets.add(end_offset)
+                    yield end_offset
+
+
+class LiteralTrieNode(AlternationNode):
+    """
+    An alternation of literals, such as `month` or `day-name`, that matches all of its alternatives in one pass over the
+    input, by following a trie of their case-folded bytes.
+
+    The matches are the same as those of the alternation, in the same order, except that only the first match of each
+    extent is produced, as later alternatives matching the same bytes would produce matches with the same extent.
+    """
+
+    def __init__(self, *nodes: LiteralNode, name: str | None = None):
+        super().__init__(*nodes, name=name)
+
+    @property
+    def nodes(self) -> tuple[LiteralNode, ...]:
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes: tuple[LiteralNode, ...]) -> None:
+        # The trie is rebuilt when the alternatives are replaced, so that it refers to the new ones.
+        self._nodes = nodes
+
+        # Each state of the trie is a map of the next case-folded byte to the next state, and the alternatives whose
+        # values end there, with their indices.
+        self._trie: tuple[dict[int, tuple], list[tuple[int, LiteralNode]]] = ({}, [])
+
+        for index, node in enumerate(nodes):
+            state = self._trie
+            for byte in node.value.translate(_CASE_FOLDING_TABLE):
+                if (next_state := state[0].get(byte)) is None:
+                    next_state = ({}, [])
+                    state[0][byte] = next_state
+                state = next_state
+
+            state[1].append((index, node))
+
+    def _matching_nodes(self, source: memoryview, offset: int) -> list[tuple[LiteralNode, int]]:
+        """
+        Return the alternatives that match at an offset, in order, with the end offsets of their matches, keeping only
+        the first alternative for each end offset.
+
+        :param source: The input being evaluated.
+        :param offset: The offset at which the alternatives are to be evaluated.
+        :return: The matching alternatives and the end offsets of their matches.
+        """
+
+        matching_nodes: list[tuple[int, LiteralNode, int]] = []
+
+        state = self._trie
+        end_offset = offset
+        source_length = len(source)
+
+        while True:
+            for index, node in state[1]:
+                if not node.case_sensitive or source[offset:end_offset] == node.value:
+                    matching_nodes.append((index, node, end_offset))
+
+            if end_offset == source_length or (state := state[0].get(_CASE_FOLDING_TABLE[source[end_offset]])) is None:
+                break
+
+            end_offset += 1
+
+        if len(matching_nodes) < 2:
+            return [(node, end_offset) for _, node, end_offset in matching_nodes]
+
+        # Restore the order of the alternatives, which the trie yields by length.
+        matching_nodes.sort()
+
+        distinct_matching_nodes: list[tuple[LiteralNode, int]] = []
+        end_offsets: set[int] = set()
+
+        for _, node, end_offset in matching_nodes:
+            if end_offset not in end_offsets:
+                end_offsets.add(end_offset)
+                distinct_matching_nodes.append((node, end_offset))
+
+        return distinct_matching_nodes
+
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
+        # The evaluations of the alternatives are recorded as those of an alternation.
+        if context.profile is not None or context.tracer is not None:
+            return super()._evaluate(source=source, offset=offset, context=context)
+
+        return self._evaluate_trie(source=source, offset=offset)
+
+    def _evaluate_trie(self, source: memoryview, offset: int) -> Iterator[MatchNode]:
+        for node, end_offset in self._matching_nodes(source=source, offset=offset):
+            match_node = MatchNode._new(
+                name=node.name,
+                start_offset=offset,
+                end_offset=end_offset,
+                source=source,
+                children=[]
+            )
+
+            if self.name == self.__class__.__name__:
+                yield match_node
+            else:
+                yield MatchNode._new(
+                    name=self.name,
+                    start_offset=offset,
+                    end_offset=end_offset,
+                    source=source,
+                    children=[match_node]
+                )
+
+    def _recognize(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        for _, end_offset in self._matching_nodes(source=source, offset=offset):
+            yield end_offset
+
 
 class ConcatenationNode(EvaluationNode):
 
@@ -109,7 +653,7 @@ class ConcatenationNode(EvaluationNode):
 
         return last_concatenation_node
 
-    def _evaluate(self, source: memoryview, offset: int = 0) -> Iterator[MatchNode]:
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
 
         # TODO: Reconsider this `None` business...
 
@@ -119,43 +663,82 @@ class ConcatenationNode(EvaluationNode):
         if self.node_b is None:
             raise ValueError('The right node is `None`.')
 
-        for match_node_a in self.node_a._evaluate(source=source, offset=offset):
-            for match_node_b in self.node_b._evaluate(source=source, offset=match_node_a.end_offset):
-
-                # Flatten unnamed, recursive concatenation nodes.
-
-                node_a_is_concatenation_node = match_node_a.name == self.__class__.__name__
-                node_b_is_concatenation_node = match_node_b.name == self.__class__.__name__
-
-                if node_a_is_concatenation_node and node_b_is_concatenation_node:
-                    children = match_node_a.children + match_node_b.children
-                elif node_a_is_concatenation_node:
-                    children = match_node_a.children + [match_node_b]
-                elif node_b_is_concatenation_node:
-                    children = [match_node_a] + match_node_b.children
-                else:
-                    children = [match_node_a, match_node_b]
-
-                node_a_is_repetition_node = match_node_a.name in {RepetitionNode.__name__, OptionNode.__name__}
-                node_b_is_repetition_node = match_node_b.name in {RepetitionNode.__name__, OptionNode.__name__}
+        for match_node_a in self.node_a._iter_matches(source=source, offset=offset, context=context):
+            match_nodes_b = self.node_b._iter_matches(source=source, offset=match_node_a.end_offset, context=context)
+            for match_node_b in match_nodes_b:
 
-                if node_a_is_repetition_node and node_b_is_repetition_node:
-                    children = [*match_node_a.children, *match_node_b.children]
-                elif node_a_is_repetition_node:
-                    children = [*match_node_a.children, match_node_b]
-                elif node_b_is_repetition_node:
-                    children = [match_node_a, *match_node_b.children]
-
-                # Yield the match. Discard children whose match length is zero.
+                if context.lazy:
+                    yield LazyMatchNode._new(
+                        name=self.name,
+                        start_offset=match_node_a.start_offset,
+                        end_offset=match_node_b.end_offset,
+                        source=source,
+                        children_recipe=(self._concatenate_children, (match_node_a, match_node_b))
+                    )
+                    continue
 
                 yield MatchNode(
                     name=self.name,
                     start_offset=match_node_a.start_offset,
                     end_offset=match_node_b.end_offset,
                     source=source,
-                    children=[child for child in children if len(child) != 0]
+                    children=self._concatenate_children(match_node_a=match_node_a, match_node_b=match_node_b)
                 )
 
+    def _recognize(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+
+        if self.node_a is None:
+            raise ValueError('The left node is `None`.')
+
+        if self.node_b is None:
+            raise ValueError('The right node is `None`.')
+
+        yielded_end_offsets: set[int] = set()
+
+        for end_offset_a in self.node_a._recognize(source=source, offset=offset, context=context):
+            for end_offset_b in self.node_b._recognize(source=source, offset=end_offset_a, context=context):
+                if end_offset_b not in yielded_end_offsets:
+                    yielded_end_offsets.add(end_offset_b)
+                    yield end_offset_b
+
+    @staticmethod
+    def _concatenate_children(match_node_a: MatchNode, match_node_b: MatchNode) -> list[MatchNode]:
+        """
+        Produce the children of a concatenation match from the matches of its left and right nodes.
+
+        :param match_node_a: The match of the left node.
+        :param match_node_b: The match of the right node.
+        :return: The children of the concatenation match.
+        """
+
+        # Flatten unnamed, recursive concatenation nodes.
+
+        node_a_is_concatenation_node = match_node_a.name == ConcatenationNode.__name__
+        node_b_is_concatenation_node = match_node_b.name == ConcatenationNode.__name__
+
+        if node_a_is_concatenation_node and node_b_is_concatenation_node:
+            children = match_node_a.children + match_node_b.children
+        elif node_a_is_concatenation_node:
+            children = match_node_a.children + [match_node_b]
+        elif node_b_is_concatenation_node:
+            children = [match_node_a] + match_node_b.children
+        else:
+            children = [match_node_a, match_node_b]
+
+        node_a_is_repetition_node = match_node_a.name in {RepetitionNode.__name__, OptionNode.__name__}
+        node_b_is_repetition_node = match_node_b.name in {RepetitionNode.__name__, OptionNode.__name__}
+
+        if node_a_is_repetition_node and node_b_is_repetition_node:
+            children = [*match_node_a.children, *match_node_b.children]
+        elif node_a_is_repetition_node:
+            children = [*match_node_a.children, match_node_b]
+        elif node_b_is_repetition_node:
+            children = [match_node_a, *match_node_b.children]
+
+        # Discard children whose match length is zero.
+
+        return [child for child in children if len(child) != 0]
+
 
 class LiteralNode(EvaluationNode):
 
@@ -168,7 +751,7 @@ class LiteralNode(EvaluationNode):
             flags=RE_MULTILINE | (RE_IGNORECASE if not case_sensitive else 0)
         )
 
-    def _evaluate(self, source: memoryview, offset: int = 0) -> Iterator[MatchNode]:
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
 
         end_offset: int = offset + len(self.value)
 
@@ -181,6 +764,11 @@ class LiteralNode(EvaluationNode):
                 source=source
             )
 
+    def _recognize(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        # The pattern has a fixed length, so matching at the offset is the same as matching the slice.
+        if self._pattern.match(source, offset):
+            yield offset + len(self.value)
+
 
 class RangedLiteralNode(EvaluationNode):
 
@@ -189,9 +777,8 @@ class RangedLiteralNode(EvaluationNode):
         self.min_value = min_value
         self.max_value = max_value
 
-    def _evaluate(self, source: memoryview, offset: int = 0) -> Iterator[MatchNode]:
-        literal = next(iter(source[offset:]), None)
-        if literal is not None and self.min_value <= literal <= self.max_value:
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
+        if offset < len(source) and self.min_value <= source[offset] <= self.max_value:
             yield MatchNode(
                 name=self.name,
                 start_offset=offset,
@@ -199,9 +786,74 @@ class RangedLiteralNode(EvaluationNode):
                 source=source
             )
 
+    def _recognize(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        if offset < len(source) and self.min_value <= source[offset] <= self.max_value:
+            yield offset + 1
+
+
+class ByteClassNode(EvaluationNode):
+    """
+    A node matching a single byte by looking it up in a table, replacing an alternation of single-byte alternatives.
+
+    For each byte value, the table holds the names of the matches that the first matching alternative produces, from
+    the outermost to the innermost, or `None` if no alternative matches the byte.
+    """
+
+    def __init__(self, table: Sequence[tuple[str, ...] | None], name: str | None = None):
+        super().__init__(name=name or self.__class__.__name__)
+
+        if len(table) != 256:
+            raise ValueError(f'The table must have 256 entries: {len(table)}')
+
+        self.table: tuple[tuple[str, ...] | None, ...] = tuple(table)
+
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
+        if offset < len(source) and (names := self.table[source[offset]]) is not None:
+            yield self._create_match_node(names=names, source=source, offset=offset)
+
+    def _recognize(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        if offset < len(source) and self.table[source[offset]] is not None:
+            yield offset + 1
+
+    def _create_match_node(self, names: tuple[str, ...], source: memoryview, offset: int) -> MatchNode:
+        """
+        Create the match of a byte that is in the class.
+
+        :param names: The table entry of the byte.
+        :param source: The input that was evaluated.
+        :param offset: The offset of the byte.
+        :return: The resulting match node.
+        """
+
+        match_node = MatchNode(name=names[-1], start_offset=offset, end_offset=offset + 1, source=source)
+
+        for name in reversed(names[:-1]):
+            match_node = MatchNode(
+                name=name,
+                start_offset=offset,
+                end_offset=offset + 1,
+                source=source,
+                children=[match_node]
+            )
+
+        if self.name != self.__class__.__name__:
+            match_node = MatchNode(
+                name=self.name,
+                start_offset=offset,
+                end_offset=offset + 1,
+                source=source,
+                children=[match_node]
+            )
+
+        return match_node
+
 
 class RepetitionNode(EvaluationNode):
 
+    # Set by `abnf_parse.analysis.add_run_patterns` on repetitions of nodes that match a single byte of a set: a pattern
+    # matching a run of bytes of the set.
+    _run_pattern: RePattern | None = None
+
     def __init__(self, node: EvaluationNode, min_value: int = 0, max_value: int | None = None, name: str | None = None):
         super().__init__(name=name or self.__class__.__name__)
         self.node = node
@@ -210,12 +862,145 @@ class RepetitionNode(EvaluationNode):
 
         self._backtrack_count = 0
 
-    def _evaluate(self, source: memoryview, offset: int = 0) -> Iterator[MatchNode]:
+    def _evaluate(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
+        # The evaluations of the iterations are not recorded when taking the fast path.
+        if self._run_pattern is not None and context.profile is None and context.tracer is None:
+            return self._evaluate_run(source=source, offset=offset, context=context)
+
+        return self._evaluate_iterations(source=source, offset=offset, context=context)
+
+    def _run_length(self, source: memoryview, offset: int) -> tuple[int, bool]:
+        """
+        Return the length of the run of bytes matching the repeated node at an offset, up to the maximum number of
+        iterations, and whether the run was ended by the maximum or the end of the input rather than by a byte that
+        does not match.
+        """
+
+        end_offset = len(source) if self.max_value is None else min(len(source), offset + self.max_value)
+        run_length = self._run_pattern.match(source, offset, end_offset).end() - offset
+
+        return run_length, run_length == self.max_value or offset + run_length == len(source)
+
+    def _evaluate_run(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[MatchNode]:
+        # Produces the same matches, in the same order and with the same backtracking limit, as `_evaluate_iterations`
+        # does for a node with a single match of one byte at each offset of the run, but finds the run with a single
+        # pattern match, and creates the matches of the iterations only when the children of a match are accessed.
+
+        run_length, run_ended = self._run_length(source=source, offset=offset)
+        backtracking_limit = context.backtracking_limit
+        backtracking_count = 0
+
+        # The matches of the iterations, shared by the matches of the run, which take their children from its start.
+        run_children: list[MatchNode] = []
+
+        if run_length:
+            if run_ended:
+                # The last iteration reached the maximum or the end of the input, and so is not backtracked from.
+                yield LazyMatchNode._new(
+                    name=self.name,
+                    start_offset=offset,
+                    end_offset=offset + run_length,
+                    source=source,
+                    children_recipe=(self._run_children, (run_children, source, offset, run_length))
+                )
+                run_length -= 1
+
+            for iteration_count in range(run_length, 0, -1):
+                if iteration_count >= self.min_value:
+                    yield LazyMatchNode._new(
+                        name=self.name,
+                        start_offset=offset,
+                        end_offset=offset + iteration_count,
+                        source=source,
+                        children_recipe=(self._run_children, (run_children, source, offset, iteration_count))
+                    )
+
+                backtracking_count += 1
+                if backtracking_limit is not None and backtracking_count >= backtracking_limit:
+                    raise BacktrackingLimitReachedError(
+                        rule_name=self.node.name,
+                        source=source,
+                        offset=offset + iteration_count,
+                        count=backtracking_count,
+                        limit=backtracking_limit
+                    )
+
+        if self.min_value == 0:
+            yield MatchNode(
+                name=self.name,
+                start_offset=offset,
+                end_offset=offset,
+                source=source
+            )
+
+    def _run_children(
+        self,
+        run_children: list[MatchNode],
+        source: memoryview,
+        start_offset: int,
+        iteration_count: int
+    ) -> list[MatchNode]:
+        """
+        Return the matches of the first iterations of a run, creating the ones that have not been created yet in the
+        list shared by the matches of the run, so that each is created once however many matches of the run are
+        accessed.
+
+        :param run_children: The matches of the iterations of the run created so far.
+        :param source: The input that was evaluated.
+        :param start_offset: The offset at which the run starts.
+        :param iteration_count: The number of iterations whose matches to return.
+        :return: The matches of the repeated node at each offset of the first iterations of the run.
+        """
+
+        if (created_count := len(run_children)) < iteration_count:
+            run_children.extend(
+                self._run_matches(
+                    source=source,
+                    start_offset=start_offset + created_count,
+                    end_offset=start_offset + iteration_count
+                )
+            )
+
+        return run_children[:iteration_count]
+
+    def _run_matches(self, source: memoryview, start_offset: int, end_offset: int) -> list[MatchNode]:
+        """
+        Create the matches of the iterations of a run.
+
+        :param source: The input that was evaluated.
+        :param start_offset: The offset at which the run starts.
+        :param end_offset: The offset at which the run ends.
+        :return: The matches of the repeated node at each offset of the run.
+        """
+
+        node = self.node
+
+        if isinstance(node, ByteClassNode):
+            return [
+                node._create_match_node(names=node.table[source[offset]], source=source, offset=offset)
+                for offset in range(start_offset, end_offset)
+            ]
+
+        return [
+            MatchNode._new(name=node.name, start_offset=offset, end_offset=offset + 1, source=source, children=[])
+            for offset in range(start_offset, end_offset)
+        ]
+
+    def _evaluate_iterations(
+        self,
+        source: memoryview,
+        offset: int,
+        context: EvaluationContext
+    ) -> Iterator[MatchNode]:
 
         match_stack: list[MatchNode] = []
+        # When creating lazy matches, the stack is also kept as a chain of (match, previous link) pairs, so that a
+        # match can refer to its iterations without copying them.
+        match_links: list[tuple[MatchNode, tuple | None]] | None = [] if context.lazy else None
+        backtracking_limit = context.backtracking_limit
         backtracking_count = 0
 
-        queue = [self.node._evaluate(source=source, offset=offset)]
+        queue = [self.node._iter_matches(source=source, offset=offset, context=context)]
 
         while queue:
             current_iterator: Iterator[MatchNode] = queue.pop()
@@ -227,26 +1012,27 @@ class RepetitionNode(EvaluationNode):
                     continue
 
                 if len(match_stack) >= self.min_value:
-                    yield MatchNode(
-                        name=self.name,
-                        start_offset=offset,
-                        end_offset=match_stack[-1].end_offset,
+                    yield self._create_match_node(
                         source=source,
-                        children=list(match_stack)
+                        offset=offset,
+                        match_stack=match_stack,
+                        match_links=match_links
                     )
 
                 backtracking_count += 1
-                if self._BACKTRACKING_LIMIT is not None and backtracking_count >= self._BACKTRACKING_LIMIT:
+                if backtracking_limit is not None and backtracking_count >= backtracking_limit:
                     raise BacktrackingLimitReachedError(
                         rule_name=self.node.name,
                         source=source,
                         offset=match_stack[-1].end_offset,
                         count=backtracking_count,
-                        limit=self._BACKTRACKING_LIMIT
+                        limit=backtracking_limit
                     )
 
                 if match_stack:
                     match_stack.pop()
+                    if match_links is not None:
+                        match_links.pop()
 
                 continue
 
@@ -254,18 +1040,23 @@ class RepetitionNode(EvaluationNode):
             queue.append(current_iterator)
 
             match_stack.append(iteration_match_node)
+            if match_links is not None:
+                match_links.append((iteration_match_node, match_links[-1] if match_links else None))
 
             if len(match_stack) == self.max_value or iteration_match_node.end_offset == len(source):
-                yield MatchNode(
-                    name=self.name,
-                    start_offset=offset,
-                    end_offset=iteration_match_node.end_offset,
+                yield self._create_match_node(
                     source=source,
-                    children=list(match_stack)
+                    offset=offset,
+                    match_stack=match_stack,
+                    match_links=match_links
                 )
                 match_stack.pop()
+                if match_links is not None:
+                    match_links.pop()
             else:
-                queue.append(self.node._evaluate(source=source, offset=iteration_match_node.end_offset))
+                queue.append(
+                    self.node._iter_matches(source=source, offset=iteration_match_node.end_offset, context=context)
+                )
 
         if self.min_value == 0:
             yield MatchNode(
@@ -275,6 +1066,166 @@ class RepetitionNode(EvaluationNode):
                 source=source
             )
 
+    def _create_match_node(
+        self,
+        source: memoryview,
+        offset: int,
+        match_stack: list[MatchNode],
+        match_links: list[tuple[MatchNode, tuple | None]] | None
+    ) -> MatchNode:
+        """
+        Create the match of the iterations currently on the stack.
+
+        :param source: The input that was evaluated.
+        :param offset: The offset at which the repetition was evaluated.
+        :param match_stack: The matches of the iterations.
+        :param match_links: The matches of the iterations as a chain of links, if lazy matches are to be created.
+        :return: The resulting match node.
+        """
+
+        if match_links is not None:
+            return LazyMatchNode._new(
+                name=self.name,
+                start_offset=offset,
+                end_offset=match_stack[-1].end_offset,
+                source=source,
+                children_recipe=(self._linked_matches, (match_links[-1],))
+            )
+
+        return MatchNode(
+            name=self.name,
+            start_offset=offset,
+            end_offset=match_stack[-1].end_offset,
+            source=source,
+            children=list(match_stack)
+        )
+
+    @staticmethod
+    def _linked_matches(match_link: tuple[MatchNode, tuple | None]) -> list[MatchNode]:
+        """
+        Return the matches of a chain of links, from the first to the last.
+
+        :param match_link: The last link of the chain.
+        :return: The matches of the chain.
+        """
+
+        matches: list[MatchNode] = []
+
+        while match_link is not None:
+            match_node, match_link = match_link
+            matches.append(match_node)
+
+        matches.reverse()
+
+        return matches
+
+    def _iteration_state(self, iteration_count: int, end_offset: int) -> tuple[int, int]:
+        """
+        Return a key identifying what can follow a number of iterations ending at an offset.
+
+        Beyond the minimum number of iterations, the count only matters if there is a maximum.
+        """
+
+        if self.max_value is None:
+            iteration_count = min(iteration_count, self.min_value)
+
+        return iteration_count, end_offset
+
+    def _recognize(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        if self._run_pattern is not None:
+            return self._recognize_run(source=source, offset=offset, context=context)
+
+        return self._recognize_iterations(source=source, offset=offset, context=context)
+
+    def _recognize_run(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        # Mirrors `_evaluate_run`.
+
+        run_length, run_ended = self._run_length(source=source, offset=offset)
+        backtracking_limit = context.backtracking_limit
+        backtracking_count = 0
+
+        if run_length:
+            if run_ended:
+                yield offset + run_length
+                run_length -= 1
+
+            for iteration_count in range(run_length, 0, -1):
+                if iteration_count >= self.min_value:
+                    yield offset + iteration_count
+
+                backtracking_count += 1
+                if backtracking_limit is not None and backtracking_count >= backtracking_limit:
+                    raise BacktrackingLimitReachedError(
+                        rule_name=self.node.name,
+                        source=source,
+                        offset=offset + iteration_count,
+                        count=backtracking_count,
+                        limit=backtracking_limit
+                    )
+
+        if self.min_value == 0:
+            yield offset
+
+    def _recognize_iterations(self, source: memoryview, offset: int, context: EvaluationContext) -> Iterator[int]:
+        # Mirrors `_evaluate_iterations`, but iteration states that have already been explored are not explored again,
+        # as they can only lead to end offsets that have already been produced.
+
+        end_offset_stack: list[int] = []
+        backtracking_limit = context.backtracking_limit
+        backtracking_count = 0
+        yielded_end_offsets: set[int] = set()
+        visited_states: set[tuple[int, int]] = {self._iteration_state(iteration_count=0, end_offset=offset)}
+
+        queue = [self.node._recognize(source=source, offset=offset, context=context)]
+
+        while queue:
+            current_iterator: Iterator[int] = queue.pop()
+
+            iteration_end_offset: int | None = next(current_iterator, None)
+
+            if iteration_end_offset is None:
+                if not end_offset_stack:
+                    continue
+
+                if len(end_offset_stack) >= self.min_value and end_offset_stack[-1] not in yielded_end_offsets:
+                    yielded_end_offsets.add(end_offset_stack[-1])
+                    yield end_offset_stack[-1]
+
+                backtracking_count += 1
+                if backtracking_limit is not None and backtracking_count >= backtracking_limit:
+                    raise BacktrackingLimitReachedError(
+                        rule_name=self.node.name,
+                        source=source,
+                        offset=end_offset_stack[-1],
+                        count=backtracking_count,
+                        limit=backtracking_limit
+                    )
+
+                end_offset_stack.pop()
+
+                continue
+
+            # Add the possibly still-yielding iterator back to the queue.
+            queue.append(current_iterator)
+
+            state = self._iteration_state(iteration_count=len(end_offset_stack) + 1, end_offset=iteration_end_offset)
+            if state in visited_states:
+                continue
+            visited_states.add(state)
+
+            end_offset_stack.append(iteration_end_offset)
+
+            if len(end_offset_stack) == self.max_value or iteration_end_offset == len(source):
+                if iteration_end_offset not in yielded_end_offsets:
+                    yielded_end_offsets.add(iteration_end_offset)
+                    yield iteration_end_offset
+                end_offset_stack.pop()
+            else:
+                queue.append(self.node._recognize(source=source, offset=iteration_end_offset, context=context))
+
+        if self.min_value == 0 and offset not in yielded_end_offsets:
+            yield offset
+
 
 class OptionNode(RepetitionNode):
     def __init__(self, node: EvaluationNode):
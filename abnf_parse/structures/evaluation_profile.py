@@ -0,0 +1,204 @@
+from __future__ import annotations
+from typing import Iterator, TYPE_CHECKING
+from time import perf_counter_ns
+
+from abnf_parse.structures.match_node import MatchNode
+
+if TYPE_CHECKING:
+    from abnf_parse.structures.evaluation_node import EvaluationNode
+    from abnf_parse.structures.evaluation_context import EvaluationContext
+
+
+class RuleStatistics:
+    """
+    The counters of a named rule in an `EvaluationProfile`.
+    """
+
+    __slots__ = (
+        'invocation_count',
+        'match_count',
+        'backtrack_count',
+        'consumed_byte_count',
+        'total_time_ns',
+        '_active_count'
+    )
+
+    def __init__(self):
+        # The number of times the rule was evaluated at an offset.
+        self.invocation_count = 0
+        # The number of matches that the evaluations of the rule produced.
+        self.match_count = 0
+        # The number of times an evaluation of the rule was resumed for another match after producing one, because
+        # what followed the match did not match.
+        self.backtrack_count = 0
+        # The total length of the matches that the evaluations of the rule produced.
+        self.consumed_byte_count = 0
+        # The time spent evaluating the rule, including the rules that it references, in nanoseconds. The time of an
+        # evaluation of the rule nested within another evaluation of it is counted once.
+        self.total_time_ns = 0
+
+        # The number of evaluations of the rule currently producing a match, to count nested evaluations' time once.
+        self._active_count = 0
+
+    def merge(self, other: RuleStatistics) -> None:
+        self.invocation_count += other.invocation_count
+        self.match_count += other.match_count
+        self.backtrack_count += other.backtrack_count
+        self.consumed_byte_count += other.consumed_byte_count
+        self.total_time_ns += other.total_time_ns
+
+
+class EvaluationProfile:
+    """
+    Counters of the evaluations of named rules, recorded when provided to `EvaluationNode.evaluate`.
+
+    For each rule, the number of evaluations at an offset, the number of matches produced, the number of times an
+    evaluation was resumed for another match (backtracks), the number of bytes matched and the time spent are recorded.
+    A profile may be provided to several evaluations, or the profiles of several evaluations may be merged, to
+    accumulate the counters. A profile is not to be shared by evaluations running concurrently in several threads;
+    give each thread its own profile and merge them instead.
+
+    Only the rules evaluated node by node are recorded: a rule evaluated with an `re` pattern, see
+    `Ruleset.lower_regular_rules`, is recorded as a whole, without the rules that it references, and nodes that are
+    skipped by their match guards are not recorded.
+    """
+
+    def __init__(self):
+        self.rule_statistics: dict[str, RuleStatistics] = {}
+
+    def statistics(self, rule_name: str) -> RuleStatistics:
+        """
+        Return the counters of a rule, creating them if needed.
+
+        :param rule_name: The name of the rule.
+        :return: The counters of the rule.
+        """
+
+        if (rule_statistics := self.rule_statistics.get(rule_name)) is None:
+            rule_statistics = RuleStatistics()
+            self.rule_statistics[rule_name] = rule_statistics
+
+        return rule_statistics
+
+    def merge(self, other: EvaluationProfile) -> EvaluationProfile:
+        """
+        Add the counters of another profile to those of this profile.
+
+        :param other: The profile whose counters to add.
+        :return: This profile.
+        """
+
+        for rule_name, rule_statistics in other.rule_statistics.items():
+            self.statistics(rule_name=rule_name).merge(other=rule_statistics)
+
+        return self
+
+    def iter_matches(
+        self,
+        node: EvaluationNode,
+        source: memoryview,
+        offset: int,
+        context: EvaluationContext
+    ) -> Iterator[MatchNode]:
+        """
+        Yield the matches of a named rule at an offset, recording the evaluation in the counters of the rule.
+
+        The rule is evaluated via the packrat cache of the context if it has one.
+
+        :param node: The node of the rule to be evaluated.
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to evaluate the node.
+        :param context: The context of the evaluation.
+        :return: An iterator yielding the matches of the node at the offset.
+        """
+
+        rule_statistics = self.statistics(rule_name=node.name)
+        rule_statistics.invocation_count += 1
+
+        if context.packrat_cache is not None:
+            match_nodes = context.packrat_cache.iter_matches(node=node, source=source, offset=offset, context=context)
+        else:
+            match_nodes = node._evaluate(source=source, offset=offset, context=context)
+
+        return self._iter_recorded_matches(rule_statistics=rule_statistics, match_nodes=match_nodes)
+
+    @staticmethod
+    def _iter_recorded_matches(
+        rule_statistics: RuleStatistics,
+        match_nodes: Iterator[MatchNode]
+    ) -> Iterator[MatchNode]:
+        while True:
+            rule_statistics._active_count += 1
+            start_time_ns = perf_counter_ns()
+            try:
+                match_node = next(match_nodes, None)
+            finally:
+                rule_statistics._active_count -= 1
+                if rule_statistics._active_count == 0:
+                    rule_statistics.total_time_ns += perf_counter_ns() - start_time_ns
+
+            if match_node is None:
+                return
+
+            rule_statistics.match_count += 1
+            rule_statistics.consumed_byte_count += match_node.end_offset - match_node.start_offset
+
+            yield match_node
+
+            rule_statistics.backtrack_count += 1
+
+    def record(self, rule_name: str, match_node: MatchNode | None, time_ns: int) -> None:
+        """
+        Record an evaluation of a rule as a whole, such as with an `re` pattern.
+
+        :param rule_name: The name of the rule.
+        :param match_node: The match produced by the evaluation, if any.
+        :param time_ns: The duration of the evaluation, in nanoseconds.
+        """
+
+        rule_statistics = self.statistics(rule_name=rule_name)
+        rule_statistics.invocation_count += 1
+        rule_statistics.total_time_ns += time_ns
+
+        if match_node is not None:
+            rule_statistics.match_count += 1
+            rule_statistics.consumed_byte_count += match_node.end_offset - match_node.start_offset
+
+    def format_table(self, sort_by: str = 'total_time_ns', limit: int | None = None) -> str:
+        """
+        Format the counters as a table with a row per rule, in descending order of a counter.
+
+        :param sort_by: The name of the counter by which to sort the rules, e.g. `total_time_ns` or `backtrack_count`.
+        :param limit: The maximum number of rules to include.
+        :return: The table.
+        """
+
+        if sort_by not in RuleStatistics.__slots__ or sort_by.startswith('_'):
+            raise ValueError(f'Unknown counter: {sort_by}')
+
+        rows = sorted(
+            self.rule_statistics.items(),
+            key=lambda item: getattr(item[1], sort_by),
+            reverse=True
+        )[:limit]
+
+        name_width = max((len(rule_name) for rule_name, _ in rows), default=0)
+        name_width = max(name_width, len('rule'))
+
+        lines = [
+            f'{"rule":<{name_width}} {"calls":>10} {"matches":>10} {"backtracks":>10} {"bytes":>10}'
+            f' {"total ms":>10} {"µs/call":>10}'
+        ]
+
+        for rule_name, rule_statistics in rows:
+            lines.append(
+                f'{rule_name:<{name_width}} {rule_statistics.invocation_count:>10} {rule_statistics.match_count:>10}'
+                f' {rule_statistics.backtrack_count:>10} {rule_statistics.consumed_byte_count:>10}'
+                f' {rule_statistics.total_time_ns / 1e6:>10.3f}'
+                f' {rule_statistics.total_time_ns / 1e3 / max(rule_statistics.invocation_count, 1):>10.2f}'
+            )
+
+        return '\n'.join(lines)
+
+    def __str__(self) -> str:
+        return self.format_table()
@@ -0,0 +1,339 @@
+from __future__ import annotations
+from array import array
+from collections import Counter
+from enum import IntEnum
+from struct import Struct
+from sys import byteorder
+from typing import Iterable, Iterator, NamedTuple, TYPE_CHECKING
+
+from abnf_parse.structures.match_node import MatchNode
+
+if TYPE_CHECKING:
+    from abnf_parse.structures.evaluation_node import EvaluationNode
+    from abnf_parse.structures.evaluation_context import EvaluationContext
+
+
+class TraceEventKind(IntEnum):
+    # The evaluation of a node at an offset started. The offset is that at which the node is evaluated.
+    ENTER = 0
+    # The evaluation produced a match. The offset is the end offset of the match.
+    YIELD = 1
+    # The evaluation was resumed for another match, because what followed the previous match did not match. The offset
+    # is the end offset of the previous match.
+    BACKTRACK = 2
+    # The evaluation ended, because it produced no more matches, it was abandoned, or an exception was raised. The
+    # offset is that at which the node is evaluated.
+    EXIT = 3
+
+
+class TraceEvent(NamedTuple):
+    kind: TraceEventKind
+    # The names of the rules, and the renderings of the anonymous nodes if they are traced, from the outermost traced
+    # node to the node of the event.
+    path: tuple[str, ...]
+    offset: int
+
+
+# The header of a binary log: a magic number, a format version, the number of paths and the number of events.
+_BINARY_LOG_HEADER = Struct('<8sBIQ')
+_BINARY_LOG_MAGIC = b'ABNFTRCE'
+_BINARY_LOG_VERSION = 1
+# A path entry of a binary log: the index of the parent path, or -1, and the length of the UTF-8 encoded label.
+_BINARY_LOG_PATH = Struct('<iH')
+
+
+def _sanitize_label(label: str) -> str:
+    """
+    Escape the characters of a label that cannot appear in a frame of a folded stack: separators and unprintable
+    characters.
+    """
+
+    return ''.join(
+        character if character.isprintable() and character != ';' else f'%x{ord(character):02X}'
+        for character in label
+    )
+
+
+class EvaluationTracer:
+    """
+    A log of the evaluations of named rules, recorded when provided to `EvaluationNode.evaluate`, from which can be
+    seen where in a grammar the backtracking engine spends its effort on an input.
+
+    For each evaluation of a node at an offset, an `ENTER` event is recorded when it starts, a `YIELD` event for each
+    match it produces, a `BACKTRACK` event each time it is resumed for another match, and an `EXIT` event when it ends,
+    also when it ends because an exception, such as `BacktrackingLimitReachedError`, was raised. Each event has the
+    path of the node: the rules, from the outermost one, whose evaluations the evaluation of the node is nested in.
+
+    The events can be exported to the folded-stack format read by flame graph tools, see `format_folded_stacks`, or to
+    a compact binary log, see `to_binary_log` and `from_binary_log`. A tracer may be provided to several evaluations,
+    whose events are then appended, but is not to be shared by evaluations running concurrently in several threads.
+
+    Only the nodes evaluated node by node are traced: a rule evaluated with an `re` pattern, see
+    `Ruleset.lower_regular_rules`, is traced as a whole, without the rules that it references, nodes that are skipped
+    by their match guards are not traced, and the matches of a rule replayed from the packrat cache are traced without
+    the rules that it references.
+    """
+
+    def __init__(self, anonymous_nodes: bool = False, max_event_count: int | None = None):
+        """
+        :param anonymous_nodes: Whether to also trace the evaluations of the alternations, concatenations, repetitions
+            and other nodes that are not named rules, which then appear in paths as ABNF-like renderings. This shows
+            which part of a rule is costly, at the cost of many more events.
+        :param max_event_count: The maximum number of events to be recorded, beyond which events are counted in
+            `dropped_event_count` but not recorded, or `None` for no maximum.
+        """
+
+        self.anonymous_nodes = anonymous_nodes
+        self.max_event_count = max_event_count
+        self.dropped_event_count = 0
+
+        # For each path, the index of its parent path, or -1, and its last label.
+        self._path_parents = array('i')
+        self._path_labels: list[str] = []
+        # The indices of the paths by the index of their parent path and the identity of their node. The nodes are
+        # kept so that their identities are not reused.
+        self._path_indices: dict[tuple[int, int], int] = {}
+        self._path_nodes: list[EvaluationNode] = []
+
+        self._event_kinds = array('B')
+        self._event_paths = array('I')
+        self._event_offsets = array('Q')
+
+        # The paths of the evaluations currently running, from the outermost one.
+        self._path_stack: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._event_kinds)
+
+    def _path_index(self, node: EvaluationNode) -> int:
+        parent_path_index = self._path_stack[-1] if self._path_stack else -1
+
+        if (path_index := self._path_indices.get((parent_path_index, id(node)))) is None:
+            if node.name != node.__class__.__name__:
+                label = node.name
+            else:
+                from abnf_parse.hazards import _describe
+                label = _sanitize_label(label=_describe(node=node))
+
+            path_index = len(self._path_labels)
+            self._path_parents.append(parent_path_index)
+            self._path_labels.append(label)
+            self._path_nodes.append(node)
+            self._path_indices[(parent_path_index, id(node))] = path_index
+
+        return path_index
+
+    def _record(self, kind: TraceEventKind, path_index: int, offset: int) -> None:
+        if self.max_event_count is not None and len(self._event_kinds) >= self.max_event_count:
+            self.dropped_event_count += 1
+            return
+
+        self._event_kinds.append(kind)
+        self._event_paths.append(path_index)
+        self._event_offsets.append(offset)
+
+    def iter_matches(
+        self,
+        node: EvaluationNode,
+        source: memoryview,
+        offset: int,
+        context: EvaluationContext
+    ) -> Iterator[MatchNode]:
+        """
+        Yield the matches of a node at an offset, recording the events of the evaluation.
+
+        A named rule is evaluated via the profile and the packrat cache of the context if it has them.
+
+        :param node: The node to be evaluated.
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to evaluate the node.
+        :param context: The context of the evaluation.
+        :return: An iterator yielding the matches of the node at the offset.
+        """
+
+        if node.name == node.__class__.__name__:
+            match_nodes = node._evaluate(source=source, offset=offset, context=context)
+        elif context.profile is not None:
+            match_nodes = context.profile.iter_matches(node=node, source=source, offset=offset, context=context)
+        elif context.packrat_cache is not None:
+            match_nodes = context.packrat_cache.iter_matches(node=node, source=source, offset=offset, context=context)
+        else:
+            match_nodes = node._evaluate(source=source, offset=offset, context=context)
+
+        return self._iter_traced_matches(node=node, offset=offset, match_nodes=match_nodes)
+
+    def _iter_traced_matches(
+        self,
+        node: EvaluationNode,
+        offset: int,
+        match_nodes: Iterator[MatchNode]
+    ) -> Iterator[MatchNode]:
+        # The path is determined when the evaluation starts, within the evaluation of its parent.
+        path_index = self._path_index(node=node)
+        self._record(kind=TraceEventKind.ENTER, path_index=path_index, offset=offset)
+
+        try:
+            while True:
+                self._path_stack.append(path_index)
+                try:
+                    match_node = next(match_nodes, None)
+                finally:
+                    self._path_stack.pop()
+
+                if match_node is None:
+                    return
+
+                self._record(kind=TraceEventKind.YIELD, path_index=path_index, offset=match_node.end_offset)
+                yield match_node
+                self._record(kind=TraceEventKind.BACKTRACK, path_index=path_index, offset=match_node.end_offset)
+        finally:
+            self._record(kind=TraceEventKind.EXIT, path_index=path_index, offset=offset)
+
+    def record(self, node: EvaluationNode, offset: int, match_node: MatchNode | None) -> None:
+        """
+        Record an evaluation of a node as a whole, such as with an `re` pattern.
+
+        :param node: The node that was evaluated.
+        :param offset: The offset at which the node was evaluated.
+        :param match_node: The match produced by the evaluation, if any.
+        """
+
+        path_index = self._path_index(node=node)
+
+        self._record(kind=TraceEventKind.ENTER, path_index=path_index, offset=offset)
+        if match_node is not None:
+            self._record(kind=TraceEventKind.YIELD, path_index=path_index, offset=match_node.end_offset)
+        self._record(kind=TraceEventKind.EXIT, path_index=path_index, offset=offset)
+
+    def path(self, path_index: int) -> tuple[str, ...]:
+        """
+        Return the labels of a path, from the outermost node.
+
+        :param path_index: The index of the path.
+        :return: The labels of the path.
+        """
+
+        labels: list[str] = []
+        while path_index != -1:
+            labels.append(self._path_labels[path_index])
+            path_index = self._path_parents[path_index]
+
+        return tuple(reversed(labels))
+
+    def events(self) -> Iterator[TraceEvent]:
+        """
+        Yield the recorded events, in the order in which they occurred.
+
+        :return: An iterator yielding the events.
+        """
+
+        paths: dict[int, tuple[str, ...]] = {}
+
+        for kind, path_index, offset in zip(self._event_kinds, self._event_paths, self._event_offsets):
+            if (path := paths.get(path_index)) is None:
+                path = self.path(path_index=path_index)
+                paths[path_index] = path
+
+            yield TraceEvent(kind=TraceEventKind(kind), path=path, offset=offset)
+
+    def format_folded_stacks(
+        self,
+        kinds: Iterable[TraceEventKind] = (TraceEventKind.ENTER, TraceEventKind.BACKTRACK)
+    ) -> str:
+        """
+        Format the events in the folded-stack format, as read by `flamegraph.pl` and compatible tools: a line per path,
+        with its labels separated by semicolons, followed by the number of events of the path.
+
+        By default, the evaluations that were started and resumed are counted, so that the width of a frame in a flame
+        graph is proportional to the work spent on the node and the nodes nested in it.
+
+        :param kinds: The kinds of events to be counted.
+        :return: The folded stacks, a line per path with at least one event.
+        """
+
+        kinds = frozenset(kinds)
+
+        event_counts = Counter(
+            path_index
+            for kind, path_index in zip(self._event_kinds, self._event_paths)
+            if kind in kinds
+        )
+
+        return '\n'.join(
+            f'{";".join(self.path(path_index=path_index))} {event_count}'
+            for path_index, event_count in sorted(event_counts.items())
+        )
+
+    def to_binary_log(self) -> bytes:
+        """
+        Encode the events as a compact binary log: a header, the table of paths, each as the index of its parent path
+        and its last label, and the kinds, path indices and offsets of the events, as arrays of 1, 4 and 8 byte
+        little-endian integers.
+
+        :return: The binary log.
+        """
+
+        def little_endian(values: array) -> bytes:
+            if byteorder == 'big':
+                values = array(values.typecode, values)
+                values.byteswap()
+            return values.tobytes()
+
+        parts = [
+            _BINARY_LOG_HEADER.pack(
+                _BINARY_LOG_MAGIC,
+                _BINARY_LOG_VERSION,
+                len(self._path_labels),
+                len(self._event_kinds)
+            )
+        ]
+
+        for parent_path_index, label in zip(self._path_parents, self._path_labels):
+            encoded_label = label.encode(encoding='utf-8')
+            parts.append(_BINARY_LOG_PATH.pack(parent_path_index, len(encoded_label)))
+            parts.append(encoded_label)
+
+        parts.append(self._event_kinds.tobytes())
+        parts.append(little_endian(values=self._event_paths))
+        parts.append(little_endian(values=self._event_offsets))
+
+        return b''.join(parts)
+
+    @classmethod
+    def from_binary_log(cls, data: bytes | memoryview) -> EvaluationTracer:
+        """
+        Decode a binary log produced by `to_binary_log`.
+
+        :param data: The binary log.
+        :return: A tracer with the paths and events of the log.
+        """
+
+        data = memoryview(data)
+
+        magic, version, path_count, event_count = _BINARY_LOG_HEADER.unpack_from(data)
+        if magic != _BINARY_LOG_MAGIC:
+            raise ValueError('The data is not a binary trace log.')
+        if version != _BINARY_LOG_VERSION:
+            raise ValueError(f'Unsupported binary trace log version: {version}')
+
+        tracer = cls()
+        position = _BINARY_LOG_HEADER.size
+
+        for _ in range(path_count):
+            parent_path_index, label_length = _BINARY_LOG_PATH.unpack_from(data, position)
+            position += _BINARY_LOG_PATH.size
+            tracer._path_parents.append(parent_path_index)
+            tracer._path_labels.append(bytes(data[position:position + label_length]).decode(encoding='utf-8'))
+            position += label_length
+
+        for values in (tracer._event_kinds, tracer._event_paths, tracer._event_offsets):
+            end_position = position + event_count * values.itemsize
+            if end_position > len(data):
+                raise ValueError('The binary trace log is truncated.')
+
+            values.frombytes(data[position:end_position])
+            if byteorder == 'big' and values.itemsize > 1:
+                values.byteswap()
+            position = end_position
+
+        return tracer
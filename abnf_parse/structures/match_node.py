@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Iterator
+from typing import Iterator, Callable
 from collections.abc import Container
 from functools import cached_property
 from collections import deque
@@ -14,6 +14,36 @@ class MatchNode:
     source: memoryview
     children: list[MatchNode] = field(default_factory=list)
 
+    @classmethod
+    def _new(
+        cls,
+        name: str,
+        start_offset: int,
+        end_offset: int,
+        source: memoryview,
+        children: list[MatchNode]
+    ) -> MatchNode:
+        """
+        Create a match node without going through the `__init__` of the frozen dataclass, which is comparatively slow.
+
+        :param name: The name of the match.
+        :param start_offset: The start offset of the match.
+        :param end_offset: The end offset of the match.
+        :param source: The input that was evaluated.
+        :param children: The children of the match.
+        :return: The resulting match node.
+        """
+
+        match_node = object.__new__(cls)
+        match_node_dict = match_node.__dict__
+        match_node_dict['name'] = name
+        match_node_dict['start_offset'] = start_offset
+        match_node_dict['end_offset'] = end_offset
+        match_node_dict['source'] = source
+        match_node_dict['children'] = children
+
+        return match_node
+
     @cached_property
     def _get_field_map(self):
         """
@@ -116,3 +146,60 @@ class MatchNode:
 
     def __bytes__(self) -> bytes:
         return self.get_value()
+
+    def __eq__(self, other: object) -> bool:
+        # Unlike the generated method, which requires the same class, a match whose children are created lazily is
+        # equal to the same match created eagerly.
+        if not isinstance(other, MatchNode):
+            return NotImplemented
+
+        return (
+            (self.name, self.start_offset, self.end_offset, self.source, self.children)
+            == (other.name, other.start_offset, other.end_offset, other.source, other.children)
+        )
+
+
+class LazyMatchNode(MatchNode):
+    """
+    A match node whose children are created only when they are first accessed.
+
+    Instead of its children, the node holds a recipe for creating them: a function and the arguments with which to call
+    it. As the arguments are typically other matches, which may themselves be lazy, creating a match during the
+    evaluation costs the same regardless of how many children it will have, and nothing more is spent on matches that
+    are discarded when backtracking.
+    """
+
+    @classmethod
+    def _new(
+        cls,
+        name: str,
+        start_offset: int,
+        end_offset: int,
+        source: memoryview,
+        children_recipe: tuple[Callable[..., list[MatchNode]], tuple]
+    ) -> LazyMatchNode:
+        """
+        Create a lazy match node.
+
+        :param name: The name of the match.
+        :param start_offset: The start offset of the match.
+        :param end_offset: The end offset of the match.
+        :param source: The input that was evaluated.
+        :param children_recipe: A function returning the children of the match, and the arguments to call it with.
+        :return: The resulting match node.
+        """
+
+        match_node = object.__new__(cls)
+        match_node_dict = match_node.__dict__
+        match_node_dict['name'] = name
+        match_node_dict['start_offset'] = start_offset
+        match_node_dict['end_offset'] = end_offset
+        match_node_dict['source'] = source
+        match_node_dict['_children_recipe'] = children_recipe
+
+        return match_node
+
+    @cached_property
+    def children(self) -> list[MatchNode]:
+        function, arguments = self.__dict__.pop('_children_recipe')
+        return function(*arguments)
@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import Iterator, TYPE_CHECKING
+from collections import OrderedDict
+
+from abnf_parse.structures.match_node import MatchNode
+
+if TYPE_CHECKING:
+    from abnf_parse.structures.evaluation_node import EvaluationNode
+    from abnf_parse.structures.evaluation_context import EvaluationContext
+
+
+class _PackratEntry:
+    """
+    The matches produced so far by a node at an offset, and the iterator producing the remaining ones.
+    """
+
+    __slots__ = ('matches', 'end_offsets', 'iterator')
+
+    def __init__(self, iterator: Iterator[MatchNode]):
+        self.matches: list[MatchNode] = []
+        self.end_offsets: set[int] = set()
+        self.iterator: Iterator[MatchNode] | None = iterator
+
+
+class PackratCache:
+    """
+    A bounded cache of the matches of named rules per offset, used for the duration of one evaluation.
+
+    The matches of a rule at an offset are produced lazily, in the same order as without the cache, and are shared
+    between all evaluations of the rule at that offset. Only the first match for each end offset is kept: what follows
+    a match depends only on where it ends, so a later match with the same end offset cannot lead to a different
+    outcome. When the number of entries exceeds the maximum size, the least recently used entries are evicted;
+    evaluations already iterating an evicted entry are unaffected.
+    """
+
+    def __init__(self, max_size: int):
+        if max_size < 1:
+            raise ValueError(f'The maximum size must be positive: {max_size}')
+
+        self.max_size = max_size
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+
+        self._entries: OrderedDict[tuple[EvaluationNode, int], _PackratEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def iter_matches(
+        self,
+        node: EvaluationNode,
+        source: memoryview,
+        offset: int,
+        context: EvaluationContext
+    ) -> Iterator[MatchNode]:
+        """
+        Yield the matches of a node at an offset, evaluating the node only for matches not already in the cache.
+
+        :param node: The node to be evaluated.
+        :param source: The input to be evaluated.
+        :param offset: The offset at which to evaluate the node.
+        :param context: The context of the evaluation, with which to evaluate the node.
+        :return: An iterator yielding the matches of the node at the offset.
+        """
+
+        key = (node, offset)
+
+        entry: _PackratEntry | None = self._entries.get(key)
+        if entry is None:
+            self.miss_count += 1
+            entry = _PackratEntry(iterator=node._evaluate(source=source, offset=offset, context=context))
+            self._entries[key] = entry
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.eviction_count += 1
+        else:
+            self.hit_count += 1
+            self._entries.move_to_end(key)
+
+        index = 0
+        while True:
+            if index < len(entry.matches):
+                yield entry.matches[index]
+                index += 1
+                continue
+
+            if entry.iterator is None:
+                return
+
+            match_node: MatchNode | None = next(entry.iterator, None)
+            if match_node is None:
+                entry.iterator = None
+                return
+
+            if match_node.end_offset not in entry.end_offsets:
+                entry.end_offsets.add(match_node.end_offset)
+                entry.matches.append(match_node)
@@ -1,23 +1,54 @@
 from __future__ import annotations
-from typing import Iterator, ByteString
+from typing import Iterable, Iterator, ByteString, Sequence, TYPE_CHECKING
 from functools import cached_property, partial
 from collections import ChainMap, UserDict
 from copy import copy
+from itertools import count
+from mmap import mmap
+from re import compile as re_compile
 
 from abnf_parse.structures.evaluation_node import EvaluationNode, AlternationNode, RangedLiteralNode, LiteralNode, \
     ConcatenationNode, RepetitionNode, OptionNode
 from abnf_parse.structures.match_node import MatchNode
-from abnf_parse.exceptions import RuleNotFoundError
+from abnf_parse.structures.evaluation_context import Engine
+from abnf_parse.exceptions import RuleNotFoundError, NoMatchError
+
+if TYPE_CHECKING:
+    from abnf_parse.batch import BatchResult
+    from abnf_parse.compilation import CompiledNode
+    from abnf_parse.hazards import Hazard
+    from abnf_parse.structures.evaluation_profile import EvaluationProfile
+    from abnf_parse.structures.evaluation_trace import EvaluationTracer
+
+_RULENAME_PATTERN = re_compile(rb'[A-Za-z][A-Za-z0-9-]*')
+
+# Orders the rule definitions recorded in lazily updated rulesets by their position in the sources.
+_definition_counter = count()
 
 
 class Ruleset(UserDict):
     CORE_RULESET: Ruleset | None = None
 
+    def __init__(self, *args, **kwargs):
+        # The definitions of rules that have been read from source data but not yet built.
+        self._pending_rules: dict[str, bytes] = {}
+        # The positions in the sources of the rules whose definitions have been read lazily.
+        self._rule_positions: dict[str, int] = {}
+        # The rules being built whose nodes are to be populated once the rules they reference have been built.
+        self._unpopulated_rules: list[tuple[AlternationNode, MatchNode]] | None = None
+        # Whether the nodes of the rules have been canonicalized, in which case they are again once unpickled.
+        self._canonicalized = False
+
+        super().__init__(*args, **kwargs)
+
     @cached_property
     def _retrieve_map(self):
         return ChainMap(self.data, self.CORE_RULESET or {})
 
     def __setitem__(self, rule_name: str, rule: EvaluationNode):
+        # A rule that is set replaces a recorded definition of the rule.
+        self._pending_rules.pop(rule_name, None)
+
         # `rule` could be a reference to an already-named rule. In that case, that rule's node should not have its name
         # changed. Instead, a shallow copy is created that is assigned the new name.
         #
@@ -32,10 +63,109 @@ class Ruleset(UserDict):
         super().__setitem__(rule_name, rule)
 
     def __getitem__(self, item: str) -> EvaluationNode:
+        if item in self._pending_rules:
+            self._build_pending_rule(rule_name=item)
+
         # If the rule cannot be found in the current ruleset, a lookup will be performed in the core ruleset.
         return self._retrieve_map.__getitem__(item)
 
-    def update_from_source(self, source: ByteString | memoryview) -> Ruleset | None:
+    def __contains__(self, item: object) -> bool:
+        return item in self.data or item in self._pending_rules
+
+    def __iter__(self) -> Iterator[str]:
+        self._build_pending_rules()
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data) + len(self._pending_rules)
+
+    def __copy__(self):
+        self._build_pending_rules()
+
+        ruleset = super().__copy__()
+        ruleset._pending_rules = {}
+        ruleset._rule_positions = dict(self._rule_positions)
+
+        return ruleset
+
+    def __getstate__(self):
+        # The recorded rule definitions are built, so that the pickled ruleset is complete.
+        self._build_pending_rules()
+
+        # The lookup map refers to the core ruleset, which is not to be pickled along with the ruleset.
+        state = self.__dict__.copy()
+        state.pop('_retrieve_map', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        # The unpickled nodes are copies, which are to be shared with the rulesets already loaded in the process.
+        if state.get('_canonicalized', False):
+            self.canonicalize()
+
+    def _build_pending_rule(self, rule_name: str) -> None:
+        """
+        Build a rule whose definition has been recorded, and the rules that it references.
+
+        A rule referencing rules that are defined later in the source, or that are not defined, is built as an "empty"
+        rule that is populated once the rules have been built, like in `update_from_source`, so that a rule yields the
+        same nodes regardless of whether it is built lazily.
+
+        :param rule_name: The name of the rule to be built.
+        """
+
+        from abnf_parse.rulesets import ABNF_RULESET
+
+        rule_source = self._pending_rules.pop(rule_name)
+        position = self._rule_positions[rule_name]
+
+        rule_node: MatchNode = ABNF_RULESET['rule'].evaluate(source=rule_source)
+        alternation = rule_node.get_field(name='elements').get_field(name='alternation')
+
+        is_outermost = self._unpopulated_rules is None
+        if is_outermost:
+            self._unpopulated_rules = []
+
+        try:
+            rule: EvaluationNode
+            if any(
+                self._rule_positions.get(referenced_name, -1) > position
+                or (referenced_name not in self._pending_rules and referenced_name not in self._retrieve_map)
+                for referenced_name in (
+                    rulename_node.get_value().decode()
+                    for rulename_node in alternation.search(name='rulename')
+                )
+            ):
+                rule = AlternationNode()
+                self._unpopulated_rules.append((rule, alternation))
+            else:
+                rule = _node_from_alternation(alternation=alternation, ruleset=self)
+
+            self[rule_name] = rule
+
+            if is_outermost:
+                # Populating a rule may build further rules, which may in turn need to be populated.
+                while self._unpopulated_rules:
+                    alternation_node, match_node = self._unpopulated_rules.pop(0)
+                    alternation_node.nodes = _node_from_alternation(
+                        alternation=match_node,
+                        ruleset=self,
+                        return_list=True
+                    )
+        finally:
+            if is_outermost:
+                self._unpopulated_rules = None
+
+    def _build_pending_rules(self) -> None:
+        """
+        Build all the rules whose definitions have been recorded.
+        """
+
+        while self._pending_rules:
+            self._build_pending_rule(rule_name=next(iter(self._pending_rules)))
+
+    def update_from_source(self, source: ByteString | memoryview, lazy: bool = False) -> Ruleset | None:
         """
         Read ABNF rules from source data and update an existing ruleset.
 
@@ -43,10 +173,25 @@ class Ruleset(UserDict):
         by other rules. The "empty" rules are then attempted to be re-defined (i.e. populated) when all other rules in
         the set have been iterated. This enables rule sets where a rule is defined in terms of itself and out of order.
 
+        With `lazy`, the definitions of the rules are only recorded, and a rule, and the rules that it references, are
+        parsed and built when the rule is first retrieved from the ruleset, which makes reading a large source of which
+        few rules are used cheap. The built rules are the same, but an error in the definition of a rule, or a
+        reference to a rule that is not defined, is only reported when the rule is built. Operations on all the rules
+        of the ruleset, such as iterating over it or `optimize`, build all of them.
+
         :param source: Source data from which to read ABNF rules.
+        :param lazy: Whether to build the rules only when they are first retrieved.
         :return: The provided ruleset if the source could be parsed, otherwise `None`.
         """
 
+        if lazy:
+            for rule_name, rule_source in _split_rule_definitions(source=bytes(source)):
+                self.data.pop(rule_name, None)
+                self._pending_rules[rule_name] = rule_source
+                self._rule_positions[rule_name] = next(_definition_counter)
+
+            return self
+
         from abnf_parse.rulesets import ABNF_RULESET
 
         match_node: MatchNode | None = ABNF_RULESET['rulelist'].evaluate(source=source)
@@ -81,8 +226,344 @@ class Ruleset(UserDict):
         return self
 
     @classmethod
-    def from_source(cls, source: ByteString | memoryview) -> Ruleset | None:
-        return cls().update_from_source(source=source)
+    def from_source(cls, source: ByteString | memoryview, lazy: bool = False) -> Ruleset | None:
+        return cls().update_from_source(source=source, lazy=lazy)
+
+    def fullmatch(
+        self,
+        source: ByteString | memoryview | str,
+        rule_name: str,
+        offset: int = 0,
+        backtracking_limit: int | bool | None = True,
+        packrat: int | bool | None = False,
+        lazy: bool = False,
+        engine: Engine | None = None,
+        profile: EvaluationProfile | None = None,
+        tracer: EvaluationTracer | None = None
+    ) -> MatchNode | None:
+        """
+        Evaluate the input from an offset to its end against a rule of the ruleset.
+
+        See `EvaluationNode.fullmatch`.
+
+        :param source: The input to be evaluated.
+        :param rule_name: The name of the rule to match the input against.
+        :param offset: The offset at which to start reading the input.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule.
+        :param packrat: Whether to cache the matches of named rules per offset for the duration of the evaluation.
+        :param lazy: Whether to create the children of matches only when they are first accessed.
+        :param engine: The engine with which to evaluate the input.
+        :param profile: A profile in which to record the evaluations of named rules.
+        :param tracer: A tracer in which to record the events of the evaluations of named rules.
+        :return: A `MatchNode` if the input matches, otherwise `None`.
+        """
+
+        return self[rule_name].fullmatch(
+            source=source,
+            offset=offset,
+            backtracking_limit=backtracking_limit,
+            packrat=packrat,
+            lazy=lazy,
+            engine=engine,
+            profile=profile,
+            tracer=tracer
+        )
+
+    def match_prefix(
+        self,
+        source: ByteString | memoryview | str,
+        rule_name: str,
+        offset: int = 0,
+        longest: bool = False,
+        backtracking_limit: int | bool | None = True,
+        packrat: int | bool | None = False,
+        lazy: bool = False
+    ) -> MatchNode | None:
+        """
+        Evaluate the input at an offset against a rule of the ruleset, accepting a match regardless of where it ends.
+
+        See `EvaluationNode.match_prefix`.
+
+        :param source: The input to be evaluated.
+        :param rule_name: The name of the rule to match the input against.
+        :param offset: The offset at which to start reading the input.
+        :param longest: Whether to return the longest match rather than the first one.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule.
+        :param packrat: Whether to cache the matches of named rules per offset for the duration of the evaluation.
+        :param lazy: Whether to create the children of matches only when they are first accessed.
+        :return: The first, or the longest, `MatchNode` starting at the offset, if there is one, otherwise `None`.
+        """
+
+        return self[rule_name].match_prefix(
+            source=source,
+            offset=offset,
+            longest=longest,
+            backtracking_limit=backtracking_limit,
+            packrat=packrat,
+            lazy=lazy
+        )
+
+    def finditer(
+        self,
+        source: ByteString | memoryview | mmap | str,
+        rule_name: str,
+        offset: int = 0,
+        longest: bool = False,
+        backtracking_limit: int | bool | None = True,
+        skip_limited_offsets: bool = False
+    ) -> Iterator[MatchNode]:
+        """
+        Find the non-overlapping matches of a rule of the ruleset in the input.
+
+        See `EvaluationNode.finditer`.
+
+        :param source: The input to be scanned, for example a memory-mapped file.
+        :param rule_name: The name of the rule whose matches to find.
+        :param offset: The offset from which to scan.
+        :param longest: Whether to use the longest match at an offset rather than the first one.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule, for
+            each offset at which a match is sought.
+        :param skip_limited_offsets: Whether to continue scanning past an offset at which the backtracking limit is
+            reached rather than raising `BacktrackingLimitReachedError`.
+        :return: An iterator yielding the matches.
+        """
+
+        return self[rule_name].finditer(
+            source=source,
+            offset=offset,
+            longest=longest,
+            backtracking_limit=backtracking_limit,
+            skip_limited_offsets=skip_limited_offsets
+        )
+
+    def matches(
+        self,
+        source: ByteString | memoryview | str,
+        rule_name: str,
+        offset: int = 0,
+        backtracking_limit: int | bool | None = True,
+        full_match: bool = True,
+        return_end_offset: bool = False,
+        engine: Engine | None = None
+    ) -> bool | int | None:
+        """
+        Evaluate if the input matches a rule of the ruleset, without building a parse tree.
+
+        See `EvaluationNode.matches`.
+
+        :param source: The input to be evaluated.
+        :param rule_name: The name of the rule to match the input against.
+        :param offset: The offset at which to start reading the input.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule.
+        :param full_match: Whether the match must extend to the end of the input.
+        :param return_end_offset: Whether to return the end offset of the match rather than a `bool`.
+        :param engine: The engine with which to evaluate the input.
+        :return: Whether the input matches, or the end offset of the match if `return_end_offset` is set.
+        """
+
+        return self[rule_name].matches(
+            source=source,
+            offset=offset,
+            backtracking_limit=backtracking_limit,
+            full_match=full_match,
+            return_end_offset=return_end_offset,
+            engine=engine
+        )
+
+    def evaluate_many(
+        self,
+        sources: Iterable[ByteString | memoryview | str],
+        rule_name: str,
+        workers: int | None = None,
+        chunksize: int = 256,
+        fields: Sequence[str] | None = None,
+        field_offsets: bool = False,
+        backtracking_limit: int | bool | None = True
+    ) -> Iterator[BatchResult]:
+        """
+        Evaluate many inputs against a rule of the ruleset in a pool of worker processes.
+
+        See `EvaluationNode.evaluate_many`.
+
+        :param sources: The inputs to be evaluated.
+        :param rule_name: The name of the rule to evaluate the inputs against.
+        :param workers: The number of worker processes. `None`: Use the number of CPUs.
+        :param chunksize: The number of inputs sent to a worker at a time.
+        :param fields: The names of rules whose matches to produce for each input.
+        :param field_offsets: Whether to produce the offsets of the matches of the fields rather than their values.
+        :param backtracking_limit: A limit for maximum number of backtracks that are allowed in a repetition rule.
+        :return: An iterator yielding whether each input matches, or, if `fields` is provided, the field matches of
+            each input, or the error raised when evaluating an input.
+        """
+
+        return self[rule_name].evaluate_many(
+            sources=sources,
+            workers=workers,
+            chunksize=chunksize,
+            fields=fields,
+            field_offsets=field_offsets,
+            backtracking_limit=backtracking_limit
+        )
+
+    def set_engine(self, engine: Engine) -> None:
+        """
+        Set the engine with which the rules of the ruleset are evaluated when no engine is specified.
+
+        Rules that are shared with other rulesets, such as rules imported from another ruleset under the same name,
+        are affected in those rulesets too.
+
+        :param engine: The engine to be used.
+        """
+
+        self._build_pending_rules()
+
+        for rule in self.data.values():
+            rule._engine = engine
+
+    def optimize(self) -> None:
+        """
+        Replace nodes of the ruleset's rules with nodes that evaluate faster and produce the same matches.
+
+        Alternations of single-byte alternatives, such as `ALPHA`, `HEXDIG` and `tchar`, are replaced with nodes that
+        look the byte up in a table, and other alternations of literals, such as `month`, with nodes that match all of
+        the literals in one pass over the input. Rules are replaced in the ruleset if needed; the nodes of the rules are
+        updated in place, which also affects other rulesets sharing them.
+        """
+
+        from abnf_parse.optimization import optimize
+
+        self._build_pending_rules()
+
+        replacements = optimize(nodes=self.data.values())
+
+        for rule_name, rule in self.data.items():
+            if (replacement := replacements.get(rule)) is not None:
+                # The replacement already has the name of the rule.
+                self.data[rule_name] = replacement
+
+    def canonicalize(self) -> None:
+        """
+        Share structurally identical unnamed nodes of the ruleset's rules, such as the many `"."` and `1*DIGIT`, with
+        each other and with the other canonicalized rulesets of the process, which reduces their memory use and gives
+        each distinct subtree one identity, for example in the caches of the grammar analysis and in compiled code.
+
+        Rulesets loaded from a pickle, such as those of the on-disk cache, are canonicalized again if they were
+        canonicalized when pickled. See `abnf_parse.canonicalization.canonicalize`.
+        """
+
+        from abnf_parse.canonicalization import canonicalize
+
+        self._build_pending_rules()
+
+        canonicalize(nodes=self.data.values())
+        self._canonicalized = True
+
+    def lower_regular_rules(self) -> list[str]:
+        """
+        Make the rules of the ruleset that do not recurse be evaluated with compiled `re` patterns.
+
+        When such a rule is evaluated, the input is matched in C by a single pattern, and the `MatchNode` tree, which is
+        the same as when evaluating the rule node by node, is built only if the input matches. Rules that recurse, and
+        rules referencing them, keep being evaluated node by node, as do rules whose repetitions are ambiguous, such as
+        `field-value` in RFC 9110, which `re` could take exponential time to match, without a backtracking limit.
+
+        :return: The names of the rules that were lowered.
+        """
+
+        from abnf_parse.regular import lower_regular_rules
+
+        self._build_pending_rules()
+
+        lowered_nodes = set(lower_regular_rules(nodes=self.data.values()))
+
+        return [rule_name for rule_name, rule in self.data.items() if rule in lowered_nodes]
+
+    def analyze(self) -> None:
+        """
+        Compute the bytes with which the matches of the nodes of the ruleset's rules can start, and their minimum
+        lengths, so that evaluating a node is skipped where it cannot match, so that deterministic alternations
+        evaluate only the alternative that can match, and so that repetitions of single bytes of a set match runs of
+        the bytes at once.
+
+        This should be done once the rules are complete and optimized, as the nodes must not be modified afterwards.
+        """
+
+        from abnf_parse.analysis import GrammarAnalyzer, add_match_guards, add_dispatch_tables, add_run_patterns
+
+        self._build_pending_rules()
+
+        analyzer = GrammarAnalyzer()
+        add_match_guards(nodes=self.data.values(), analyzer=analyzer)
+        add_dispatch_tables(nodes=self.data.values(), analyzer=analyzer)
+        add_run_patterns(nodes=self.data.values(), analyzer=analyzer)
+
+    def find_hazards(self, rule_names: Sequence[str] | None = None) -> list[Hazard]:
+        """
+        Find the patterns in the rules of the ruleset that can make their evaluation take exponential time or not
+        finish, such as left recursion and nested repetitions over the same bytes.
+
+        See `abnf_parse.hazards.HazardDetector`.
+
+        :param rule_names: The names of the rules to be inspected. Defaults to all of the rules of the ruleset.
+        :return: The hazards found.
+        """
+
+        from abnf_parse.hazards import find_hazards
+
+        return find_hazards(ruleset=self, rule_names=rule_names)
+
+    def compile(self, rule_name: str) -> CompiledNode:
+        """
+        Compile a rule into generated Python code specialized for its tree.
+
+        The compiled rule is evaluated like any other rule, and produces the same matches as the rule itself. The
+        generated code is available via its `source_code` attribute.
+
+        :param rule_name: The name of the rule to be compiled.
+        :return: An evaluation node that evaluates the rule with the generated code.
+        """
+
+        from abnf_parse.compilation import compile_node
+
+        return compile_node(node=self[rule_name])
+
+
+def _split_rule_definitions(source: bytes) -> Iterator[tuple[str, bytes]]:
+    """
+    Split ABNF source data into the definitions of its rules, without parsing them.
+
+    A rule name starts in the first column of a line, and the continuation lines of a rule start with whitespace. Lines
+    that are empty or that start with a comment separate rules.
+
+    :param source: Source data from which to read ABNF rules.
+    :return: An iterator yielding the name and source data of each rule.
+    """
+
+    rule_name: str | None = None
+    rule_start_offset = 0
+
+    offset = 0
+    while offset < len(source):
+        if (line_end_offset := source.find(b'\r\n', offset)) == -1:
+            line_end_offset = len(source)
+        else:
+            line_end_offset += 2
+
+        if source[offset] not in b' \t':
+            if rule_name is not None:
+                yield rule_name, source[rule_start_offset:offset]
+                rule_name = None
+
+            if rulename_match := _RULENAME_PATTERN.match(source, offset):
+                rule_name = rulename_match.group().decode()
+                rule_start_offset = offset
+            elif source[offset] not in b';\r':
+                raise NoMatchError(rule_name='rulelist', source=memoryview(source), offset=offset)
+
+        offset = line_end_offset
+
+    if rule_name is not None:
+        yield rule_name, source[rule_start_offset:]
 
 
 def _nodes_from_concatenation(concatenation: MatchNode, ruleset: Ruleset) -> Iterator[EvaluationNode]:
@@ -0,0 +1,141 @@
+from __future__ import annotations
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Sequence
+
+from benchmarks.corpora import BenchmarkCase, benchmark_cases, generated_cases
+from benchmarks.measurement import CaseResult, Comparison, check_case, measure_case, compare, save_results, \
+    load_results
+
+
+def _format_result(result: CaseResult) -> str:
+    return (
+        f'{result.name:<48} {result.throughput:>12,.0f} {result.byte_throughput / 1e6:>8.2f}'
+        f' {result.latency_p50:>10.1f} {result.latency_p90:>10.1f} {result.latency_p99:>10.1f}'
+        f' {result.peak_memory / 1024:>10.1f}'
+    )
+
+
+def _format_comparison(comparison: Comparison) -> str:
+    return (
+        f'{comparison.name:<48} {comparison.throughput_change:>+12.1%} {"":>8}'
+        f' {comparison.latency_p50_change:>+10.1%} {"":>10} {comparison.latency_p99_change:>+10.1%}'
+        f' {comparison.peak_memory_change:>+10.1%}{"  REGRESSED" if comparison.regressed else ""}'
+    )
+
+
+def _generated_rule_cases(rule_reference: str, seed: int) -> list[BenchmarkCase]:
+    from abnf_parse.hazards import _load_ruleset
+
+    ruleset_reference, _, rule_name = rule_reference.rpartition(':')
+    if not ruleset_reference:
+        raise ValueError(f'Not a `RULESET:rule` reference: {rule_reference}')
+
+    return generated_cases(
+        name=rule_name,
+        rule=_load_ruleset(path_or_reference=ruleset_reference)[rule_name],
+        seed=seed
+    )
+
+
+def main(arguments: Sequence[str] | None = None) -> int:
+    argument_parser = ArgumentParser(
+        prog='python -m benchmarks',
+        description=(
+            'Measure the throughput, latency percentiles and peak memory of evaluating rules of the bundled rulesets on'
+            ' positive and negative corpora, and of building rulesets from ABNF source. With --compare, the exit'
+            ' status is 1 if a case regressed compared to the baseline, otherwise 0.'
+        )
+    )
+    argument_parser.add_argument(
+        '--case',
+        action='append',
+        dest='case_patterns',
+        metavar='PATTERN',
+        help='Only run the cases whose names contain the pattern, e.g. rfc9112; repeatable.'
+    )
+    argument_parser.add_argument(
+        '--min-time',
+        type=float,
+        default=1.0,
+        help='The minimum number of seconds to spend measuring each case. Defaults to 1.'
+    )
+    argument_parser.add_argument(
+        '--rule',
+        action='append',
+        dest='rule_references',
+        metavar='RULESET:RULE',
+        help=(
+            'Also measure a rule on generated inputs that match and near misses, of several lengths; the ruleset is an'
+            ' ABNF file or a `module:attribute` reference, e.g. abnf_parse.rulesets.rfc5322:RFC5322_RULESET:comment;'
+            ' repeatable.'
+        )
+    )
+    argument_parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='The seed of the generated inputs. Defaults to 0.'
+    )
+    argument_parser.add_argument('--save', type=Path, metavar='PATH', help='Save the results to a JSON file.')
+    argument_parser.add_argument(
+        '--compare',
+        type=Path,
+        metavar='PATH',
+        help='Compare the results with a baseline saved with --save.'
+    )
+    argument_parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help=(
+            'The relative decrease in throughput, or increase in peak memory, above which a case is considered to have'
+            ' regressed. Defaults to 0.1.'
+        )
+    )
+
+    parsed_arguments = argument_parser.parse_args(args=arguments)
+
+    baseline = load_results(path=parsed_arguments.compare) if parsed_arguments.compare else None
+
+    cases = [
+        case
+        for case in [
+            *benchmark_cases(),
+            *(
+                generated_case
+                for rule_reference in parsed_arguments.rule_references or []
+                for generated_case in _generated_rule_cases(rule_reference=rule_reference, seed=parsed_arguments.seed)
+            )
+        ]
+        if not parsed_arguments.case_patterns or any(pattern in case.name for pattern in parsed_arguments.case_patterns)
+    ]
+
+    print(f'{"case":<48} {"ops/s":>12} {"MB/s":>8} {"p50 µs":>10} {"p90 µs":>10} {"p99 µs":>10} {"peak KiB":>10}')
+
+    results: list[CaseResult] = []
+
+    for case in cases:
+        check_case(case=case)
+        result = measure_case(case=case, min_time=parsed_arguments.min_time)
+        results.append(result)
+
+        print(_format_result(result=result), flush=True)
+
+    if parsed_arguments.save:
+        save_results(results=results, path=parsed_arguments.save)
+
+    if baseline is None:
+        return 0
+
+    comparisons = compare(results=results, baseline=baseline, threshold=parsed_arguments.threshold)
+
+    print(f'\nCompared with {parsed_arguments.compare}:')
+    for comparison in comparisons:
+        print(_format_comparison(comparison=comparison))
+
+    return 1 if any(comparison.regressed for comparison in comparisons) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
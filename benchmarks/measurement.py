@@ -0,0 +1,209 @@
+from __future__ import annotations
+from dataclasses import dataclass, asdict
+from json import dumps as json_dumps, loads as json_loads
+from pathlib import Path
+from platform import python_implementation, python_version
+from statistics import quantiles, median
+from time import perf_counter_ns
+import tracemalloc
+
+from benchmarks.corpora import BenchmarkCase
+
+# Incremented when the layout of the saved results changes incompatibly.
+_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class CaseResult:
+    """
+    The measurements of a benchmark case.
+    """
+
+    name: str
+    # The number of times the operation was performed.
+    operation_count: int
+    # Operations per second, over the median pass over the inputs.
+    throughput: float
+    # Bytes of input per second.
+    byte_throughput: float
+    # Latency percentiles of single operations, in microseconds.
+    latency_p50: float
+    latency_p90: float
+    latency_p99: float
+    # The largest amount of memory allocated during a single operation, in bytes.
+    peak_memory: int
+
+
+@dataclass(frozen=True)
+class Comparison:
+    """
+    The change of the measurements of a benchmark case relative to a baseline.
+    """
+
+    name: str
+    result: CaseResult
+    baseline: CaseResult
+    # The relative change above which the case is considered to have regressed.
+    threshold: float
+
+    @property
+    def throughput_change(self) -> float:
+        return self.result.throughput / self.baseline.throughput - 1
+
+    @property
+    def latency_p50_change(self) -> float:
+        return self.result.latency_p50 / self.baseline.latency_p50 - 1
+
+    @property
+    def latency_p99_change(self) -> float:
+        return self.result.latency_p99 / self.baseline.latency_p99 - 1
+
+    @property
+    def peak_memory_change(self) -> float:
+        return self.result.peak_memory / self.baseline.peak_memory - 1 if self.baseline.peak_memory else 0.0
+
+    @property
+    def regressed(self) -> bool:
+        """
+        Whether the throughput decreased, or the peak memory increased, by more than the threshold. The latencies are
+        not considered, as their percentiles vary more between runs.
+        """
+
+        return self.throughput_change < -self.threshold or self.peak_memory_change > self.threshold
+
+
+def check_case(case: BenchmarkCase) -> None:
+    """
+    Check that the operation of a benchmark case produces the expected outcome on each of its inputs, so that a
+    change in behaviour is not mistaken for a change in speed.
+
+    :param case: The benchmark case to be checked.
+    """
+
+    for source in case.inputs:
+        if case.operation(source) is not case.expected:
+            raise ValueError(
+                f'The case {case.name} was expected to {"succeed" if case.expected else "fail"} on the input'
+                f' {source!r}.'
+            )
+
+
+def measure_case(case: BenchmarkCase, min_time: float = 1.0) -> CaseResult:
+    """
+    Measure the throughput, latency and peak memory of the operation of a benchmark case.
+
+    After one pass over the inputs to warm up, passes are made until `min_time` has passed, and at least three
+    passes have been made, timing each operation. The throughput is that of the median pass, which makes it less
+    sensitive to other load on the machine than the mean. The peak memory is measured in a separate pass with
+    `tracemalloc`, which slows down the operations.
+
+    :param case: The benchmark case to be measured.
+    :param min_time: The minimum number of seconds to spend performing the operation.
+    :return: The measurements.
+    """
+
+    operation = case.operation
+    inputs = list(case.inputs)
+
+    for source in inputs:
+        operation(source)
+
+    latencies: list[int] = []
+    pass_times_ns: list[int] = []
+    min_time_ns = int(min_time * 1e9)
+
+    while sum(pass_times_ns) < min_time_ns or len(pass_times_ns) < 3:
+        pass_time_ns = 0
+
+        for source in inputs:
+            start_time_ns = perf_counter_ns()
+            operation(source)
+            latency = perf_counter_ns() - start_time_ns
+
+            latencies.append(latency)
+            pass_time_ns += latency
+
+        pass_times_ns.append(pass_time_ns)
+
+    median_pass_time = median(pass_times_ns) / 1e9
+
+    percentiles = quantiles((latency / 1e3 for latency in latencies), n=100, method='inclusive')
+
+    peak_memory = 0
+    tracemalloc.start()
+    try:
+        for source in inputs:
+            tracemalloc.reset_peak()
+            current_memory, _ = tracemalloc.get_traced_memory()
+            operation(source)
+            peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1] - current_memory)
+    finally:
+        tracemalloc.stop()
+
+    return CaseResult(
+        name=case.name,
+        operation_count=len(latencies),
+        throughput=len(inputs) / median_pass_time,
+        byte_throughput=sum(len(source) for source in inputs) / median_pass_time,
+        latency_p50=percentiles[49],
+        latency_p90=percentiles[89],
+        latency_p99=percentiles[98],
+        peak_memory=peak_memory
+    )
+
+
+def compare(results: list[CaseResult], baseline: dict[str, CaseResult], threshold: float = 0.1) -> list[Comparison]:
+    """
+    Compare measurements with those of a baseline.
+
+    See `Comparison.regressed`.
+
+    :param results: The measurements to be compared.
+    :param baseline: The measurements of the baseline, by case name.
+    :param threshold: The relative change above which a case is considered to have regressed.
+    :return: The comparisons of the cases that are in the baseline.
+    """
+
+    return [
+        Comparison(name=result.name, result=result, baseline=baseline[result.name], threshold=threshold)
+        for result in results
+        if result.name in baseline
+    ]
+
+
+def save_results(results: list[CaseResult], path: Path) -> None:
+    """
+    Save measurements to a JSON file, to be used as a baseline.
+
+    :param results: The measurements to be saved.
+    :param path: The path of the file.
+    """
+
+    path.write_text(
+        json_dumps(
+            {
+                'format_version': _FORMAT_VERSION,
+                'python': f'{python_implementation()} {python_version()}',
+                'results': [asdict(result) for result in results]
+            },
+            indent=4
+        )
+    )
+
+
+def load_results(path: Path) -> dict[str, CaseResult]:
+    """
+    Load measurements saved with `save_results`.
+
+    :param path: The path of the file.
+    :return: The measurements, by case name.
+    """
+
+    document = json_loads(path.read_text())
+    if document.get('format_version') != _FORMAT_VERSION:
+        raise ValueError(f'Unsupported format version of the results file: {path}')
+
+    return {
+        result.name: result
+        for result in (CaseResult(**result_dict) for result_dict in document['results'])
+    }
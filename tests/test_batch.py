@@ -0,0 +1,20 @@
+from abnf_parse.exceptions import BacktrackingLimitReachedError
+from abnf_parse.rulesets.rfc5322 import RFC5322_RULESET
+
+_SOURCES = [b'a@b', b'a (x) (x) (x) (x) @', b'c@d', b'not an address']
+
+
+def test_matches_are_produced_in_order():
+    assert list(RFC5322_RULESET.evaluate_many(_SOURCES, 'addr-spec', workers=2, chunksize=1)) == [
+        True, False, True, False
+    ]
+
+
+def test_error_is_produced_for_its_input():
+    results = list(
+        RFC5322_RULESET.evaluate_many(_SOURCES, 'addr-spec', workers=2, chunksize=1, fields=['local-part'])
+    )
+
+    assert results[0] == (b'a',)
+    assert isinstance(results[1], BacktrackingLimitReachedError)
+    assert results[2:] == [(b'c',), None]
@@ -0,0 +1,63 @@
+import pickle
+from subprocess import run
+from sys import executable
+from pathlib import Path
+
+import pytest
+
+from abnf_parse.graph import iter_nodes
+from abnf_parse.rulesets.rfc5321 import RFC5321_RULESET
+from abnf_parse.rulesets.rfc9112 import RFC9112_RULESET
+from abnf_parse.structures.evaluation_node import AlternationNode
+
+_COMPILED_CASES = [
+    ('rfc5321', 'IPv4-address-literal', b'255.242.243.100'),
+    ('rfc9112', 'origin-form', b'/a/b?c=d'),
+    ('rfc9112', 'absolute-URI', b'http://example.com/a?b'),
+]
+
+
+def _unpickled_rulesets():
+    return {'rfc5321': RFC5321_RULESET, 'rfc9112': RFC9112_RULESET} | {
+        name: pickle.loads(pickle.dumps(ruleset))
+        for name, ruleset in (('rfc5321-unpickled', RFC5321_RULESET), ('rfc9112-unpickled', RFC9112_RULESET))
+    }
+
+
+def test_dispatch_tables_refer_to_child_nodes():
+    rulesets = _unpickled_rulesets()
+
+    for ruleset in rulesets.values():
+        for node in iter_nodes(nodes=ruleset.data.values()):
+            if isinstance(node, AlternationNode) and node._dispatch_table is not None:
+                assert {child_node for entry in node._dispatch_table for child_node in entry} <= set(node.nodes)
+
+
+@pytest.mark.parametrize(('ruleset_name', 'rule_name', 'source'), _COMPILED_CASES)
+def test_unpickled_rule_matches(ruleset_name: str, rule_name: str, source: bytes):
+    ruleset = _unpickled_rulesets()[f'{ruleset_name}-unpickled']
+
+    assert ruleset[rule_name].evaluate(source=source) is not None
+    assert ruleset.compile(rule_name).evaluate(source=source, exception_on_no_match=False) is not None
+
+
+def test_rule_from_cache_compiles(tmp_path: Path):
+    script = '\n'.join([
+        'from abnf_parse.rulesets.rfc5321 import RFC5321_RULESET',
+        'from abnf_parse.rulesets.rfc9112 import RFC9112_RULESET',
+        'rulesets = {"rfc5321": RFC5321_RULESET, "rfc9112": RFC9112_RULESET}',
+        f'for ruleset_name, rule_name, source in {_COMPILED_CASES!r}:',
+        '    compiled_rule = rulesets[ruleset_name].compile(rule_name)',
+        '    assert compiled_rule.evaluate(source=source, exception_on_no_match=False) is not None, rule_name'
+    ])
+
+    # The first run builds the cache, from which the second run loads the rulesets.
+    for _ in range(2):
+        completed_process = run(
+            [executable, '-c', script],
+            env={'ABNF_PARSE_CACHE_DIR': str(tmp_path), 'PYTHONPATH': str(Path(__file__).parent.parent)},
+            capture_output=True
+        )
+        assert completed_process.returncode == 0, completed_process.stderr.decode()
+
+    assert any(tmp_path.glob('*.pickle'))
@@ -0,0 +1,44 @@
+import pytest
+
+from abnf_parse.exceptions import LeftRecursionError
+from abnf_parse.rulesets.rfc5322 import RFC5322_RULESET
+from abnf_parse.structures.evaluation_context import Engine
+from abnf_parse.structures.ruleset import Ruleset
+
+_RULESET = Ruleset.from_source(
+    source=(
+        b'left = left "a" / "a"\r\n'
+        b'indirect = "b" left\r\n'
+        b'right = "a" right / "a"\r\n'
+    )
+)
+
+
+@pytest.mark.parametrize(('rule_name', 'source'), [('left', b'aaaa'), ('indirect', b'baaaa')])
+def test_left_recursion_is_reported(rule_name: str, source: bytes):
+    with pytest.raises(LeftRecursionError) as exception_info:
+        _RULESET[rule_name].evaluate(source=source, engine=Engine.FOREST, exception_on_no_match=False)
+
+    assert exception_info.value.rule_name == 'left'
+
+    with pytest.raises(LeftRecursionError):
+        _RULESET[rule_name].matches(source=source, engine=Engine.FOREST)
+
+
+def test_right_recursion_matches():
+    rule = _RULESET['right']
+
+    assert rule.evaluate(source=b'aaaa', engine=Engine.FOREST) == rule.evaluate(source=b'aaaa')
+    assert rule.evaluate(source=b'aaab', engine=Engine.FOREST, exception_on_no_match=False) is None
+
+
+def test_deep_nesting_does_not_exhaust_stack():
+    rule = RFC5322_RULESET['comment']
+
+    source = b'(' * 30 + b'x' + b')' * 30
+    assert rule.evaluate(source=source, engine=Engine.FOREST) == rule.evaluate(source=source)
+
+    # Deeper than the backtracking engine can evaluate, as it recurses for each level of nesting.
+    source = b'(' * 2000 + b'x' + b')' * 2000
+    assert rule.evaluate(source=source, engine=Engine.FOREST).end_offset == len(source)
+    assert rule.matches(source=source, engine=Engine.FOREST)
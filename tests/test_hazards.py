@@ -0,0 +1,22 @@
+import pytest
+
+from abnf_parse.hazards import HazardKind
+from abnf_parse.rulesets.rfc9110 import RFC9110_RULESET
+from abnf_parse.rulesets.rfc9112 import RFC9112_RULESET
+from abnf_parse.structures.ruleset import Ruleset
+
+
+@pytest.mark.parametrize(
+    ('ruleset', 'rule_name'),
+    [(RFC9110_RULESET, 'field-value'), (RFC9110_RULESET, 'parameters'), (RFC9112_RULESET, 'field-value')]
+)
+def test_overlapping_inner_repetition_is_reported(ruleset: Ruleset, rule_name: str):
+    assert HazardKind.NESTED_REPETITION in {
+        hazard.kind for hazard in ruleset.find_hazards(rule_names=[rule_name])
+    }
+
+
+def test_unambiguous_repetition_is_not_reported():
+    ruleset = Ruleset.from_source(source=b'list = *( "," 1*ALPHA )\r\n')
+
+    assert ruleset.find_hazards() == []
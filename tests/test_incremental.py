@@ -0,0 +1,85 @@
+import pytest
+
+from abnf_parse.generation import InputGenerator
+from abnf_parse.incremental import HTTPMessageParser, ParseStatus
+from abnf_parse.rulesets.rfc9112 import RFC9112_RULESET
+
+
+def _feed(parser: HTTPMessageParser, source: bytes, chunk_size: int) -> ParseStatus:
+    status = parser.status
+    for offset in range(0, len(source), chunk_size):
+        status = parser.feed(chunk=source[offset:offset + chunk_size])
+
+    return status
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 1024])
+def test_message_is_parsed_in_chunks(chunk_size: int):
+    parser = HTTPMessageParser()
+
+    status = _feed(
+        parser=parser,
+        source=b'GET /index.html HTTP/1.1\r\nHost: example.com\r\nAccept: */*\r\n\r\nbody',
+        chunk_size=chunk_size
+    )
+
+    assert status is ParseStatus.COMPLETE
+    assert parser.start_line.get_field('request-line').get_field('request-target').get_value() == b'/index.html'
+    assert [field_line.get_field('field-name').get_value() for field_line in parser.field_lines] == [b'Host', b'Accept']
+    assert parser.body == b'body'
+
+
+@pytest.mark.parametrize('rule_name', ['start-line', 'field-line'])
+def test_prefixes_of_lines_need_more_data(rule_name: str):
+    generator = InputGenerator(seed=0, target_length=64)
+
+    for _ in range(50):
+        line = generator.generate(node=RFC9112_RULESET[rule_name])
+        prefix = b'' if rule_name == 'start-line' else b'GET / HTTP/1.1\r\n'
+
+        for length in range(len(line) + 1):
+            parser = HTTPMessageParser()
+            assert parser.feed(chunk=prefix + line[:length]) is ParseStatus.NEED_MORE_DATA, line[:length]
+
+
+@pytest.mark.parametrize(
+    'source',
+    [
+        b'\x00\x01garbage',
+        b'GET / HTTP/1.1 garbage',
+        b'GET  /',
+        b'GET / HTTP/1.1\r\nHost example.com',
+        b'GET / HTTP/1.1\r\nHo\x00'
+    ]
+)
+def test_unfinished_line_that_cannot_match_is_rejected(source: bytes):
+    parser = HTTPMessageParser()
+
+    assert parser.feed(chunk=source) is ParseStatus.NO_MATCH
+
+
+def test_garbage_is_not_buffered():
+    parser = HTTPMessageParser()
+
+    assert _feed(parser=parser, source=b'\x00\x01garbage' * 100000, chunk_size=4096) is ParseStatus.NO_MATCH
+    assert not parser._buffer
+
+
+def test_long_line_is_rejected():
+    parser = HTTPMessageParser(max_line_length=64)
+
+    assert parser.feed(chunk=b'GET / HTTP/1.1\r\nHost: ' + b'a' * 58) is ParseStatus.NEED_MORE_DATA
+    assert parser.feed(chunk=b'a') is ParseStatus.NO_MATCH
+
+
+def test_long_complete_line_is_rejected():
+    parser = HTTPMessageParser(max_line_length=64)
+
+    assert parser.feed(chunk=b'GET / HTTP/1.1\r\nHost: ' + b'a' * 59 + b'\r\n\r\n') is ParseStatus.NO_MATCH
+
+
+def test_line_length_is_not_limited():
+    parser = HTTPMessageParser(max_line_length=None)
+
+    assert _feed(parser=parser, source=b'GET /' + b'a' * 9000, chunk_size=16) is ParseStatus.NEED_MORE_DATA
+    assert parser.feed(chunk=b' HTTP/1.1\r\n\r\n') is ParseStatus.COMPLETE
@@ -0,0 +1,102 @@
+from copy import copy
+from time import perf_counter
+
+import pytest
+
+from abnf_parse.exceptions import BacktrackingLimitReachedError
+from abnf_parse.generation import InputGenerator
+from abnf_parse.rulesets import CORE_RULESET, ABNF_RULESET
+from abnf_parse.rulesets.rfc3986 import RFC3986_RULESET
+from abnf_parse.rulesets.rfc5321 import RFC5321_RULESET, RFC5321_LENIENT_RULESET
+from abnf_parse.rulesets.rfc5322 import RFC5322_RULESET
+from abnf_parse.rulesets.rfc7239 import RFC7239_RULESET
+from abnf_parse.rulesets.rfc9110 import RFC9110_RULESET
+from abnf_parse.rulesets.rfc9112 import RFC9112_RULESET
+
+_RULESETS = {
+    'core': CORE_RULESET,
+    'abnf': ABNF_RULESET,
+    'rfc3986': RFC3986_RULESET,
+    'rfc5321': RFC5321_RULESET,
+    'rfc5321-lenient': RFC5321_LENIENT_RULESET,
+    'rfc5322': RFC5322_RULESET,
+    'rfc7239': RFC7239_RULESET,
+    'rfc9110': RFC9110_RULESET,
+    'rfc9112': RFC9112_RULESET,
+}
+
+_LOWERED_RULES = [
+    (ruleset_name, rule_name)
+    for ruleset_name, ruleset in _RULESETS.items()
+    for rule_name, rule in ruleset.data.items()
+    if rule._regular_rule_evaluator is not None and rule._regular_rule_evaluator.supports(node=rule)
+]
+
+
+def _inputs(rule) -> list[bytes]:
+    """
+    Return generated inputs matching a rule, near misses, and all the prefixes of the matching inputs, which end in the
+    middle of repetitions.
+    """
+
+    generator = InputGenerator(seed=0, target_length=48)
+
+    inputs: list[bytes] = []
+    for _ in range(5):
+        source = generator.generate(node=rule)
+        inputs.append(source)
+        inputs.extend(source[:length] for length in range(len(source)))
+        try:
+            inputs.append(generator.generate_near_miss(node=rule, backtracking_limit=False))
+        except ValueError:
+            pass
+
+    return list(dict.fromkeys(inputs))
+
+
+def test_rules_are_lowered():
+    assert len(_LOWERED_RULES) > 100
+
+
+@pytest.mark.parametrize(('ruleset_name', 'rule_name'), _LOWERED_RULES)
+def test_lowered_rule_matches_node_engine(ruleset_name: str, rule_name: str):
+    rule = _RULESETS[ruleset_name][rule_name]
+
+    unlowered_rule = copy(rule)
+    unlowered_rule._regular_rule_evaluator = None
+
+    for source in _inputs(rule=rule):
+        # The inputs on which the node engine reaches the backtracking limit are skipped.
+        try:
+            expected = unlowered_rule.evaluate(source=source, exception_on_no_match=False)
+            expected_prefix = unlowered_rule.match_prefix(source=source)
+        except BacktrackingLimitReachedError:
+            continue
+
+        assert rule.evaluate(source=source, exception_on_no_match=False) == expected, source
+        assert rule.matches(source=source) is (expected is not None), source
+        assert rule.match_prefix(source=source) == expected_prefix, source
+
+
+@pytest.mark.parametrize(
+    ('ruleset_name', 'rule_name'),
+    [('rfc9110', 'field-value'), ('rfc9110', 'parameters'), ('rfc9112', 'field-line')]
+)
+def test_ambiguous_rule_is_not_lowered(ruleset_name: str, rule_name: str):
+    assert (ruleset_name, rule_name) not in _LOWERED_RULES
+
+
+def test_ambiguous_rule_is_rejected_quickly():
+    source = b'a a' * 24 + b'\x00'
+
+    for rule, method in (
+        (RFC9110_RULESET['field-value'], 'fullmatch'),
+        (RFC9110_RULESET['field-value'], 'matches'),
+        (RFC9112_RULESET['field-line'], 'fullmatch')
+    ):
+        start_time = perf_counter()
+        try:
+            assert not getattr(rule, method)(source=source)
+        except BacktrackingLimitReachedError:
+            pass
+        assert perf_counter() - start_time < 1, (rule.name, method)
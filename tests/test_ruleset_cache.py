@@ -0,0 +1,82 @@
+from os import chown, getuid
+from pathlib import Path
+from stat import S_IMODE
+
+import pytest
+
+from abnf_parse.ruleset_cache import load_cached
+
+
+class _Builder:
+    def __init__(self):
+        self.build_count = 0
+
+    def __call__(self) -> dict[str, int]:
+        self.build_count += 1
+        return {'value': 1}
+
+
+@pytest.fixture
+def cache_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    directory = tmp_path / 'cache'
+    monkeypatch.setenv('ABNF_PARSE_CACHE_DIR', str(directory))
+    return directory
+
+
+def test_entry_is_loaded(cache_directory: Path):
+    builder = _Builder()
+
+    assert load_cached(name='test', source=b'a = "a"\r\n', build=builder) == {'value': 1}
+    assert load_cached(name='test', source=b'a = "a"\r\n', build=builder) == {'value': 1}
+    assert builder.build_count == 1
+
+    assert S_IMODE(cache_directory.stat().st_mode) == 0o700
+    assert S_IMODE((cache_directory / 'test.pickle').stat().st_mode) == 0o600
+
+
+def test_entry_writable_by_others_is_not_loaded(cache_directory: Path):
+    builder = _Builder()
+
+    load_cached(name='test', source=b'a = "a"\r\n', build=builder)
+    (cache_directory / 'test.pickle').chmod(0o666)
+    load_cached(name='test', source=b'a = "a"\r\n', build=builder)
+
+    assert builder.build_count == 2
+
+
+@pytest.mark.skipif(getuid() != 0, reason='Changing the owner of a file requires root.')
+def test_entry_owned_by_another_user_is_not_loaded(cache_directory: Path):
+    builder = _Builder()
+
+    load_cached(name='test', source=b'a = "a"\r\n', build=builder)
+    chown(cache_directory / 'test.pickle', 12345, 12345)
+    load_cached(name='test', source=b'a = "a"\r\n', build=builder)
+
+    assert builder.build_count == 2
+
+
+def test_referenced_rules_are_not_copied(cache_directory: Path):
+    from abnf_parse.structures.ruleset import Ruleset
+
+    referenced_ruleset = Ruleset.from_source(source=b'word = 1*ALPHA\r\n')
+
+    def build() -> Ruleset:
+        return Ruleset({'word': referenced_ruleset['word']}).update_from_source(source=b'words = word *( SP word )\r\n')
+
+    load_cached(name='test', source=b'words', build=build, referenced_rulesets=[referenced_ruleset])
+    ruleset = load_cached(name='test', source=b'words', build=build, referenced_rulesets=[referenced_ruleset])
+
+    assert ruleset['word'] is referenced_ruleset['word']
+    assert ruleset['ALPHA'] is Ruleset.CORE_RULESET['ALPHA']
+    assert ruleset['words'].node_a is referenced_ruleset['word']
+    assert ruleset['words'].evaluate(source=b'a bc').get_field(name='word').get_value() == b'a'
+
+
+def test_cache_is_disabled_by_default(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.delenv('ABNF_PARSE_CACHE_DIR', raising=False)
+    builder = _Builder()
+
+    load_cached(name='test', source=b'a = "a"\r\n', build=builder)
+    load_cached(name='test', source=b'a = "a"\r\n', build=builder)
+
+    assert builder.build_count == 2
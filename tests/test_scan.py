@@ -0,0 +1,19 @@
+from pytest import raises
+
+from abnf_parse.exceptions import BacktrackingLimitReachedError
+from abnf_parse.structures.ruleset import Ruleset
+
+# Seeking a match in the run of `a` backtracks exponentially, as it can be split into `a` and `aa` in many ways.
+_RULESET = Ruleset.from_source(source=b'x = *( "a" / "aa" ) "bb"\r\n')
+_SOURCE = b'abb ' + b'a' * 24 + b'bc aabb'
+
+
+def test_backtracking_limit_ends_scan():
+    with raises(BacktrackingLimitReachedError):
+        list(_RULESET.finditer(_SOURCE, 'x'))
+
+
+def test_limited_offsets_are_skipped():
+    assert [bytes(match) for match in _RULESET.finditer(_SOURCE, 'x', skip_limited_offsets=True)] == [
+        b'abb', b'aabb'
+    ]